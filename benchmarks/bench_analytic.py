@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Analytic placement benchmark - quadratic placement at scale, and warm starts
+
+Places synthetic designs with the analytic placer (and the force-directed
+placer up to --force-limit blocks) and reports runtime, wirelength and
+overlap. Then drags a few blocks across the placement and times the warm
+start that re-solves only their neighbourhood.
+"""
+
+import argparse
+
+import numpy as np
+
+from common import Timer, make_blocks, make_connections
+from floorplan_analytic import quadratic_place, warm_place
+from floorplan_metrics import overlap_area
+from floorplan_placement import PlacementProblem, force_directed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--nets-per-block', type=int, default=3)
+    parser.add_argument('--force-limit', type=int, default=10000)
+    parser.add_argument('--dragged', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'blocks':>7} {'method':>9} {'seconds':>8} {'wirelength':>12} {'overlap':>8} {'rounds':>7}")
+    for n in args.sizes:
+        blocks = make_blocks(n)
+        connections = make_connections(blocks, args.nets_per_block)
+        problem = PlacementProblem.from_stores(blocks, connections)
+        total = float(blocks.area.sum())
+        cx, cy = blocks.centers()
+        print(f"{n:>7} {'grid':>9} {0:>8.2f} {problem.wirelength(cx, cy):>12.4g} "
+              f"{overlap_area(problem.bounds(cx, cy)) / total:>8.3f}")
+
+        with Timer() as timer:
+            cx, cy, rounds = quadratic_place(problem)
+        print(f"{n:>7} {'analytic':>9} {timer.elapsed:>8.2f} {problem.wirelength(cx, cy):>12.4g} "
+              f"{overlap_area(problem.bounds(cx, cy)) / total:>8.3f} {len(rounds):>7}")
+
+        if n <= args.force_limit:
+            with Timer() as force:
+                fx, fy = force_directed(problem)
+            print(f"{n:>7} {'force':>9} {force.elapsed:>8.2f} {problem.wirelength(fx, fy):>12.4g} "
+                  f"{overlap_area(problem.bounds(fx, fy)) / total:>8.3f}")
+
+        # Drag a few blocks by a tenth of the placement, then warm start around them
+        rng = np.random.default_rng(0)
+        dragged = rng.choice(n, args.dragged, replace=False)
+        cx[dragged] += 0.1 * np.ptp(cx)
+        before = problem.wirelength(cx, cy)
+        with Timer() as warm:
+            wx, wy, moved, iterations = warm_place(problem, cx, cy, dragged)
+        print(f"{n:>7} {'warm':>9} {warm.elapsed:>8.3f} {problem.wirelength(wx, wy):>12.4g} "
+              f"(was {before:.4g}; {len(moved)} blocks re-solved, {iterations} CG iterations)")
+
+
+if __name__ == '__main__':
+    main()
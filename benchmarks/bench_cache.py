@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Parse cache benchmark - cold parse versus cache hits on a large matrix
+
+Writes an n×n adjacency CSV, then times the first load (parse plus cache
+store), hits keyed by size+mtime and by content hash, a miss after the file
+changes, and LRU trimming with a byte budget smaller than two entries.
+"""
+
+import argparse
+import os
+import tempfile
+
+import numpy as np
+
+from common import Timer
+from generate import write_matrix_csv
+from floorplan_cache import NetlistCache
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--size', type=int, default=10000)
+    parser.add_argument('--density', type=float, default=0.001)
+    parser.add_argument('--hits', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, 'matrix.csv')
+        with Timer() as written:
+            write_matrix_csv(source, args.size, args.density)
+        print(f"{args.size}×{args.size} matrix: {os.path.getsize(source) / 2**20:.0f} MiB CSV "
+              f"(written in {written.elapsed:.1f} s)")
+
+        for mode in ('stat', 'content'):
+            cache = NetlistCache(os.path.join(tmp, f'cache-{mode}'), key=mode)
+            with Timer() as cold:
+                parsed = cache.read(source)
+            times = []
+            for _ in range(args.hits):
+                with Timer() as hit:
+                    cached = cache.read(source)
+                times.append(hit.elapsed)
+            assert cache.hits == args.hits and np.array_equal(cached.weights, parsed.weights)
+            print(f"key={mode:<8} cold parse {cold.elapsed:6.2f} s | hit median {np.median(times) * 1e3:7.1f} ms "
+                  f"| entry {cache.nbytes() / 2**20:.1f} MiB")
+
+        # Rewriting the source changes its size/mtime: the next read parses again
+        cache = NetlistCache(os.path.join(tmp, 'cache-stat'))
+        write_matrix_csv(source, args.size, args.density, seed=1)
+        with Timer() as changed:
+            cache.read(source)
+        print(f"after the source changed: miss={cache.misses == 1}, parsed in {changed.elapsed:.2f} s")
+
+        # A budget of 1.5 entries keeps only the most recent one
+        cache.max_bytes = int(cache.nbytes() * 0.75)
+        cache.evict()
+        print(f"LRU trim to {cache.max_bytes / 2**20:.1f} MiB: {len(cache.entries())} entries left")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+CLI benchmark - cold-start and per-file overhead of floorplan_cli.py
+
+Times fresh interpreter launches on a small matrix, then a batch of files
+in one invocation, and checks that no GUI modules are imported and that a
+free-form outline next to an input is applied.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from common import Timer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CLI = os.path.join(ROOT, 'floorplan_cli.py')
+SAMPLE = os.path.join(ROOT, 'sample_adjacency_matrix.csv')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--launches', type=int, default=5)
+    parser.add_argument('--files', type=int, default=100)
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    # Cold start: one interpreter per file
+    with Timer() as cold:
+        for _ in range(args.launches):
+            subprocess.run([sys.executable, CLI, SAMPLE, '--method', 'none', '-j', '1'],
+                           check=True, capture_output=True)
+    print(f"cold start (launch + load + score): {cold.elapsed / args.launches * 1e3:.0f} ms per process")
+
+    # GUI modules must stay out of the headless path
+    probe = ("import sys; import floorplan_cli; "
+             "print(','.join(m for m in ('tkinter', 'matplotlib', 'pandas') if m in sys.modules))")
+    loaded = subprocess.run([sys.executable, '-c', probe], cwd=ROOT, check=True,
+                            capture_output=True, text=True).stdout.strip()
+    print(f"heavy modules imported by the CLI: {loaded or 'none'}")
+
+    # Batch: many files through one invocation
+    with tempfile.TemporaryDirectory() as tmp:
+        sample = open(SAMPLE).read()
+        for i in range(args.files):
+            with open(os.path.join(tmp, f'design_{i}.csv'), 'w') as f:
+                f.write(sample)
+        with Timer() as batch:
+            result = subprocess.run([sys.executable, CLI, tmp, '--method', 'force', '-j', str(args.jobs),
+                                     '--timings'], check=True, capture_output=True, text=True)
+    print(f"batch of {args.files} files with {args.jobs} jobs: {batch.elapsed:.2f} s")
+    print(result.stderr.strip())
+
+    # An L-shaped outline for one block, picked up from design.outlines.csv
+    with tempfile.TemporaryDirectory() as tmp:
+        with open(os.path.join(tmp, 'design.csv'), 'w') as f:
+            f.write(open(SAMPLE).read())
+        with open(os.path.join(tmp, 'design.outlines.csv'), 'w') as f:
+            f.write("name,x,y\n")
+            for x, y in ((0, 0), (2000, 0), (2000, 1000), (1000, 1000), (1000, 2000), (0, 2000)):
+                f.write(f"CPU_Core,{x},{y}\n")
+        lines = subprocess.run([sys.executable, CLI, tmp, '--method', 'none', '-j', '1'],
+                               check=True, capture_output=True, text=True).stdout.splitlines()
+    records = [json.loads(line) for line in lines]
+    assert len(records) == 1 and records[0]['outlines'] == 1, records
+    print(f"outline file applied: {records[0]['outlines']} block, status {records[0]['status']}")
+
+
+if __name__ == '__main__':
+    main()
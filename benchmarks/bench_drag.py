@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Drag benchmark - frames per second for a scripted block drag
+
+Compares the retained-mode blitting renderer with the old behaviour of
+rebuilding every artist and redrawing the whole figure on each motion event.
+"""
+
+import argparse
+
+from common import HANDLE_CONFIG, Timer, agg_axes, make_blocks, make_connections
+from floorplan_metrics import MetricsEngine
+from floorplan_render import FloorplanRenderer
+
+
+def drag_fps(n, frames, full_redraw, with_metrics=False):
+    """Drag block 0 diagonally for a number of frames and return frames/s"""
+    blocks = make_blocks(n)
+    connections = make_connections(blocks)
+    fig, ax, canvas = agg_axes()
+    renderer = FloorplanRenderer(ax, canvas, HANDLE_CONFIG)
+    metrics = MetricsEngine(blocks, connections) if with_metrics else None
+
+    block = blocks[0]
+    renderer.rebuild(blocks, connections, block)
+    renderer.set_selection(block)
+    if not full_redraw:
+        renderer.begin_drag(block)
+
+    with Timer() as timer:
+        for _ in range(frames):
+            block['x'] += 1.0
+            block['y'] += 1.0
+            if metrics is not None:
+                metrics.update_block(block['id'])
+                metrics.summary()
+            if full_redraw:
+                renderer.rebuild(blocks, connections, block)
+            else:
+                renderer.drag_update(block)
+
+    if not full_redraw:
+        renderer.end_drag()
+    return frames / timer.elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--frames', type=int, default=200)
+    parser.add_argument('--legacy-frames', type=int, default=3,
+                        help='frames for the full-redraw path (it is slow)')
+    parser.add_argument('--skip-legacy', action='store_true')
+    args = parser.parse_args()
+
+    print(f"{'blocks':>8} {'blit fps':>10} {'+metrics':>10} {'full fps':>10}")
+    for n in args.sizes:
+        blit = drag_fps(n, args.frames, full_redraw=False)
+        scored = drag_fps(n, args.frames, full_redraw=False, with_metrics=True)
+        full = float('nan') if args.skip_legacy else drag_fps(n, args.legacy_frames, full_redraw=True)
+        print(f"{n:>8} {blit:>10.1f} {scored:>10.1f} {full:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Event pipeline benchmark - drag latency under a fast stream of motion events
+
+Replays motion events at a fixed rate against a real drag (metrics update
+plus blit on the Agg canvas), once handling every event synchronously as
+the old on_mouse_move did and once through MotionCoalescer. A small
+after()-style loop stands in for the Tk event loop.
+"""
+
+import argparse
+import heapq
+import itertools
+import time
+
+from common import HANDLE_CONFIG, agg_axes, make_blocks, make_connections
+from floorplan_events import MotionCoalescer, percentile
+from floorplan_metrics import MetricsEngine
+from floorplan_render import FloorplanRenderer
+
+
+class EventLoop:
+    """Minimal single-threaded stand-in for Tk's after() scheduling"""
+
+    def __init__(self):
+        self.timers = []
+        self.ids = itertools.count()
+        self.cancelled = set()
+
+    def after(self, ms, callback):
+        timer_id = next(self.ids)
+        heapq.heappush(self.timers, (time.perf_counter() + ms / 1000, timer_id, callback))
+        return timer_id
+
+    def after_cancel(self, timer_id):
+        self.cancelled.add(timer_id)
+
+    def run_due(self):
+        while self.timers and self.timers[0][0] <= time.perf_counter():
+            _, timer_id, callback = heapq.heappop(self.timers)
+            if timer_id not in self.cancelled:
+                callback()
+
+
+def replay(n, events, rate, coalesce):
+    """Drag block 0 with events arriving at rate per second; returns stats"""
+    blocks = make_blocks(n)
+    connections = make_connections(blocks)
+    metrics = MetricsEngine(blocks, connections)
+    fig, ax, canvas = agg_axes()
+    renderer = FloorplanRenderer(ax, canvas, HANDLE_CONFIG)
+    block = blocks[0]
+    renderer.rebuild(blocks, connections, block)
+    renderer.begin_drag(block)
+    applied = [0.0, 0.0]
+
+    def handle(position):
+        # Apply the delta since the last handled position, like process_motion
+        block['x'] += position[0] - applied[0]
+        block['y'] += position[1] - applied[1]
+        applied[:] = position
+        metrics.update_block(0)
+        metrics.summary()
+        renderer.drag_update(block)
+
+    loop = EventLoop()
+    coalescer = MotionCoalescer(loop, handle)
+    latencies = []
+    start = time.perf_counter()
+    arrivals = [start + i / rate for i in range(events)]
+    delivered = 0
+    while delivered < events or loop.timers:
+        now = time.perf_counter()
+        # Everything that arrived while we were busy is now in the queue
+        while delivered < events and arrivals[delivered] <= now:
+            position = (delivered + 1.0, delivered + 1.0)
+            if coalesce:
+                coalescer.submit(position, stamp=arrivals[delivered])
+            else:
+                handle(position)
+                latencies.append(time.perf_counter() - arrivals[delivered])
+            delivered += 1
+        loop.run_due()
+        if delivered < events and not loop.timers:
+            time.sleep(max(0.0, arrivals[delivered] - time.perf_counter()))
+    coalescer.flush()
+    wall = time.perf_counter() - start
+
+    if coalesce:
+        stats = coalescer.stats()
+        return (stats['frames'], stats['coalesced'], stats['latency_p50_ms'], stats['latency_p99_ms'],
+                wall, applied[0] == events)
+    return (events, 0, percentile(latencies, 50) * 1e3, percentile(latencies, 99) * 1e3,
+            wall, applied[0] == events)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--events', type=int, default=500)
+    parser.add_argument('--rate', type=float, default=500.0, help="motion events per second")
+    args = parser.parse_args()
+
+    print(f"{args.events} motion events at {args.rate:.0f}/s")
+    print(f"{'blocks':>7} {'pipeline':>10} {'frames':>7} {'coalesced':>10} {'p50 ms':>8} {'p99 ms':>8} "
+          f"{'wall s':>7} {'final pos ok':>13}")
+    for n in args.sizes:
+        for name, coalesce in (('sync', False), ('coalesced', True)):
+            frames, coalesced, p50, p99, wall, ok = replay(n, args.events, args.rate, coalesce)
+            print(f"{n:>7} {name:>10} {frames:>7} {coalesced:>10} {p50:>8.1f} {p99:>8.1f} {wall:>7.2f} {ok!s:>13}")
+
+
+if __name__ == '__main__':
+    main()
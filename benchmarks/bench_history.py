@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+History benchmark - undo/redo cost and memory of the delta journal
+
+Records a session of single-block drags with an occasional whole-layout
+edit (like Auto Place), then times undo, redo and long jumps, and compares
+the journal's memory with keeping a full copy of the geometry per step.
+"""
+
+import argparse
+
+import numpy as np
+
+from common import Timer, make_blocks
+from floorplan_history import EditHistory
+from floorplan_store import BlockStore
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--blocks', type=int, default=100000)
+    parser.add_argument('--edits', type=int, default=1000)
+    parser.add_argument('--global-every', type=int, default=250, help="whole-layout edit every N edits")
+    parser.add_argument('--limit', type=int, default=500, help="history entry cap")
+    args = parser.parse_args()
+
+    blocks = make_blocks(args.blocks)
+    history = EditHistory(blocks, limit=args.limit)
+    rng = np.random.default_rng(0)
+
+    commit_times = []
+    for k in range(args.edits):
+        if k % args.global_every == args.global_every // 2:
+            with Timer() as timer:
+                with history.edit("Auto Place"):
+                    blocks.x += rng.normal(0, 5, len(blocks))
+        else:
+            block_id = int(rng.integers(len(blocks)))
+            with Timer() as timer:
+                # One drag: many motion updates, one entry
+                history.begin([block_id])
+                for _ in range(60):
+                    blocks.x[block_id] += 1.0
+                history.commit("Move")
+        commit_times.append(timer.elapsed)
+
+    full_copies = min(args.edits, args.limit) * len(blocks) * (8 * len(BlockStore.FIELDS) + 1)
+    print(f"{args.blocks} blocks, {args.edits} edits, {len(history)} kept (cap {args.limit}), "
+          f"{len(history.snapshots)} snapshots")
+    print(f"commit: median {np.median(commit_times) * 1e3:.3f} ms, max {max(commit_times) * 1e3:.1f} ms")
+    print(f"memory: journal {history.nbytes() / 2**20:.1f} MiB vs full copies {full_copies / 2**20:.0f} MiB")
+
+    print(f"{'operation':>12} {'steps':>6} {'changed':>8} {'ms':>9}")
+    for name, steps in (('undo', -1), ('redo', 1), ('jump', -10), ('jump', 10), ('jump', -100),
+                        ('jump', 100), ('jump', -len(history)), ('jump', len(history))):
+        with Timer() as timer:
+            changed = history.jump(steps)
+        print(f"{name:>12} {steps:>6} {len(changed):>8} {timer.elapsed * 1e3:>9.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Hit-test benchmark - random point queries against the spatial grid
+
+Runs point queries through SpatialGrid and a sample through the old linear
+scan over the block list, and checks both return the same block.
+"""
+
+import argparse
+
+import numpy as np
+
+from common import Timer, make_blocks
+from floorplan_spatial import SpatialGrid
+
+
+def linear_scan(blocks, x, y):
+    """The original get_block_at_position loop"""
+    for block in blocks:
+        if (x >= block['x'] and x <= block['x'] + block['width'] and
+                y >= block['y'] and y <= block['y'] + block['height']):
+            return block['id']
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--blocks', type=int, default=10000)
+    parser.add_argument('--queries', type=int, default=1_000_000)
+    parser.add_argument('--linear-queries', type=int, default=2000)
+    args = parser.parse_args()
+
+    blocks = make_blocks(args.blocks)
+    rng = np.random.default_rng(1)
+    span = (blocks.x + blocks.width).max(), (blocks.y + blocks.height).max()
+    xs = rng.uniform(0, span[0], args.queries).tolist()
+    ys = rng.uniform(0, span[1], args.queries).tolist()
+
+    index = SpatialGrid()
+    with Timer() as build:
+        index.build(blocks)
+
+    query = index.query_point
+    with Timer() as grid:
+        for x, y in zip(xs, ys):
+            query(x, y)
+
+    m = min(args.linear_queries, args.queries)
+    dicts = [block.to_dict() for block in blocks]
+    with Timer() as linear:
+        expected = [linear_scan(dicts, x, y) for x, y in zip(xs[:m], ys[:m])]
+    assert expected == [query(x, y) for x, y in zip(xs[:m], ys[:m])]
+
+    # Drag one block around to exercise incremental updates
+    block = blocks[0]
+    with Timer() as updates:
+        for _ in range(10000):
+            block['x'] += 3.0
+            index.update(block)
+
+    grid_us = grid.elapsed / args.queries * 1e6
+    linear_us = linear.elapsed / m * 1e6
+    print(f"blocks: {args.blocks}  cell size: {index.cell_size:.1f}  build: {build.elapsed * 1e3:.1f} ms")
+    print(f"grid:   {args.queries} queries in {grid.elapsed:.2f} s ({grid_us:.2f} µs/query)")
+    print(f"linear: {m} queries in {linear.elapsed:.2f} s ({linear_us:.2f} µs/query)")
+    print(f"speedup: {linear_us / grid_us:.0f}x  incremental update: {updates.elapsed / 10000 * 1e6:.2f} µs")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Legality benchmark - incremental overlap checks per drag frame and legalize
+
+Jitters a grid of blocks (some shaped) so neighbours overlap, then times a
+full check, single-block updates as a drag would make them (against a full
+re-check per frame), and the legalize pass. The incremental pairs are
+compared with a fresh check at the end of the drag, and so are engines
+scored on a copy and rebound to the live blocks, as Auto Place does.
+"""
+
+import argparse
+
+import numpy as np
+
+from common import Timer, make_blocks, make_connections
+from bench_shapes import shape_blocks
+from floorplan_events import percentile
+from floorplan_legality import LegalityChecker, find_overlaps, legalize
+from floorplan_metrics import MetricsEngine
+
+
+def check_rebind(blocks):
+    """Score a copy, rebind to blocks, spread every block apart and compare with a rebuild"""
+    connections = make_connections(blocks, 2)
+    placed = blocks.copy()
+    metrics, checker = MetricsEngine(placed, connections), LegalityChecker(placed)
+    metrics.rebind(blocks)
+    checker.rebind(blocks)
+    blocks.x *= 3
+    blocks.y *= 3
+    for block_id in range(len(blocks)):
+        metrics.update_block(block_id)
+        checker.update_block(block_id)
+    fresh = MetricsEngine(blocks, connections)
+    assert np.isclose(metrics.overlap, fresh.overlap, atol=1e-6), (metrics.overlap, fresh.overlap)
+    assert checker.summary() == LegalityChecker(blocks).summary(), checker.summary()
+    return checker.summary()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--blocks', type=int, default=10000)
+    parser.add_argument('--shaped', type=float, default=0.3)
+    parser.add_argument('--jitter', type=float, default=80.0)
+    parser.add_argument('--frames', type=int, default=2000)
+    args = parser.parse_args()
+
+    blocks = make_blocks(args.blocks)
+    rng = np.random.default_rng(3)
+    blocks.x += rng.uniform(-args.jitter, args.jitter, len(blocks))
+    blocks.y += rng.uniform(-args.jitter, args.jitter, len(blocks))
+    shape_blocks(blocks, args.shaped)
+
+    with Timer() as full:
+        checker = LegalityChecker(blocks)
+    print(f"{args.blocks} blocks: full check {full.elapsed * 1e3:.1f} ms, {checker.summary()}")
+
+    # One block dragged in small steps, as on_mouse_move would
+    dragged = int(rng.integers(len(blocks)))
+    steps = rng.normal(0, 15, (args.frames, 2))
+    frames = []
+    for dx, dy in steps.tolist():
+        blocks.x[dragged] += dx
+        blocks.y[dragged] += dy
+        with Timer() as frame:
+            checker.update_block(dragged)
+            checker.violators()
+        frames.append(frame.elapsed)
+    pairs, _ = find_overlaps(blocks)
+    same = set(map(tuple, pairs.tolist())) == set(map(tuple, checker.pairs.tolist()))
+    print(f"drag frame: p50 {percentile(frames, 50) * 1e3:.3f} ms  p99 {percentile(frames, 99) * 1e3:.3f} ms  "
+          f"max {max(frames) * 1e3:.3f} ms  (full check per frame: {full.elapsed * 1e3:.1f} ms)  "
+          f"matches full check: {same}")
+
+    print(f"rebound engines after spreading: {check_rebind(blocks.copy())}, matches a rebuild")
+
+    with Timer() as t:
+        stats = legalize(blocks)
+    print(f"legalize: {t.elapsed * 1e3:.0f} ms, {stats['iterations']} rounds, {stats['moved']} blocks moved, "
+          f"mean move {stats['total_displacement'] / max(stats['moved'], 1):.1f} μm, "
+          f"max {stats['max_displacement']:.1f} μm, {stats['remaining_pairs']} pairs left")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Load benchmark - wall time and peak RSS of adjacency-matrix loading
+
+Compares the old dense path (pd.read_csv + nested n² Python loops) with the
+streaming sparse loader. Each run happens in a fresh subprocess so the peak
+RSS belongs to that loader alone.
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+
+from common import Timer
+from generate import write_matrix_csv
+
+
+def legacy_load(path):
+    """The original upload_csv + process_adjacency_matrix path"""
+    import pandas as pd
+
+    df = pd.read_csv(path, index_col=0)
+    names = df.index.tolist()
+    matrix = df.values
+    blocks, connections = [], []
+    for i in range(len(matrix)):
+        blocks.append({'id': i, 'name': names[i], 'area': matrix[i][i]})
+    for i in range(len(matrix)):
+        for j in range(i + 1, len(matrix)):
+            if matrix[i][j] > 0:
+                connections.append({'from': i, 'to': j, 'connections': matrix[i][j]})
+    return len(blocks), len(connections)
+
+
+def streaming_load(path):
+    """The streaming sparse loader"""
+    from floorplan_io import read_netlist
+
+    netlist = read_netlist(path)
+    return len(netlist.names), len(netlist.src)
+
+
+def run_child(mode, path):
+    """Run one loader in this process and print a JSON result"""
+    loader = legacy_load if mode == 'legacy' else streaming_load
+    with Timer() as timer:
+        blocks, nets = loader(path)
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({'mode': mode, 'blocks': blocks, 'nets': nets,
+                      'seconds': timer.elapsed, 'peak_rss_mb': peak_kb / 1024}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 2000, 5000])
+    parser.add_argument('--density', type=float, default=0.001)
+    parser.add_argument('--skip-legacy', action='store_true')
+    parser.add_argument('--child', nargs=2, metavar=('MODE', 'PATH'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(*args.child)
+        return
+
+    modes = ['streaming'] if args.skip_legacy else ['legacy', 'streaming']
+    print(f"{'n':>7} {'mode':>10} {'nets':>9} {'seconds':>9} {'peak MB':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.sizes:
+            path = os.path.join(tmp, f'matrix_{n}.csv')
+            write_matrix_csv(path, n, args.density)
+            for mode in modes:
+                out = subprocess.run([sys.executable, __file__, '--child', mode, path],
+                                     check=True, capture_output=True, text=True).stdout
+                result = json.loads(out)
+                print(f"{n:>7} {mode:>10} {result['nets']:>9} {result['seconds']:>9.2f} {result['peak_rss_mb']:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Net index benchmark - per-block net queries by scan vs the CSR index
+
+Times building the NetIndex, then looks up the nets, strongest neighbours
+and fan-out of random blocks both by scanning every connection and through
+the index, and applies weight edits incrementally against a full rebuild.
+"""
+
+import argparse
+
+import numpy as np
+
+from common import Timer, make_blocks, make_connections
+from floorplan_graph import NetIndex
+
+
+def scan_strongest(connections, block_id, k):
+    """Strongest neighbours by a scan of every connection (the unindexed way)"""
+    touching = np.flatnonzero((connections.src == block_id) | (connections.dst == block_id))
+    far = np.where(connections.src[touching] == block_id, connections.dst[touching], connections.src[touching])
+    ids, inverse = np.unique(far, return_inverse=True)
+    totals = np.bincount(inverse, weights=connections.weights[touching], minlength=len(ids))
+    order = np.argsort(-totals, kind='stable')[:k]
+    return ids[order], totals[order]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--nets-per-block', type=int, default=3)
+    parser.add_argument('--queries', type=int, default=1000)
+    parser.add_argument('--edits', type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f"{'blocks':>7} {'nets':>8} {'build ms':>9} {'scan us':>9} {'index us':>9} {'speedup':>8} "
+          f"{'edit us':>8} {'rebuild ms':>11}")
+    for n in args.sizes:
+        blocks = make_blocks(n)
+        connections = make_connections(blocks, args.nets_per_block)
+        with Timer() as build:
+            index = NetIndex(connections, n)
+
+        rng = np.random.default_rng(0)
+        queries = rng.integers(0, n, args.queries).tolist()
+        with Timer() as scan:
+            for block_id in queries:
+                scan_strongest(connections, block_id, 5)
+        with Timer() as indexed:
+            for block_id in queries:
+                index.nets(block_id)
+                index.strongest(block_id, 5)
+                index.fanout(block_id)
+
+        # The index must agree with the scan it replaces
+        for block_id in queries[:50]:
+            expected, got = scan_strongest(connections, block_id, 5), index.strongest(block_id, 5)
+            assert np.allclose(np.sort(expected[1]), np.sort(got[1]))
+
+        edited = rng.integers(0, len(connections), args.edits)
+        with Timer() as edits:
+            for net_id in edited.tolist():
+                connections.weights[net_id] += 1
+                index.weight_changed(net_id)
+        with Timer() as rebuild:
+            NetIndex(connections, n)
+        assert np.allclose(index.weighted_degree, NetIndex(connections, n).weighted_degree)
+
+        print(f"{n:>7} {len(connections):>8} {build.elapsed * 1e3:>9.1f} "
+              f"{scan.elapsed / args.queries * 1e6:>9.1f} {indexed.elapsed / args.queries * 1e6:>9.1f} "
+              f"{scan.elapsed / indexed.elapsed:>7.0f}x {edits.elapsed / args.edits * 1e6:>8.2f} "
+              f"{rebuild.elapsed * 1e3:>11.1f}")
+        print(f"        fan-out: {index.fanout_stats()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Overview benchmark - minimap tile pyramid build, render and incremental updates
+
+Builds the block-area / congestion tiles of synthetic designs, renders
+every tile of every level, then moves random blocks one at a time and
+times re-rasterizing each and re-rendering only the tiles it touched,
+against rebuilding and re-rendering the whole pyramid. Nets join blocks
+a few grid steps apart, like a placed design's; --random connects random
+pairs instead, whose nets span the die and touch most tiles.
+"""
+
+import argparse
+
+import numpy as np
+
+from common import Timer, make_blocks, make_connections
+from floorplan_graph import NetIndex
+from floorplan_overview import LEVELS, DensityTiles
+from floorplan_store import NetStore
+
+
+def local_connections(blocks, nets_per_block, reach=3, seed=0):
+    """Connections from each grid block to random blocks at most reach rows and columns away"""
+    rng = np.random.default_rng(seed)
+    n = len(blocks)
+    columns = int(np.ceil(np.sqrt(n)))
+    src = np.repeat(np.arange(n), nets_per_block)
+    dst = src + rng.integers(-reach, reach + 1, len(src)) * columns + rng.integers(-reach, reach + 1, len(src))
+    keep = (dst >= 0) & (dst < n) & (dst != src)
+    src, dst = src[keep], dst[keep]
+    return NetStore(blocks.names, src, dst, rng.integers(1, 100, len(src)))
+
+
+def render_dirty(tiles):
+    """Render the invalidated tiles of every level; returns how many"""
+    count = 0
+    for level in range(LEVELS):
+        for row, col in tiles.take_dirty(level):
+            tiles.tile(level, row, col)
+            count += 1
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--nets-per-block', type=int, default=3)
+    parser.add_argument('--edits', type=int, default=200)
+    parser.add_argument('--random', action='store_true', help="nets between random pairs of blocks")
+    args = parser.parse_args()
+
+    total = sum(4 ** level for level in range(LEVELS))
+    print(f"{'blocks':>7} {'build ms':>9} {'render ms':>10} {'edit ms':>8} {'tiles/edit':>11} "
+          f"{'rebuild ms':>11}")
+    for n in args.sizes:
+        blocks = make_blocks(n)
+        if args.random:
+            connections = make_connections(blocks, args.nets_per_block)
+        else:
+            connections = local_connections(blocks, args.nets_per_block)
+        net_index = NetIndex(connections, n)
+        with Timer() as build:
+            tiles = DensityTiles(blocks, connections, net_index)
+        with Timer() as render:
+            render_dirty(tiles)
+
+        rng = np.random.default_rng(0)
+        step = 0.02 * tiles.side
+        rendered = 0
+        with Timer() as edits:
+            for block_id in rng.integers(0, n, args.edits).tolist():
+                blocks.x[block_id] += rng.uniform(-step, step)
+                blocks.y[block_id] += rng.uniform(-step, step)
+                tiles.update_block(block_id)
+                rendered += render_dirty(tiles)
+
+        with Timer() as rebuild:
+            tiles.rebuild()
+            render_dirty(tiles)
+
+        print(f"{n:>7} {build.elapsed * 1e3:>9.1f} {render.elapsed * 1e3:>10.1f} "
+              f"{edits.elapsed / args.edits * 1e3:>8.2f} {rendered / args.edits:>6.1f}/{total:<4} "
+              f"{rebuild.elapsed * 1e3:>11.1f}")
+
+
+if __name__ == '__main__':
+    main()
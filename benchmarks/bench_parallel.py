@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Parallel placement benchmark - speedup curve over worker counts
+
+Runs the same best-of-N placement with 1..32 workers and reports wall time,
+speedup over one worker and the winning cost (identical for every worker
+count, since runs are seeded).
+"""
+
+import argparse
+import os
+
+from common import make_blocks, make_connections
+from floorplan_parallel import parallel_place
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--blocks', type=int, default=1000)
+    parser.add_argument('--runs', type=int, default=32)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument('--method', default='both', choices=['force', 'anneal', 'both'])
+    args = parser.parse_args()
+
+    print(f"cpus: {os.cpu_count()}  blocks: {args.blocks}  runs: {args.runs}")
+    print(f"{'workers':>8} {'seconds':>9} {'speedup':>8} {'best cost':>12}")
+    baseline = None
+    for workers in args.workers:
+        blocks = make_blocks(args.blocks)
+        connections = make_connections(blocks, 3)
+        result = parallel_place(blocks, connections, runs=args.runs, workers=workers, method=args.method)
+        baseline = baseline or result['wall_seconds']
+        print(f"{workers:>8} {result['wall_seconds']:>9.2f} {baseline / result['wall_seconds']:>8.2f} "
+              f"{result['cost']:>12.5g}")
+
+
+if __name__ == '__main__':
+    main()
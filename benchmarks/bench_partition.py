@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Partitioning benchmark - clustering a large design down to a few hundred super-blocks
+
+Builds a synthetic netlist whose blocks form hidden groups (most nets stay
+inside a group), then times the cluster hierarchy down to --clusters
+super-blocks with each bisection method, collapsing it, and splitting one
+cluster on demand as a double-click would. Cut quality is the share of net
+weight between clusters, next to the hidden grouping and a random labelling
+with the same number of clusters.
+"""
+
+import argparse
+
+import numpy as np
+
+from common import Timer, make_blocks
+from floorplan_partition import ClusterTree, ClusterView, adjacency, cut_weight, spectral_clusters
+from floorplan_store import NetStore
+
+
+def grouped_connections(blocks, group=64, nets_per_block=4, inside=0.9, seed=0):
+    """Connections where a fraction inside of the nets stays within hidden groups of blocks
+
+    Returns the NetStore and each block's group.
+    """
+    n = len(blocks)
+    rng = np.random.default_rng(seed)
+    groups = rng.permutation(n) // group
+    members = np.argsort(groups, kind='stable')
+    src = rng.integers(0, n, n * nets_per_block)
+    local = rng.random(len(src)) < inside
+    g = groups[src]
+    mate = np.minimum(g * group + rng.integers(0, group, len(src)), n - 1)
+    dst = np.where(local, members[mate], rng.integers(0, n, len(src)))
+    keep = src != dst
+    weights = rng.integers(1, 100, keep.sum()).astype(np.float64)
+    return NetStore(blocks.names, src[keep], dst[keep], weights), groups
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--blocks', type=int, default=50000)
+    parser.add_argument('--clusters', type=int, default=300)
+    parser.add_argument('--group', type=int, default=64)
+    args = parser.parse_args()
+
+    blocks = make_blocks(args.blocks)
+    connections, groups = grouped_connections(blocks, args.group)
+    adj = adjacency(len(blocks), connections.src, connections.dst, connections.weights)
+    total = connections.weights.sum()
+    random = np.random.default_rng(1).integers(0, args.clusters, len(blocks))
+    print(f"{len(blocks)} blocks, {len(connections)} nets, hidden groups of {args.group}")
+    print(f"cut share: hidden groups {cut_weight(adj, groups) / total:.3f}, "
+          f"random {args.clusters}-way {cut_weight(adj, random) / total:.3f}")
+
+    print(f"{'method':>11} {'build s':>8} {'clusters':>9} {'cut share':>10} {'collapse ms':>12} {'split ms':>9}")
+    for method in ('multilevel', 'spectral'):
+        with Timer() as build:
+            tree = ClusterTree.build(len(blocks), connections.src, connections.dst, connections.weights,
+                                     blocks.area, max_clusters=args.clusters, method=method)
+        frontier = tree.frontier(args.clusters)
+        with Timer() as collapsing:
+            view = ClusterView(blocks, connections, tree, frontier)
+        assert np.isclose(view.blocks.area.sum(), blocks.area.sum())
+        cut = cut_weight(adj, view.labels) / total
+
+        # Double-click on the largest super-block: one bisection plus a new collapse
+        with Timer() as split:
+            view.expand(int(np.argmax(view.blocks.area)))
+        print(f"{method:>11} {build.elapsed:>8.2f} {len(frontier):>9} {cut:>10.3f} "
+              f"{collapsing.elapsed * 1e3:>12.1f} {split.elapsed * 1e3:>9.1f}")
+
+    with Timer() as flat:
+        labels = spectral_clusters(adj, args.clusters)
+    print(f"flat spectral k-means, {args.clusters} clusters: {flat.elapsed:.2f} s, "
+          f"cut share {cut_weight(adj, labels) / total:.3f}")
+
+
+if __name__ == '__main__':
+    main()
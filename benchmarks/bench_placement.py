@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Placement benchmark - runtime and cost of the automatic placer
+
+Reports wirelength and overlap for the default grid, force-directed
+placement and force-directed plus annealing refinement.
+"""
+
+import argparse
+
+from common import Timer, make_blocks, make_connections
+from floorplan_metrics import overlap_area
+from floorplan_placement import PlacementProblem, auto_place
+
+
+def score(blocks, connections):
+    """Weighted wirelength and overlap fraction of the current placement"""
+    problem = PlacementProblem.from_stores(blocks, connections)
+    cx, cy = blocks.centers()
+    return problem.wirelength(cx, cy), overlap_area(blocks.bounds()) / blocks.area.sum()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[500, 1000, 5000])
+    parser.add_argument('--nets-per-block', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'blocks':>7} {'method':>7} {'seconds':>8} {'wirelength':>12} {'overlap':>8}")
+    for n in args.sizes:
+        blocks = make_blocks(n)
+        connections = make_connections(blocks, args.nets_per_block)
+        wl, overlap = score(blocks, connections)
+        print(f"{n:>7} {'grid':>7} {0:>8.2f} {wl:>12.4g} {overlap:>8.3f}")
+        for method in ('force', 'both'):
+            with Timer() as timer:
+                auto_place(blocks, connections, method=method)
+            wl, overlap = score(blocks, connections)
+            print(f"{n:>7} {method:>7} {timer.elapsed:>8.2f} {wl:>12.4g} {overlap:>8.3f}")
+
+
+if __name__ == '__main__':
+    main()
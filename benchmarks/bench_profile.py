@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Profiling benchmark - cost of the timing spans, disabled and enabled
+
+Times an empty span and an instrumented call per iteration with profiling
+off and on, then a scripted drag (hit index, metrics, legality and blitted
+overlay per frame, as the app runs it) with profiling off, on, and on with
+cProfile. The per-stage breakdown and the Chrome trace of the recorded
+drag are printed and written.
+"""
+
+import argparse
+import json
+import os
+import tempfile
+
+from common import HANDLE_CONFIG, Timer, agg_axes, make_blocks, make_connections
+from floorplan_events import percentile
+from floorplan_legality import LegalityChecker
+from floorplan_metrics import MetricsEngine
+from floorplan_profile import PROFILER, span, timed
+from floorplan_render import FloorplanRenderer
+from floorplan_spatial import SpatialGrid
+
+
+@timed('noop')
+def noop():
+    pass
+
+
+def per_call_ns(body, iterations):
+    """Mean nanoseconds per call of body()"""
+    with Timer() as timer:
+        for _ in range(iterations):
+            body()
+    return timer.elapsed / iterations * 1e9
+
+
+def empty_span():
+    with span('empty'):
+        pass
+
+
+def drag(blocks, connections, frames):
+    """Per-frame seconds of a scripted drag of block 0"""
+    fig, ax, canvas = agg_axes()
+    renderer = FloorplanRenderer(ax, canvas, HANDLE_CONFIG)
+    index = SpatialGrid()
+    index.build(blocks)
+    metrics = MetricsEngine(blocks, connections)
+    legality = LegalityChecker(blocks)
+
+    @timed('frame', frame=True)
+    def frame(block):
+        with span('edit'):
+            block['x'] += 1.0
+            block['y'] += 1.0
+        index.update(block)
+        metrics.update_block(block['id'])
+        legality.update_block(block['id'])
+        renderer.drag_update(block)
+
+    block = blocks[0]
+    renderer.rebuild(blocks, connections, block)
+    renderer.set_selection(block)
+    renderer.begin_drag(block)
+    times = []
+    for _ in range(frames):
+        with Timer() as t:
+            frame(block)
+        times.append(t.elapsed)
+    renderer.end_drag()
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--blocks', type=int, default=10000)
+    parser.add_argument('--frames', type=int, default=500)
+    parser.add_argument('--iterations', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    baseline = per_call_ns(lambda: None, args.iterations)
+    off = (per_call_ns(empty_span, args.iterations), per_call_ns(noop, args.iterations))
+    PROFILER.enable()
+    on = (per_call_ns(empty_span, args.iterations), per_call_ns(noop, args.iterations))
+    PROFILER.disable()
+    PROFILER.reset()
+    print(f"empty call {baseline:.0f} ns; span / timed call: off {off[0]:.0f} / {off[1]:.0f} ns, "
+          f"on {on[0]:.0f} / {on[1]:.0f} ns")
+
+    blocks = make_blocks(args.blocks)
+    connections = make_connections(blocks, 0)
+    print(f"{args.blocks} blocks, {args.frames} drag frames")
+    print(f"{'profiling':>10} {'p50 ms':>8} {'p99 ms':>8}")
+    for mode in ('off', 'spans', 'cprofile'):
+        if mode != 'off':
+            PROFILER.reset()
+            PROFILER.enable(cprofile=mode == 'cprofile')
+        times = drag(blocks, connections, args.frames)
+        PROFILER.disable()
+        print(f"{mode:>10} {percentile(times, 50) * 1e3:>8.3f} {percentile(times, 99) * 1e3:>8.3f}")
+        if mode == 'spans':
+            stats = PROFILER.stats()
+            breakdown = PROFILER.last_breakdown
+            histogram = PROFILER.histogram()
+            trace = PROFILER.chrome_trace()
+
+    print("last frame:", ", ".join(f"{name} {seconds * 1e3:.3f} ms" for name, seconds in breakdown.items()))
+    print("frame histogram:", histogram)
+    for name, s in stats.items():
+        print(f"  {name:<16} n={s['count']:<5} p50 {s['p50_ms']:.3f} ms  p99 {s['p99_ms']:.3f} ms")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        trace_path = os.path.join(tmp, 'drag.json')
+        with open(trace_path, 'w') as f:
+            json.dump(trace, f)
+        profile_path = os.path.join(tmp, 'drag.prof')
+        PROFILER.dump_cprofile(profile_path)
+        print(f"chrome trace: {len(trace['traceEvents'])} events, {os.path.getsize(trace_path) / 1e3:.0f} kB; "
+              f"cProfile stats: {os.path.getsize(profile_path) / 1e3:.0f} kB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Project benchmark - save, memory-mapped open and incremental autosave
+
+Saves a large synthetic design, opens it (memory-mapped, then with every
+array read once), compares with loading the same arrays from an .npz, and
+times autosave after moving a few blocks against a full save.
+"""
+
+import argparse
+import os
+import tempfile
+
+import numpy as np
+
+from common import Timer, make_blocks, make_connections
+from floorplan_project import GEOMETRY_ARRAYS, autosave_project, load_project, save_project
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--blocks', type=int, default=100000)
+    parser.add_argument('--nets-per-block', type=int, default=4)
+    parser.add_argument('--moved', type=int, nargs='+', default=[1, 100, 10000])
+    args = parser.parse_args()
+
+    blocks = make_blocks(args.blocks)
+    connections = make_connections(blocks, args.nets_per_block)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'design.fplan')
+        with Timer() as save:
+            save_project(path, blocks, connections)
+        print(f"{args.blocks} blocks, {len(connections)} nets: "
+              f"{os.path.getsize(path) / 2**20:.1f} MiB, full save {save.elapsed * 1e3:.1f} ms")
+
+        with Timer() as opened:
+            loaded, nets = load_project(path)
+        with Timer() as touched:
+            checksum = sum(float(a.sum()) for a in (loaded.x, loaded.y, loaded.width, loaded.height,
+                                                    loaded.area, nets.weights))
+        last = args.blocks - 1
+        assert np.array_equal(loaded.x, blocks.x) and loaded.names[last] == blocks.names[last]
+        print(f"open (mmap): {opened.elapsed * 1e3:.2f} ms, first full read {touched.elapsed * 1e3:.1f} ms")
+
+        npz = os.path.join(tmp, 'design.npz')
+        np.savez(npz, x=blocks.x, y=blocks.y, width=blocks.width, height=blocks.height, area=blocks.area,
+                 shape_code=blocks.shape_code, src=connections.src, dst=connections.dst,
+                 weights=connections.weights, names=np.array(blocks.names.tolist()))
+        with Timer() as npz_load:
+            with np.load(npz) as data:
+                arrays = {key: data[key] for key in data.files}
+        print(f"open (.npz, copied): {npz_load.elapsed * 1e3:.1f} ms")
+        del arrays, checksum
+
+        rng = np.random.default_rng(0)
+        # Autosave dirties at most one page per changed row per geometry array
+        row_bytes = sum(getattr(loaded, key).itemsize for key in GEOMETRY_ARRAYS)
+        print(f"{'moved':>7} {'written':>8} {'KiB patched':>12} {'autosave ms':>12} {'full save ms':>13}")
+        for moved in args.moved:
+            ids = rng.choice(args.blocks, moved, replace=False)
+            loaded.x[ids] += 10.0
+            with Timer() as auto:
+                written = autosave_project(path, loaded, nets, ids)
+            with Timer() as full:
+                save_project(os.path.join(tmp, 'full.fplan'), loaded, nets)
+            print(f"{moved:>7} {written:>8} {written * row_bytes / 1024:>12.1f} {auto.elapsed * 1e3:>12.1f} "
+                  f"{full.elapsed * 1e3:>13.1f}")
+
+        reopened, _ = load_project(path)
+        assert np.array_equal(reopened.x, loaded.x)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Render benchmark - collection-based renderer against per-artist drawing
+
+The per-artist path is the old update_plot: one Rectangle and label per
+block, one ax.plot line and count box per net, six handle Rectangles, and
+a full rebuild on every selection change. Both paths draw the same scene,
+every block and net, first without any text and then with all labels;
+the last columns are the renderer with its default culling and level of
+detail.
+"""
+
+import argparse
+
+from common import HANDLE_CONFIG, Timer, agg_axes, make_blocks, make_connections
+from matplotlib.patches import Rectangle
+
+import floorplan_render
+from floorplan_render import FloorplanRenderer, block_center, block_label, handle_rects
+
+
+def draw_per_artist(ax, canvas, blocks, connections, selected, labels):
+    """One artist per block, net and handle, then a full draw"""
+    ax.clear()
+    for block in blocks:
+        chosen = block == selected
+        ax.add_patch(Rectangle((block['x'], block['y']), block['width'], block['height'],
+                               facecolor='lightcoral' if chosen else 'lightblue',
+                               edgecolor='red' if chosen else 'blue', linewidth=3 if chosen else 2, alpha=0.7))
+        if labels:
+            ax.text(*block_center(block), block_label(block), ha='center', va='center', fontsize=8, weight='bold')
+    for conn in connections:
+        x1, y1 = block_center(blocks[conn['from']])
+        x2, y2 = block_center(blocks[conn['to']])
+        ax.plot([x1, x2], [y1, y2], 'r--', linewidth=1, alpha=0.7)
+        if labels:
+            ax.text((x1 + x2) / 2, (y1 + y2) / 2, str(conn['connections']), ha='center', va='center', fontsize=8,
+                    bbox=dict(boxstyle="round,pad=0.3", facecolor="white", alpha=0.8))
+    colors = HANDLE_CONFIG['colors']
+    for handle_id, hx, hy, hw, hh in handle_rects(selected, HANDLE_CONFIG):
+        ax.add_patch(Rectangle((hx, hy), hw, hh, linewidth=2, edgecolor='black', alpha=0.9,
+                               facecolor=colors['edge' if handle_id.startswith('edge') else 'corner']))
+    ax.set_aspect('equal')
+    canvas.draw()
+
+
+# Level-of-detail settings that make the renderer draw the whole scene
+SCENES = {
+    'shapes': {'DETAIL_MAX_BLOCKS': 0, 'BUNDLE_MAX_PIXELS': 0, 'MAX_NET_LINES': float('inf')},
+    'labels': {'DETAIL_MAX_BLOCKS': float('inf'), 'DETAIL_MAX_NETS': float('inf'), 'LABEL_MIN_PIXELS': 0,
+               'BUNDLE_MAX_PIXELS': 0, 'MAX_NET_LINES': float('inf')},
+    'default': {},
+}
+DEFAULTS = {name: getattr(floorplan_render, name) for scene in SCENES.values() for name in scene}
+
+
+def configure(scene):
+    """Set the renderer's level-of-detail constants for a scene"""
+    for name, value in DEFAULTS.items():
+        setattr(floorplan_render, name, SCENES[scene].get(name, value))
+
+
+def time_renderer(blocks, connections, repeats):
+    """(rebuild ms, selection change ms) for the collection renderer"""
+    fig, ax, canvas = agg_axes()
+    renderer = FloorplanRenderer(ax, canvas, HANDLE_CONFIG)
+    with Timer() as build:
+        renderer.rebuild(blocks, connections, blocks[0])
+    with Timer() as select:
+        for k in range(repeats):
+            renderer.set_selection(blocks[(k + 1) % len(blocks)])  # draw_idle draws at once on Agg
+    return build.elapsed * 1e3, select.elapsed / repeats * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 500, 2000])
+    parser.add_argument('--repeats', type=int, default=5, help="selection changes timed per size")
+    args = parser.parse_args()
+
+    print("milliseconds per full draw and per selection change")
+    print(f"{'':>15} | {'shapes only':^39} | {'with labels':^39} | {'default LOD':^19}")
+    print(f"{'blocks':>7} {'nets':>7} | {'per-artist':>10} {'select':>8} {'collection':>10} {'select':>8} "
+          f"| {'per-artist':>10} {'select':>8} {'collection':>10} {'select':>8} | {'draw':>10} {'select':>8}")
+    for n in args.sizes:
+        blocks = make_blocks(n)
+        connections = make_connections(blocks)
+        row = []
+        for scene, labels in (('shapes', False), ('labels', True)):
+            fig, ax, canvas = agg_axes()
+            with Timer() as legacy:
+                draw_per_artist(ax, canvas, blocks, connections, blocks[0], labels)
+            with Timer() as legacy_select:
+                draw_per_artist(ax, canvas, blocks, connections, blocks[1], labels)
+            configure(scene)
+            row += [legacy.elapsed * 1e3, legacy_select.elapsed * 1e3, *time_renderer(blocks, connections, args.repeats)]
+        configure('default')
+        row += time_renderer(blocks, connections, args.repeats)
+        cells = [f"{draw:>10.0f} {select:>8.1f}" for draw, select in zip(row[::2], row[1::2])]
+        print(f"{n:>7} {len(connections):>7} | {cells[0]} {cells[1]} | {cells[2]} {cells[3]} | {cells[4]}")
+
+
+if __name__ == '__main__':
+    main()
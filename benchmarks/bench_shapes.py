@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Shape benchmark - vectorized geometry over a mix of block shapes
+
+Turns a share of the blocks into L, T and U shapes and free-form orthogonal
+polygons, then times the covering rectangles, area centroids, outlines,
+centroid wirelength, total overlap, point hit tests and area-preserving
+drags with the incremental overlap update, and checks that every drag kept
+the block areas.
+"""
+
+import argparse
+
+import numpy as np
+
+from common import Timer, make_blocks, make_connections
+from floorplan_metrics import MetricsEngine, overlap_area, wirelengths
+from floorplan_polygons import (SHAPE_TYPES, POLYGON, centers, contains, fill_fractions, move_notch, rectangles,
+                                set_polygon, set_shape, set_width, vertices)
+from floorplan_spatial import SpatialGrid
+
+# A staircase outline in absolute units (scaled into each block's box)
+STAIRS = ([0, 3, 3, 2, 2, 1, 1, 0], [0, 0, 3, 3, 2, 2, 1, 1])
+
+
+def shape_blocks(blocks, fraction, seed=0):
+    """Give a random share of the blocks L/T/U shapes or a polygon outline"""
+    rng = np.random.default_rng(seed)
+    ids = rng.choice(len(blocks), int(len(blocks) * fraction), replace=False)
+    for k, i in enumerate(ids.tolist()):
+        code = 1 + k % (len(SHAPE_TYPES) - 1)
+        if code == POLYGON:
+            side = np.sqrt(blocks.area[i]) / 3
+            set_polygon(blocks, i, blocks.x[i] + np.array(STAIRS[0]) * side,
+                        blocks.y[i] + np.array(STAIRS[1]) * side)
+        else:
+            set_shape(blocks, i, code)
+    return ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--blocks', type=int, default=10000)
+    parser.add_argument('--shaped', type=float, default=0.5)
+    parser.add_argument('--queries', type=int, default=100000)
+    parser.add_argument('--drags', type=int, default=2000)
+    args = parser.parse_args()
+
+    blocks = make_blocks(args.blocks)
+    connections = make_connections(blocks)
+    with Timer() as shaping:
+        shaped = shape_blocks(blocks, args.shaped)
+    area = blocks.area.copy()
+    counts = np.bincount(blocks.shape_code, minlength=len(SHAPE_TYPES))
+    print(f"{args.blocks} blocks, shaped in {shaping.elapsed * 1e3:.0f} ms: "
+          + ", ".join(f"{name} {count}" for name, count in zip(SHAPE_TYPES, counts)))
+
+    rows = []
+    with Timer() as t:
+        rects, owner = rectangles(blocks)
+    rows.append(("rectangles (cold)", t.elapsed, f"{len(rects)} rects, polygons decomposed"))
+    with Timer() as t:
+        rects, owner = rectangles(blocks)
+    rows.append(("rectangles", t.elapsed, ""))
+    with Timer() as t:
+        cx, cy = centers(blocks)
+    rows.append(("area centroids", t.elapsed, ""))
+    with Timer() as t:
+        wirelengths(cx, cy, connections.src, connections.dst)
+    rows.append(("centroid wirelength", t.elapsed, f"{len(connections)} nets"))
+    with Timer() as t:
+        outlines = vertices(blocks)
+    rows.append(("outlines", t.elapsed, f"{outlines.shape[1]} vertices max"))
+
+    # Jiggle the grid so neighbours overlap
+    blocks.x += np.random.default_rng(2).uniform(-60, 60, len(blocks))
+    with Timer() as t:
+        rects, owner = rectangles(blocks)
+        total = overlap_area(rects, owner)
+    rows.append(("total overlap", t.elapsed, f"{total:,.0f} μm²"))
+
+    # Point queries: grid candidates, then exact containment in one batch
+    index = SpatialGrid()
+    index.build(blocks)
+    rng = np.random.default_rng(1)
+    px = rng.uniform(0, (blocks.x + blocks.width).max(), args.queries)
+    py = rng.uniform(0, (blocks.y + blocks.height).max(), args.queries)
+    hits = 0
+    with Timer() as t:
+        for x, y in zip(px.tolist(), py.tolist()):
+            ids = index.query_rect(x, y, x, y)
+            if len(ids) > 1 or (len(ids) and blocks.shape_code[ids[0]]):
+                ids = ids[contains(blocks, ids, x, y)]
+            hits += len(ids) > 0
+    rows.append((f"{args.queries} hit tests", t.elapsed, f"{t.elapsed / args.queries * 1e6:.1f} µs each, "
+                                                      f"{hits} hits"))
+
+    # Edge and notch drags with the incremental overlap update after each
+    # (no nets, so crossings do not dominate the timing)
+    metrics = MetricsEngine(blocks, make_connections(blocks, 0))
+    notched = shaped[blocks.shape_code[shaped] < POLYGON]
+    with Timer() as t:
+        for k in range(args.drags):
+            i = int(notched[k % len(notched)])
+            if k % 2:
+                move_notch(blocks, i, 2.0, -1.0)
+            else:
+                set_width(blocks, i, blocks.width[i] * 1.01)
+            metrics.update_block(i)
+    rows.append((f"{args.drags} drag steps", t.elapsed, f"{t.elapsed / args.drags * 1e3:.2f} ms each"))
+
+    for name, seconds, note in rows:
+        print(f"{name:<22} {seconds * 1e3:9.2f} ms  {note}")
+    rebuilt = overlap_area(*rectangles(blocks))
+    kept = np.allclose(area, fill_fractions(blocks) * blocks.width * blocks.height)
+    print(f"areas preserved: {kept}  incremental overlap matches a rebuild: "
+          f"{np.isclose(metrics.overlap, rebuilt)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark - import cost of the desktop app against a time budget
+
+Runs `python -X importtime -c "import floorplan_desktop_v2"` in fresh
+interpreters, reports the slowest modules and fails when the median
+cumulative import time exceeds the budget or a deferred module (pandas,
+matplotlib) is loaded at startup.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULE = 'floorplan_desktop_v2'
+
+# Loaded on first use only; importing any of these at startup is a regression
+DEFERRED = ('pandas', 'matplotlib', 'matplotlib.pyplot', 'floorplan_render', 'floorplan_parallel')
+
+
+def import_times(module):
+    """Cumulative import time in microseconds per module reported by -X importtime"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=ROOT, check=True, capture_output=True, text=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5, help="fresh interpreters to time")
+    parser.add_argument('--budget-ms', type=float, default=400.0,
+                        help="fail when the median import time exceeds this")
+    parser.add_argument('--top', type=int, default=10, help="slowest modules to list")
+    args = parser.parse_args()
+
+    runs = [import_times(MODULE) for _ in range(args.runs)]
+    totals = [times[MODULE] / 1e3 for times in runs]
+    median = statistics.median(totals)
+    print(f"import {MODULE}: median {median:.0f} ms, min {min(totals):.0f} ms over {args.runs} runs")
+
+    # Slowest top-level dependencies of the last run
+    last = runs[-1]
+    print("slowest modules (cumulative):")
+    for name, us in sorted(last.items(), key=lambda item: -item[1])[1:args.top + 1]:
+        print(f"  {us / 1e3:8.1f} ms  {name}")
+
+    failures = []
+    loaded = [name for name in DEFERRED if name in last]
+    if loaded:
+        failures.append(f"deferred modules imported at startup: {', '.join(loaded)}")
+    if median > args.budget_ms:
+        failures.append(f"median import time {median:.0f} ms exceeds the {args.budget_ms:.0f} ms budget")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if not failures:
+        print(f"OK: within the {args.budget_ms:.0f} ms budget")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Store benchmark - memory of list-of-dicts versus BlockStore/NetStore
+
+Builds the same netlist both ways and measures the allocated bytes with
+tracemalloc, plus the cost of computing every block center.
+"""
+
+import argparse
+import tracemalloc
+
+from common import Timer, make_netlist
+from floorplan_store import BlockStore, NetStore
+
+
+def dict_layout(netlist):
+    """Blocks and connections as the old per-item dicts"""
+    names = list(netlist.names)
+    blocks = []
+    for i, name in enumerate(names):
+        side = float(netlist.areas[i]) ** 0.5
+        blocks.append({'id': i, 'name': name, 'area': float(netlist.areas[i]),
+                       'width': side, 'height': side,
+                       'x': 100 + (i % 3) * 200, 'y': 100 + (i // 3) * 200,
+                       'shape_type': 'rectangle'})
+    connections = []
+    for i, j, w in zip(netlist.src.tolist(), netlist.dst.tolist(), netlist.weights.tolist()):
+        connections.append({'from': i, 'to': j, 'from_name': names[i],
+                            'to_name': names[j], 'connections': w})
+    return blocks, connections
+
+
+def store_layout(netlist):
+    """Blocks and connections in the array-backed stores"""
+    blocks = BlockStore.from_netlist(netlist)
+    return blocks, NetStore.from_netlist(netlist, blocks)
+
+
+def measure(build, netlist):
+    """Bytes allocated by a layout builder (kept alive while measuring)"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build(netlist)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, after - before
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--blocks', type=int, default=50000)
+    parser.add_argument('--nets-per-block', type=int, default=2)
+    args = parser.parse_args()
+
+    netlist = make_netlist(args.blocks, args.nets_per_block)
+    (dict_blocks, dict_nets), dict_bytes = measure(dict_layout, netlist)
+    (blocks, nets), store_bytes = measure(store_layout, netlist)
+
+    with Timer() as dict_centers:
+        [(b['x'] + b['width'] / 2, b['y'] + b['height'] / 2) for b in dict_blocks]
+    with Timer() as store_centers:
+        blocks.centers()
+
+    print(f"blocks: {len(blocks)}  nets: {len(nets)}")
+    print(f"dicts:  {dict_bytes / 2**20:8.1f} MB  centers {dict_centers.elapsed * 1e3:7.2f} ms")
+    print(f"stores: {store_bytes / 2**20:8.1f} MB  centers {store_centers.elapsed * 1e3:7.2f} ms")
+    print(f"memory reduction: {dict_bytes / store_bytes:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
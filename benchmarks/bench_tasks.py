@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Background task benchmark - main-loop stalls while loading a design
+
+Loads an adjacency CSV (parse, stores, spatial index, metrics) once inside
+a main-loop callback, as upload_csv used to, and once through
+BackgroundTask. A 10 ms heartbeat on the after()-style loop measures how
+long the main loop goes without running a callback.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from common import Timer
+from bench_events import EventLoop
+from generate import write_matrix_csv
+from floorplan_events import percentile
+from floorplan_io import read_netlist
+from floorplan_metrics import MetricsEngine
+from floorplan_spatial import SpatialGrid
+from floorplan_store import BlockStore, NetStore
+from floorplan_tasks import BackgroundTask
+
+HEARTBEAT_MS = 10
+
+
+def load(path, progress=lambda fraction, message="": None):
+    """Everything upload_csv does before touching widgets"""
+    netlist = read_netlist(path, progress=lambda fraction: progress(fraction * 0.8, "Reading"))
+    progress(0.8, "Building blocks")
+    blocks = BlockStore.from_netlist(netlist)
+    connections = NetStore.from_netlist(netlist, blocks)
+    spatial_index = SpatialGrid()
+    spatial_index.build(blocks)
+    progress(0.9, "Scoring")
+    return blocks, connections, spatial_index, MetricsEngine(blocks, connections)
+
+
+def measure(path, background):
+    """Heartbeat gaps (seconds) and wall time of one load"""
+    loop = EventLoop()
+    beats = []
+    state = {'done': False, 'progress': 0}
+
+    def heartbeat():
+        beats.append(time.perf_counter())
+        if not state['done']:
+            loop.after(HEARTBEAT_MS, heartbeat)
+
+    def finish(result):
+        state['done'] = True
+
+    def start():
+        if background:
+            BackgroundTask(loop, lambda progress: load(path, progress), finish, on_error=finish,
+                           on_progress=lambda f, m: state.update(progress=state['progress'] + 1)).start()
+        else:
+            finish(load(path))
+
+    with Timer() as wall:
+        heartbeat()
+        loop.after(0, start)
+        while not state['done']:
+            loop.run_due()
+            time.sleep(0.001)
+    gaps = [b - a for a, b in zip(beats, beats[1:])]
+    return gaps, wall.elapsed, state['progress']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[2000, 5000])
+    parser.add_argument('--density', type=float, default=0.002)
+    args = parser.parse_args()
+
+    print(f"heartbeat every {HEARTBEAT_MS} ms")
+    print(f"{'n':>6} {'mode':>11} {'wall s':>7} {'max stall ms':>13} {'p99 stall ms':>13} {'progress':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.sizes:
+            path = os.path.join(tmp, f'matrix_{n}.csv')
+            write_matrix_csv(path, n, args.density)
+            for mode, background in (('sync', False), ('background', True)):
+                gaps, wall, updates = measure(path, background)
+                print(f"{n:>6} {mode:>11} {wall:>7.2f} {max(gaps, default=0) * 1e3:>13.1f} "
+                      f"{percentile(gaps, 99) * 1e3:>13.1f} {updates:>9}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+View benchmark - zoom and pan frame times with culling and level of detail
+
+Zooms a large synthetic design from the full extent down to a handful of
+blocks, then pans at each zoom, timing set_view plus a full canvas draw.
+"""
+
+import argparse
+
+from common import HANDLE_CONFIG, Timer, agg_axes, make_blocks, make_connections
+from floorplan_render import FloorplanRenderer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--blocks', type=int, default=50000)
+    parser.add_argument('--nets-per-block', type=int, default=2)
+    parser.add_argument('--frames', type=int, default=10, help="pan frames per zoom level")
+    args = parser.parse_args()
+
+    blocks = make_blocks(args.blocks)
+    connections = make_connections(blocks, args.nets_per_block)
+    fig, ax, canvas = agg_axes()
+    renderer = FloorplanRenderer(ax, canvas, HANDLE_CONFIG)
+
+    with Timer() as load:
+        renderer.rebuild(blocks, connections)
+    print(f"{args.blocks} blocks, {len(connections)} nets: initial draw {load.elapsed * 1e3:.0f} ms")
+
+    (x0, x1), (y0, y1) = renderer.data_limits()
+    cx, cy = (x0 + x1) / 2, (y0 + y1) / 2
+    print(f"{'zoom':>6} {'level':>8} {'nets':>8} {'blocks':>8} {'ms/frame':>9} {'fps':>7}")
+    zoom = 1
+    while True:
+        half_w, half_h = (x1 - x0) / 2 / zoom, (y1 - y0) / 2 / zoom
+        step = half_w / 20
+        with Timer() as timer:
+            for k in range(args.frames):
+                shift = (k - args.frames / 2) * step
+                # draw_idle draws immediately on Agg, so this includes the render
+                renderer.set_view((cx - half_w + shift, cx + half_w + shift), (cy - half_h, cy + half_h))
+        per_frame = timer.elapsed / args.frames
+        print(f"{zoom:>5}x {renderer.level:>8} {renderer.net_level:>8} {len(renderer.visible):>8} "
+              f"{per_frame * 1e3:>9.1f} {1 / per_frame:>7.1f}")
+        if len(renderer.visible) <= 4:
+            break
+        zoom *= 2
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Shared helpers for the floorplan benchmarks
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+# Make the application modules importable when run from benchmarks/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def make_netlist(n, nets_per_block=2, seed=0):
+    """Synthetic netlist: random areas and connections between random pairs"""
+    from floorplan_io import Netlist
+
+    rng = np.random.default_rng(seed)
+    areas = rng.uniform(2000, 20000, n)
+    pairs = np.sort(rng.integers(0, n, (n * nets_per_block, 2)), axis=1)
+    pairs = np.unique(pairs[pairs[:, 0] != pairs[:, 1]], axis=0)
+    weights = rng.integers(1, 100, len(pairs))
+    return Netlist([f'M{i}' for i in range(n)], areas, pairs[:, 0], pairs[:, 1], weights)
+
+
+def make_blocks(n, seed=0):
+    """Synthetic blocks laid out on a square grid"""
+    from floorplan_store import BlockStore
+
+    blocks = BlockStore.from_netlist(make_netlist(n, 0, seed))
+    columns = int(np.ceil(np.sqrt(n)))
+    ids = np.arange(n)
+    blocks.x[:] = 100 + (ids % columns) * 200
+    blocks.y[:] = 100 + (ids // columns) * 200
+    return blocks
+
+
+def make_connections(blocks, nets_per_block=2, seed=0):
+    """Synthetic connections between random block pairs"""
+    from floorplan_store import NetStore
+
+    netlist = make_netlist(len(blocks), nets_per_block, seed)
+    return NetStore(blocks.names, netlist.src, netlist.dst, netlist.weights)
+
+
+def agg_axes(figsize=(12, 8)):
+    """Figure, axes and canvas on the headless Agg backend"""
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    fig = Figure(figsize=figsize)
+    canvas = FigureCanvasAgg(fig)
+    ax = fig.add_subplot(111)
+    return fig, ax, canvas
+
+
+HANDLE_CONFIG = {
+    'corner_size': 25,
+    'edge_width': 15,
+    'edge_height': 25,
+    'colors': {
+        'corner': '#FF6B6B',
+        'edge': '#4ECDC4',
+        'hover': '#FFE66D',
+        'selected': '#FF8E8E'
+    }
+}
+
+
+class Timer:
+    """Context manager measuring wall time in seconds"""
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Synthetic netlist generator - adjacency-matrix CSVs and edge lists at any scale
+
+Connections are sampled uniformly among block pairs with the given density.
+Weights follow a uniform, lognormal (heavy-tailed) or power-law
+distribution, and areas are log-uniform over the given spread (largest /
+smallest). The same seed gives the same netlist in either format.
+"""
+
+import argparse
+
+import numpy as np
+
+import common  # noqa: F401 (puts the application modules on the path)
+from floorplan_io import Netlist
+
+# Weight distributions (all integer weights >= 1)
+WEIGHTS = ('uniform', 'lognormal', 'powerlaw')
+
+# Smallest block area (μm²); the largest is this times the area spread
+MIN_AREA = 2000
+
+
+def synthetic_netlist(n, density=0.001, weights='uniform', area_spread=10.0, seed=0):
+    """Netlist of n blocks where each pair is connected with probability density"""
+    if weights not in WEIGHTS:
+        raise ValueError(f"Unknown weight distribution: {weights}")
+    rng = np.random.default_rng(seed)
+    areas = np.round(MIN_AREA * np.exp(rng.uniform(0, np.log(max(area_spread, 1.0)), n))).astype(np.int64)
+
+    # Sample pair indices in the upper triangle, dropping repeats
+    pairs = n * (n - 1) // 2
+    m = rng.binomial(pairs, density) if pairs else 0
+    keys = np.unique(rng.integers(0, pairs, m)) if m else np.zeros(0, np.int64)
+    # Pair index k -> (i, j), i < j, rows of the upper triangle laid end to end
+    i = (n - 2 - np.floor(np.sqrt(-8 * keys + 4 * n * (n - 1) - 7) / 2 - 0.5)).astype(np.int64)
+    j = keys + i + 1 - n * (n - 1) // 2 + (n - i) * (n - i - 1) // 2
+
+    if weights == 'uniform':
+        w = rng.integers(1, 100, len(keys))
+    elif weights == 'lognormal':
+        w = np.ceil(rng.lognormal(1.5, 1.2, len(keys)))
+    else:
+        w = np.ceil(rng.pareto(1.5, len(keys)) + 1)
+    return Netlist([f'M{k}' for k in range(n)], areas, i.astype(np.int32), j.astype(np.int32),
+                   w.astype(np.int64))
+
+
+def write_matrix(path, netlist):
+    """Write a netlist as a symmetric adjacency-matrix CSV, one row at a time"""
+    n = len(netlist.names)
+    src = np.concatenate([netlist.src, netlist.dst])
+    dst = np.concatenate([netlist.dst, netlist.src])
+    weights = np.concatenate([netlist.weights, netlist.weights])
+    order = np.argsort(src, kind='stable')
+    src, dst, weights = src[order], dst[order], weights[order]
+    offsets = np.searchsorted(src, np.arange(n + 1))
+    row = np.zeros(n, dtype=np.int64)
+    with open(path, 'w') as f:
+        f.write(',' + ','.join(netlist.names) + '\n')
+        for i in range(n):
+            cols = dst[offsets[i]:offsets[i + 1]]
+            row[cols] = weights[offsets[i]:offsets[i + 1]]
+            row[i] = netlist.areas[i]
+            f.write(netlist.names[i] + ',' + ','.join(map(str, row.tolist())) + '\n')
+            row[cols] = 0
+            row[i] = 0
+
+
+def write_edge_list(path, netlist):
+    """Write a netlist as a 'from,to,weight' edge list (self-loops carry the areas)"""
+    names = netlist.names
+    with open(path, 'w') as f:
+        f.write('from,to,weight\n')
+        for name, area in zip(names, np.asarray(netlist.areas).tolist()):
+            f.write(f"{name},{name},{area}\n")
+        for a, b, w in zip(netlist.src.tolist(), netlist.dst.tolist(), np.asarray(netlist.weights).tolist()):
+            f.write(f"{names[a]},{names[b]},{w}\n")
+
+
+def write_matrix_csv(path, n, density=0.001, seed=0, weights='uniform', area_spread=10.0):
+    """Generate and write an n×n adjacency CSV"""
+    write_matrix(path, synthetic_netlist(n, density, weights, area_spread, seed))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('output', help="file to write")
+    parser.add_argument('--blocks', type=int, default=1000)
+    parser.add_argument('--density', type=float, default=0.002, help="probability that a pair is connected")
+    parser.add_argument('--weights', default='uniform', choices=WEIGHTS)
+    parser.add_argument('--area-spread', type=float, default=10.0, help="largest / smallest block area")
+    parser.add_argument('--format', default='matrix', choices=['matrix', 'edges'])
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    netlist = synthetic_netlist(args.blocks, args.density, args.weights, args.area_spread, args.seed)
+    (write_matrix if args.format == 'matrix' else write_edge_list)(args.output, netlist)
+    print(f"{args.output}: {args.blocks} blocks, {len(netlist.src)} connections")
+
+
+if __name__ == '__main__':
+    main()
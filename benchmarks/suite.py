@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite - end-to-end timings gated against a stored baseline
+
+Generates synthetic designs, then times CSV and edge-list loading, dense
+matrix processing, hit testing, a headless update_plot under Agg and a
+scripted drag through the app's own on_mouse_press / on_mouse_move /
+on_mouse_release. Timed cases report the fastest of --repeats runs, the
+drag its frame percentiles over all of them. Results are written as JSON
+and compared with this machine's entry in --baseline (keyed by system,
+architecture and CPU count): any metric slower than it by more than
+--threshold fails the run (exit status 1).
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+from types import SimpleNamespace
+
+import numpy as np
+
+from common import HANDLE_CONFIG, Timer, agg_axes
+from bench_events import EventLoop
+from generate import synthetic_netlist, write_edge_list, write_matrix
+from floorplan_events import MotionCoalescer, percentile
+from floorplan_io import netlist_from_matrix, read_adjacency_csv, read_edge_list
+from floorplan_render import FloorplanRenderer
+from floorplan_store import BlockStore, NetStore
+from floorplan_desktop_v2 import FloorplanToolV2
+
+# Per-machine baselines the suite is gated against
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+# Default allowed slowdown per metric before the run fails (0.5 = 50 %); reruns
+# on a 1-CPU machine already drift by 30 % with no code change
+THRESHOLD = 0.5
+
+
+class _Widget:
+    """Stand-in for a Tk widget the app configures but the suite never shows"""
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+class _Var:
+    """Stand-in for a Tk variable"""
+
+    def __init__(self, value):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.value = value
+
+
+class HeadlessApp(FloorplanToolV2):
+    """The desktop app without Tk: Agg canvas, after()-style loop, inert widgets"""
+
+    def __init__(self, blocks, connections):
+        self.root = EventLoop()
+        self.handle_config = HANDLE_CONFIG
+        self.interactive_var = _Var(True)
+        self.shape_mode_var = _Var('rectangle')
+        for name in ('info_label', 'undo_btn', 'redo_btn', 'cluster_btn', 'properties_table',
+                     'connections_table', 'overview'):
+            setattr(self, name, _Widget())
+        self.task = None
+        self.pan_start = None
+        self.hover_handle = None
+        self.dragging = False
+        self.resize_mode = None
+        self.last_mouse_pos = None
+        self.selected_block = None
+        self.fig, self.ax, self.canvas = agg_axes()
+        self.renderer = FloorplanRenderer(self.ax, self.canvas, self.handle_config)
+        self.motion = MotionCoalescer(self.root, self.process_motion)
+        self.set_design(blocks, connections)
+
+    def event(self, x, y, **fields):
+        """A matplotlib-like mouse event at data coordinates x, y"""
+        px, py = self.ax.transData.transform((x, y))
+        return SimpleNamespace(inaxes=self.ax, xdata=x, ydata=y, x=px, y=py, button=1, dblclick=False,
+                               key=None, **fields)
+
+
+def design(n, density, seed=0):
+    """Block and net stores of a synthetic netlist on the default grid"""
+    netlist = synthetic_netlist(n, density, seed=seed)
+    blocks = BlockStore.from_netlist(netlist)
+    return blocks, NetStore.from_netlist(netlist, blocks)
+
+
+def best_seconds(body, repeats):
+    """Fastest wall time of body() over repeats runs (the least noisy estimate)"""
+    times = []
+    for _ in range(repeats):
+        with Timer() as timer:
+            body()
+        times.append(timer.elapsed)
+    return min(times)
+
+
+def bench_load(args, tmp):
+    """Adjacency-matrix CSV and edge-list loading of the same netlist"""
+    netlist = synthetic_netlist(args.load_blocks, args.density, 'lognormal', seed=1)
+    matrix_path = os.path.join(tmp, 'matrix.csv')
+    edges_path = os.path.join(tmp, 'edges.csv')
+    write_matrix(matrix_path, netlist)
+    write_edge_list(edges_path, netlist)
+    return {'csv_load_s': best_seconds(lambda: read_adjacency_csv(matrix_path), args.repeats),
+            'edge_list_load_s': best_seconds(lambda: read_edge_list(edges_path), args.repeats)}
+
+
+def bench_matrix(args, tmp):
+    """Dense in-memory matrix to block and net stores (process_adjacency_matrix)"""
+    netlist = synthetic_netlist(args.matrix_blocks, args.density, seed=2)
+    n = len(netlist.names)
+    matrix = np.zeros((n, n), dtype=np.int64)
+    matrix[netlist.src, netlist.dst] = netlist.weights
+    matrix[netlist.dst, netlist.src] = netlist.weights
+    matrix[np.arange(n), np.arange(n)] = netlist.areas
+
+    def process():
+        result = netlist_from_matrix(netlist.names, matrix)
+        blocks = BlockStore.from_netlist(result)
+        NetStore.from_netlist(result, blocks)
+
+    return {'matrix_processing_s': best_seconds(process, args.repeats)}
+
+
+def bench_hit_test(args, tmp):
+    """get_block_at_position over random points of the layout"""
+    app = HeadlessApp(*design(args.blocks, args.net_density))
+    rng = np.random.default_rng(3)
+    right, top = (app.blocks.x + app.blocks.width).max(), (app.blocks.y + app.blocks.height).max()
+    points = np.column_stack([rng.uniform(0, right, args.queries), rng.uniform(0, top, args.queries)]).tolist()
+
+    def query():
+        for x, y in points:
+            app.get_block_at_position(x, y)
+
+    return {'hit_test_us': best_seconds(query, args.repeats) / args.queries * 1e6}
+
+
+def bench_update_plot(args, tmp):
+    """A full headless rebuild and draw of the floorplan"""
+    app = HeadlessApp(*design(args.blocks, args.net_density))
+
+    def update():
+        app.update_plot()
+        app.canvas.draw()
+
+    update()
+    return {'update_plot_s': best_seconds(update, args.repeats)}
+
+
+def move_point(app, block):
+    """A point of block that presses into a move rather than a resize, or None
+
+    Handles have a fixed size in data units, so small blocks are all handle.
+    """
+    corner = app.handle_config['corner_size']
+    left, bottom = block['x'] + corner, block['y'] + corner
+    right = block['x'] + block['width'] - max(corner, app.handle_config['edge_width'])
+    top = block['y'] + block['height'] - max(corner, app.handle_config['edge_height'])
+    if left >= right or bottom >= top:
+        return None
+    x, y = (left + right) / 2, (bottom + top) / 2
+    hit = app.get_block_at_position(x, y)
+    if hit is None or hit['id'] != block['id'] or app.get_handle_at_position(x, y, block) is not None:
+        return None
+    return x, y
+
+
+def bench_drag(args, tmp):
+    """A scripted drag of one block through the mouse handlers, per frame"""
+    app = HeadlessApp(*design(args.blocks, args.net_density))
+    app.update_plot()
+    app.canvas.draw()
+    # The largest block whose interior is clear of handles and neighbours
+    for i in np.argsort(-np.minimum(app.blocks.width, app.blocks.height), kind='stable').tolist():
+        point = move_point(app, app.blocks[i])
+        if point is not None:
+            break
+    else:
+        raise SystemExit("drag: no block is large enough to press inside its move region")
+    x, y = point
+    frames = []
+    for _ in range(args.repeats):
+        app.on_mouse_press(app.event(x, y))
+        for step in range(args.frames):
+            # Out and back so the block ends where it started
+            x += 2.0 if step < args.frames // 2 else -2.0
+            with Timer() as timer:
+                app.on_mouse_move(app.event(x, y))
+                app.motion.flush()
+            frames.append(timer.elapsed)
+        app.on_mouse_release(app.event(x, y))
+    return {'drag_frame_p50_ms': percentile(frames, 50) * 1e3,
+            'drag_frame_p99_ms': percentile(frames, 99) * 1e3}
+
+
+CASES = {
+    'load': bench_load,
+    'matrix': bench_matrix,
+    'hit_test': bench_hit_test,
+    'update_plot': bench_update_plot,
+    'drag': bench_drag,
+}
+
+
+def environment():
+    """Where the numbers were measured (a baseline only means something on the same machine)"""
+    import matplotlib
+
+    return {'python': platform.python_version(), 'numpy': np.__version__,
+            'matplotlib': matplotlib.__version__, 'machine': platform.machine(),
+            'system': platform.system(), 'cpus': os.cpu_count()}
+
+
+def machine_key(environment):
+    """Baseline key of a machine; library versions only warn, they do not select"""
+    return f"{environment['system']}-{environment['machine']}-{environment['cpus']}cpu"
+
+
+def compare(results, baseline, threshold):
+    """Metrics slower than the baseline by more than threshold, as (name, now, before, ratio)"""
+    regressions = []
+    for name, value in results.items():
+        before = baseline.get(name)
+        if before:
+            ratio = value / before
+            print(f"  {name:<22} {value:>10.4f} {before:>10.4f} {ratio:>7.2f}x"
+                  f"{'  REGRESSION' if ratio > 1 + threshold else ''}")
+            if ratio > 1 + threshold:
+                regressions.append((name, value, before, ratio))
+        else:
+            print(f"  {name:<22} {value:>10.4f} {'-':>10} {'new':>8}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--cases', nargs='+', choices=list(CASES), default=list(CASES))
+    parser.add_argument('--blocks', type=int, default=10000, help="blocks for hit test, update_plot and drag")
+    parser.add_argument('--net-density', type=float, default=0.0002)
+    parser.add_argument('--load-blocks', type=int, default=3000)
+    parser.add_argument('--matrix-blocks', type=int, default=2000)
+    parser.add_argument('--density', type=float, default=0.001, help="pair density of the loaded netlists")
+    parser.add_argument('--queries', type=int, default=20000)
+    parser.add_argument('--frames', type=int, default=200)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--output', help="write the results JSON here")
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--threshold', type=float, default=THRESHOLD,
+                        help="allowed slowdown per metric (0.25 = 25 %%)")
+    parser.add_argument('--update-baseline', action='store_true', help="store these results as the baseline")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for case in args.cases:
+            with Timer() as timer:
+                results.update(CASES[case](args, tmp))
+            print(f"{case}: {timer.elapsed:.1f} s", file=sys.stderr)
+    config = {name: value for name, value in vars(args).items()
+              if name not in ('cases', 'output', 'baseline', 'threshold', 'update_baseline')}
+    report = {'config': config, 'environment': environment(), 'results': results}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    key = machine_key(report['environment'])
+    baselines = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baselines = json.load(f)
+    if args.update_baseline:
+        baselines[key] = report
+        with open(args.baseline, 'w') as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"baseline for {key} written to {args.baseline}")
+        return
+    if key not in baselines:
+        print(f"no baseline for {key} in {args.baseline}; run with --update-baseline to create one")
+        return
+
+    baseline = baselines[key]
+    if baseline.get('config') != config:
+        print("warning: the baseline was measured with different settings")
+    if baseline.get('environment') != report['environment']:
+        print("warning: the baseline was measured in a different environment")
+    print(f"  {'metric':<22} {'now':>10} {'baseline':>10} {'ratio':>8}")
+    regressions = compare(results, baseline['results'], args.threshold)
+    if regressions:
+        print(f"{len(regressions)} metric(s) regressed by more than {args.threshold:.0%}")
+        sys.exit(1)
+    print(f"no regression beyond {args.threshold:.0%}")
+
+
+if __name__ == '__main__':
+    main()
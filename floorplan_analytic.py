@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Floorplanning Tool - Analytic placement
+Quadratic wirelength minimisation on the sparse graph Laplacian with density spreading
+"""
+
+import math
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse import csgraph
+
+from floorplan_partition import adjacency
+from floorplan_placement import TARGET_UTILIZATION, PlacementProblem, box_centers, write_positions
+
+# Relative residual at which conjugate gradient stops
+CG_TOLERANCE = 1e-5
+
+# Conjugate-gradient iterations per solve at most
+CG_ITERATIONS = 500
+
+# Pull of every free block toward the placement center, relative to the mean
+# weighted degree (keeps the system definite and parks unconnected blocks)
+CENTER_PULL = 1e-3
+
+# Weight of the pseudo-nets to the spread positions, per iteration and
+# relative to the mean weighted degree
+ANCHOR_STEP = 0.3
+
+# Without fixed blocks, this many graph-distant blocks are pinned around the
+# region for the first solve, so it does not collapse to a point
+ANCHORS = 8
+
+# Weight of the pseudo-nets pinning those blocks, relative to the mean weighted degree
+PIN_WEIGHT = 1e3
+
+# Spreading / solving rounds at most...
+ITERATIONS = 12
+
+# ...stopping early once the spread wirelength is within this fraction of
+# the solved (lower-bound) wirelength
+CONVERGED_GAP = 0.1
+
+# Spreading stops bisecting a region at this many blocks (1: a cell per block)
+SPREAD_LEAF = 1
+
+# Blocks within this many nets of a dragged block are re-solved by a warm start
+WARM_HOPS = 2
+
+# Pull of a warm-started block toward its current center, relative to the
+# mean weighted degree of the re-solved blocks
+WARM_ANCHOR = 1.0
+
+
+def laplacian(n, src, dst, weights):
+    """Weighted graph Laplacian (degree minus adjacency) as CSR"""
+    adj = adjacency(n, src, dst, weights)
+    return (sparse.diags(np.asarray(adj.sum(axis=1)).ravel()) - adj).tocsr()
+
+
+def conjugate_gradient(matrix, rhs, x0, tolerance=CG_TOLERANCE, max_iterations=CG_ITERATIONS):
+    """Jacobi-preconditioned CG on a symmetric positive definite matrix
+
+    rhs and x0 are (n, k): the k systems (x and y) share every sparse
+    product. Returns the solution and the iterations used.
+    """
+    inverse = 1.0 / matrix.diagonal()[:, None]
+    x = np.array(x0, dtype=np.float64)
+    r = rhs - matrix @ x
+    z = r * inverse
+    p = z.copy()
+    rz = np.sum(r * z, axis=0)
+    limit = tolerance * np.maximum(np.linalg.norm(rhs, axis=0), 1e-12)
+    for iteration in range(max_iterations):
+        if np.all(np.linalg.norm(r, axis=0) <= limit):
+            return x, iteration
+        ap = matrix @ p
+        with np.errstate(divide='ignore', invalid='ignore'):
+            alpha = np.nan_to_num(rz / np.sum(p * ap, axis=0))
+        x += alpha * p
+        r -= alpha * ap
+        z = r * inverse
+        rz_next = np.sum(r * z, axis=0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            beta = np.nan_to_num(rz_next / rz)
+        p = z + beta * p
+        rz = rz_next
+    return x, max_iterations
+
+
+def spread(cx, cy, area, region, leaf=SPREAD_LEAF):
+    """Look-ahead legalization: map blocks onto a region with even area density
+
+    The region (x0, y0, x1, y1) is bisected recursively across its longer
+    side. Each cut splits the blocks in their solved order so both halves
+    hold half of the area, and sits where the halves' capacities match their
+    area. Blocks of a final region keep their relative positions, stretched
+    over it. Every level sorts all groups at once, with one float key.
+    """
+    n = len(cx)
+    if n == 0:
+        return cx.copy(), cy.copy()
+    order = np.arange(n)
+    starts = np.array([0])
+    regions = np.array([region], dtype=np.float64)
+    while True:
+        sizes = np.diff(np.append(starts, n))
+        split = sizes > leaf
+        if not split.any():
+            break
+        group = np.repeat(np.arange(len(starts)), sizes)
+        along_x = (regions[:, 2] - regions[:, 0]) >= (regions[:, 3] - regions[:, 1])
+        coord = np.where(along_x[group], cx[order], cy[order])
+        # One float sort key: the group plus the coordinate scaled into [0, 1)
+        low = np.minimum.reduceat(coord, starts)[group]
+        high = np.maximum.reduceat(coord, starts)[group]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            key = group + np.where(high > low, 0.999 * (coord - low) / (high - low), 0.0)
+        order = order[np.argsort(key)]
+
+        # Area-median cut of every group that is still too large
+        cumulative = np.concatenate([[0.0], np.cumsum(area[order])])
+        ends = np.append(starts[1:], n)
+        total = cumulative[ends] - cumulative[starts]
+        cut = np.searchsorted(cumulative, cumulative[starts] + total / 2)
+        cut = np.clip(cut, starts + 1, ends - 1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            share = np.where(total > 0, (cumulative[cut] - cumulative[starts]) / total, 0.5)
+
+        # Split the region in proportion to the area on each side
+        lo = np.where(along_x, regions[:, 0], regions[:, 1])
+        hi = np.where(along_x, regions[:, 2], regions[:, 3])
+        middle = lo + (hi - lo) * share
+        left, right = regions.copy(), regions.copy()
+        left[along_x, 2] = middle[along_x]
+        left[~along_x, 3] = middle[~along_x]
+        right[along_x, 0] = middle[along_x]
+        right[~along_x, 1] = middle[~along_x]
+
+        starts = np.concatenate([starts[~split], starts[split], cut[split]])
+        regions = np.concatenate([regions[~split], left[split], right[split]])
+        by_start = np.argsort(starts, kind='stable')
+        starts, regions = starts[by_start], regions[by_start]
+
+    # Stretch each leaf's blocks over its region
+    sizes = np.diff(np.append(starts, n))
+    group = np.repeat(np.arange(len(starts)), sizes)
+    x, y = np.empty(n), np.empty(n)
+    for values, out, lo, hi in ((cx[order], x, regions[:, 0], regions[:, 2]),
+                                (cy[order], y, regions[:, 1], regions[:, 3])):
+        low = np.minimum.reduceat(values, starts)[group]
+        high = np.maximum.reduceat(values, starts)[group]
+        width = (hi - lo)[group]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = np.where(high > low, (values - low) / (high - low), 0.5)
+        # k blocks sit at 1 / (k + 1) ... k / (k + 1) of the region, off its boundary
+        count = sizes[group]
+        t = (t * (count - 1) + 1) / (count + 1)
+        out[order] = lo[group] + width * t
+    return x, y
+
+
+def choose_anchors(adj, count=ANCHORS):
+    """count blocks far apart in the connection graph (farthest-point sampling by hops)"""
+    n = adj.shape[0]
+    degree = np.asarray(adj.sum(axis=1)).ravel()
+    anchors = [int(np.argmax(degree))]
+    nearest = np.full(n, np.inf)
+    for _ in range(min(count, n)):
+        hops = csgraph.shortest_path(adj, unweighted=True, indices=anchors[-1])
+        nearest = np.minimum(nearest, np.where(np.isfinite(hops), hops, -1.0))
+        anchors.append(int(np.argmax(nearest)))
+    # The highest-degree start only seeds the search
+    return np.unique(anchors[1:])
+
+
+def _solve(problem, cx, cy, free, region, iterations, progress, pins=None):
+    """Alternate quadratic solves and spreading for the free blocks (SimPL style)
+
+    pins are (indices into free, centers) held in place for the first solve
+    only. Returns the spread centers of every block and per-round statistics.
+    """
+    n = problem.n
+    lap = laplacian(n, problem.src, problem.dst, problem.weights)
+    area = problem.width * problem.height
+    mean_degree = max(float(np.mean(problem.degree[free])) if len(free) else 0.0, 1.0)
+    center = np.array([(region[0] + region[2]) / 2, (region[1] + region[3]) / 2])
+
+    # Nets to blocks that stay put become constant terms of the free system
+    fixed_pos = np.column_stack([cx, cy])
+    fixed_pos[free] = 0.0
+    rows = lap[free]
+    base = -(rows @ fixed_pos) + CENTER_PULL * mean_degree * center
+    reduced = rows[:, free] + sparse.diags(np.full(len(free), CENTER_PULL * mean_degree))
+
+    pos = np.column_stack([cx[free], cy[free]])
+    positions = fixed_pos.copy()
+    rounds = []
+    for k in range(iterations + 1):
+        # Lower bound: the wirelength optimum, pulled toward the last spread positions
+        weight = ANCHOR_STEP * mean_degree * k
+        if k == 0:
+            matrix, rhs = reduced.tocsr(), base
+            if pins is not None:
+                # Stiff pseudo-nets stand in for pinning, keeping the system's shape
+                pin = np.zeros(len(free))
+                pin[pins[0]] = PIN_WEIGHT * mean_degree
+                rhs = base.copy()
+                rhs[pins[0]] += pin[pins[0], None] * pins[1]
+                matrix = (reduced + sparse.diags(pin)).tocsr()
+        else:
+            matrix = (reduced + sparse.diags(np.full(len(free), weight))).tocsr()
+            rhs = base + weight * target
+        pos, cg = conjugate_gradient(matrix, rhs, pos)
+
+        # Upper bound: the same order spread to an even density
+        target = np.column_stack(spread(pos[:, 0], pos[:, 1], area[free], region))
+        positions[free] = pos
+        lower = problem.wirelength(positions[:, 0], positions[:, 1])
+        positions[free] = target
+        upper = problem.wirelength(positions[:, 0], positions[:, 1])
+        rounds.append({'cg_iterations': cg, 'lower': lower, 'upper': upper})
+        if progress is not None:
+            progress((k + 1) / (iterations + 1))
+        if k and upper <= lower * (1 + CONVERGED_GAP):
+            break
+    return positions[:, 0].copy(), positions[:, 1].copy(), rounds
+
+
+def _region(area, center, utilization):
+    """Square region around center with room for the given area"""
+    half = math.sqrt(float(np.sum(area)) / utilization) / 2
+    return (center[0] - half, center[1] - half, center[0] + half, center[1] + half)
+
+
+def quadratic_place(problem, cx=None, cy=None, fixed=None, iterations=ITERATIONS,
+                    utilization=TARGET_UTILIZATION, progress=None):
+    """Global analytic placement of a PlacementProblem; returns the centers and statistics
+
+    Minimises the squared weighted wirelength with conjugate gradient, then
+    alternately spreads the blocks to an even density and re-solves with
+    pseudo-nets pulling each block toward its spread position. fixed
+    (block ids) stay at their given centers as anchors; the others are
+    placed in a square around them (or around the origin) sized for the
+    target utilization. Without fixed blocks, ANCHORS blocks far apart in
+    the graph are pinned around the square for the first solve.
+    """
+    n = problem.n
+    fixed = np.zeros(0, dtype=np.int64) if fixed is None else np.asarray(fixed, dtype=np.int64)
+    if cx is None or cy is None:
+        cx, cy = np.zeros(n), np.zeros(n)
+    cx, cy = np.array(cx, dtype=np.float64), np.array(cy, dtype=np.float64)
+    free = np.setdiff1d(np.arange(n), fixed)
+    if len(free) == 0:
+        return cx, cy, []
+    area = problem.width * problem.height
+    center = (cx[fixed].mean(), cy[fixed].mean()) if len(fixed) else (0.0, 0.0)
+    region = _region(area[free], center, utilization)
+    pins = None
+    if len(fixed) == 0:
+        anchors = choose_anchors(adjacency(n, problem.src, problem.dst, problem.weights))
+        angle = 2 * math.pi * np.arange(len(anchors)) / len(anchors)
+        radius = 0.4 * (region[2] - region[0])
+        pins = (anchors, np.column_stack([center[0] + radius * np.cos(angle),
+                                          center[1] + radius * np.sin(angle)]))
+    return _solve(problem, cx, cy, free, region, iterations, progress, pins)
+
+
+def neighbourhood(problem, ids, hops=WARM_HOPS):
+    """Blocks within hops nets of the given blocks, the blocks themselves excluded"""
+    ids = np.unique(np.asarray(ids, dtype=np.int64))
+    seen = np.zeros(problem.n, dtype=bool)
+    seen[ids] = True
+    frontier = ids
+    order, offsets, src, dst = problem.net_order, problem.net_offsets, problem.src, problem.dst
+    for _ in range(hops):
+        if len(frontier) == 0:
+            break
+        nets = order[np.concatenate([np.arange(offsets[b], offsets[b + 1]) for b in frontier.tolist()])]
+        ends = np.concatenate([src[nets], dst[nets]])
+        frontier = np.unique(ends[~seen[ends]])
+        seen[frontier] = True
+    seen[ids] = False
+    return np.flatnonzero(seen)
+
+
+def warm_place(problem, cx, cy, moved, hops=WARM_HOPS):
+    """Re-solve only the neighbourhood of blocks the user just dragged
+
+    The dragged blocks anchor the solve at their new centers and every block
+    outside the neighbourhood stays put. Each neighbour also keeps a
+    pseudo-net to its current center (the last spread position), so the
+    neighbourhood follows the dragged blocks without being reshuffled; any
+    overlap this leaves is for Legalize. Returns the centers, the ids that
+    moved and the conjugate-gradient iterations.
+    """
+    cx, cy = np.array(cx, dtype=np.float64), np.array(cy, dtype=np.float64)
+    free = neighbourhood(problem, moved, hops)
+    if len(free) == 0:
+        return cx, cy, free, 0
+    lap = laplacian(problem.n, problem.src, problem.dst, problem.weights)
+    weight = WARM_ANCHOR * max(float(np.mean(problem.degree[free])), 1.0)
+    current = np.column_stack([cx[free], cy[free]])
+    fixed_pos = np.column_stack([cx, cy])
+    fixed_pos[free] = 0.0
+    rows = lap[free]
+    matrix = (rows[:, free] + sparse.diags(np.full(len(free), weight))).tocsr()
+    pos, cg = conjugate_gradient(matrix, -(rows @ fixed_pos) + weight * current, current)
+    cx[free], cy[free] = pos[:, 0], pos[:, 1]
+    return cx, cy, free, cg
+
+
+def analytic_place(blocks, connections, fixed=None, iterations=ITERATIONS, progress=None,
+                   overlap_weight=None):
+    """Place the blocks of a BlockStore analytically and return the final cost
+
+    fixed (block ids) are anchors kept at their current positions; without
+    anchors the placement is shifted to the default grid origin like
+    auto_place's.
+    """
+    problem = PlacementProblem.from_stores(blocks, connections, overlap_weight)
+    cx, cy = box_centers(blocks)
+    cx, cy, rounds = quadratic_place(problem, cx, cy, fixed, iterations, progress=progress)
+    if fixed is None or len(fixed) == 0:
+        result = write_positions(blocks, problem, cx, cy)
+    else:
+        blocks.x[:] = cx - problem.width / 2
+        blocks.y[:] = cy - problem.height / 2
+        result = {'cost': problem.cost(cx, cy), 'wirelength': problem.wirelength(cx, cy),
+                  'overlap_weight': problem.overlap_weight}
+    result['rounds'] = rounds
+    return result
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Floorplanning Tool - Parse cache
+On-disk cache of parsed netlists so reopening a large CSV skips the parse
+"""
+
+import hashlib
+import os
+
+import numpy as np
+
+from floorplan_io import Netlist, read_netlist
+from floorplan_project import map_arrays, write_arrays
+from floorplan_store import NameTable
+
+# Default cache location (override with FLOORPLAN_CACHE_DIR)
+CACHE_DIR = os.environ.get('FLOORPLAN_CACHE_DIR',
+                           os.path.join(os.path.expanduser('~'), '.cache', 'floorplan'))
+
+# Total size the cache is trimmed to, least recently used entries first
+CACHE_BYTES = 1024 * 1024 * 1024
+
+CACHE_EXTENSION = '.fpc'
+
+# Bump when parsing changes so old entries stop matching
+CACHE_VERSION = 1
+
+# Read size when hashing file contents
+HASH_CHUNK = 1024 * 1024
+
+
+class NetlistCache:
+    """Parsed netlists on disk, keyed by their source file
+
+    key='stat' (default) keys an entry on the source's absolute path, size
+    and modification time, so a lookup costs one stat() and any edit to the
+    file misses. key='content' hashes the file contents instead (survives
+    copies and touch, costs one read of the file). Entries use the project
+    file layout and are memory-mapped on a hit. Every hit refreshes the
+    entry's mtime, which is the LRU order eviction trims by.
+    """
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=CACHE_BYTES, key='stat'):
+        if key not in ('stat', 'content'):
+            raise ValueError(f"Unknown cache key: {key}")
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.key_mode = key
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, path):
+        """Cache key of a source file in its current state"""
+        digest = hashlib.blake2b(f"v{CACHE_VERSION}\0".encode(), digest_size=20)
+        st = os.stat(path)
+        if self.key_mode == 'stat':
+            digest.update(f"{os.path.abspath(path)}\0{st.st_size}\0{st.st_mtime_ns}".encode())
+        else:
+            digest.update(f"{st.st_size}\0".encode())
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(HASH_CHUNK), b''):
+                    digest.update(chunk)
+        return digest.hexdigest()
+
+    def entry_path(self, key):
+        return os.path.join(self.directory, key + CACHE_EXTENSION)
+
+    def read(self, path, fmt=None, progress=None):
+        """Netlist of a file: from the cache when it is current, else parsed and stored"""
+        key = self.key(path)
+        netlist = self.get(key)
+        if netlist is not None:
+            self.hits += 1
+            return netlist
+        self.misses += 1
+        netlist = read_netlist(path, fmt, progress)
+        try:
+            self.put(key, netlist)
+        except OSError:
+            # A read-only or full cache directory must not break loading
+            pass
+        return netlist
+
+    def get(self, key):
+        """Cached netlist for a key, or None (unreadable entries are dropped)"""
+        entry = self.entry_path(key)
+        try:
+            arrays, meta = map_arrays(entry)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError):
+            self._remove(entry)
+            return None
+        if meta.get('kind') != 'netlist' or meta.get('key') != key:
+            self._remove(entry)
+            return None
+        try:
+            os.utime(entry)
+        except OSError:
+            pass
+        names = NameTable.from_arrays(arrays['name_blob'], arrays['name_offsets'])
+        return Netlist(names.tolist(), arrays['areas'], arrays['src'], arrays['dst'], arrays['weights'])
+
+    def put(self, key, netlist):
+        """Store a parsed netlist and trim the cache to its byte budget"""
+        os.makedirs(self.directory, exist_ok=True)
+        names = NameTable(netlist.names)
+        write_arrays(self.entry_path(key), {
+            'name_blob': np.frombuffer(names.blob, dtype=np.uint8),
+            'name_offsets': names.offsets,
+            'areas': np.asarray(netlist.areas),
+            'src': np.asarray(netlist.src),
+            'dst': np.asarray(netlist.dst),
+            'weights': np.asarray(netlist.weights),
+        }, meta={'kind': 'netlist', 'key': key})
+        self.evict()
+
+    def entries(self):
+        """(last used, size, path) of every entry, least recently used first"""
+        found = []
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return found
+        for name in names:
+            if not name.endswith(CACHE_EXTENSION):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            found.append((st.st_mtime_ns, st.st_size, path))
+        return sorted(found)
+
+    def nbytes(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        """Remove least recently used entries until the total fits max_bytes"""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            if self._remove(path):
+                total -= size
+
+    def clear(self):
+        for _, _, path in self.entries():
+            self._remove(path)
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
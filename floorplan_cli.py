@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Floorplanning Tool - Headless batch command
+Loads adjacency CSVs, runs placement and metrics, streams JSON-lines results
+
+Usage:
+    python floorplan_cli.py designs/ --jobs 8 --output-dir placed/ > results.jsonl
+
+Exit codes: 0 every file succeeded, 1 at least one file failed,
+2 bad arguments or no input files, 130 interrupted.
+"""
+
+import time
+
+_STARTED = time.perf_counter()
+
+import argparse
+import glob
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from floorplan_cache import NetlistCache
+from floorplan_io import OUTLINES_SUFFIX, load_outlines, read_netlist
+from floorplan_legality import legalize
+from floorplan_metrics import MetricsEngine
+from floorplan_placement import auto_place
+from floorplan_store import BlockStore, NetStore
+
+# Import time of this module and its dependencies (no tkinter / pyplot)
+IMPORT_SECONDS = time.perf_counter() - _STARTED
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+EXIT_INTERRUPTED = 130
+
+
+def find_inputs(paths, pattern):
+    """Expand files and directories into a sorted list of input files
+
+    Outline files found in directories belong to their netlist and are skipped.
+    """
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            found.extend(name for name in glob.glob(os.path.join(path, '**', pattern), recursive=True)
+                         if not name.endswith(OUTLINES_SUFFIX))
+        elif os.path.isfile(path):
+            found.append(path)
+        else:
+            raise FileNotFoundError(path)
+    return sorted(set(found))
+
+
+def write_placement(path, blocks):
+    """Write final block geometry as name,x,y,width,height,area CSV"""
+    with open(path, 'w') as f:
+        f.write('name,x,y,width,height,area\n')
+        for i, name in enumerate(blocks.names):
+            f.write(f"{name},{blocks.x[i]:.3f},{blocks.y[i]:.3f},{blocks.width[i]:.3f},"
+                    f"{blocks.height[i]:.3f},{blocks.area[i]:.3f}\n")
+
+
+def process_file(path, options):
+    """Load, place and score one file; always returns a JSON-serializable dict"""
+    began = time.perf_counter()
+    seconds = {}
+    record = {'file': path}
+    try:
+        t = time.perf_counter()
+        if options.get('cache_dir'):
+            netlist = NetlistCache(options['cache_dir']).read(path)
+        else:
+            netlist = read_netlist(path)
+        blocks = BlockStore.from_netlist(netlist)
+        connections = NetStore.from_netlist(netlist, blocks)
+        outlined = load_outlines(path, blocks)
+        seconds['load'] = time.perf_counter() - t
+        record.update(blocks=len(blocks), connections=len(connections))
+        if outlined:
+            record['outlines'] = outlined
+
+        if options['method'] != 'none':
+            t = time.perf_counter()
+            record['placement'] = auto_place(blocks, connections, method=options['method'],
+                                             iterations=options['iterations'],
+                                             moves=options['moves'], seed=options['seed'])
+            seconds['place'] = time.perf_counter() - t
+
+        if options.get('legalize'):
+            t = time.perf_counter()
+            record['legalize'] = legalize(blocks)
+            seconds['legalize'] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        record['metrics'] = MetricsEngine(blocks, connections).totals()
+        seconds['metrics'] = time.perf_counter() - t
+
+        if options['output_dir']:
+            stem = os.path.splitext(os.path.basename(path))[0]
+            out = os.path.join(options['output_dir'], f"{stem}.placement.csv")
+            write_placement(out, blocks)
+            record['output'] = out
+
+        record['status'] = 'ok'
+    except Exception as e:
+        record['status'] = 'error'
+        record['error'] = f"{type(e).__name__}: {e}"
+
+    seconds['total'] = time.perf_counter() - began
+    record['seconds'] = seconds
+    return record
+
+
+def _to_json(record):
+    """One JSON line (NumPy scalars become plain numbers)"""
+    return json.dumps(record, default=lambda o: o.item() if isinstance(o, np.generic) else str(o))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Place and score adjacency-matrix CSVs without the GUI; "
+                    "prints one JSON object per file as each one finishes.")
+    parser.add_argument('inputs', nargs='+', help="CSV / edge-list files or directories")
+    parser.add_argument('--pattern', default='*.csv', help="file pattern inside directories (default: *.csv)")
+    parser.add_argument('--method', default='both', choices=['force', 'anneal', 'both', 'analytic', 'none'],
+                        help="placement to run before scoring; 'none' scores the default grid")
+    parser.add_argument('--iterations', type=int, default=300, help="force-directed iterations")
+    parser.add_argument('--moves', type=int, default=None, help="annealing moves (default 10 per block)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--legalize', action='store_true', help="remove remaining overlaps after placement")
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                        help="files processed in parallel (default: CPU count)")
+    parser.add_argument('-o', '--output', help="write JSON lines here instead of stdout")
+    parser.add_argument('--output-dir', help="write <name>.placement.csv files here")
+    parser.add_argument('--cache-dir', help="reuse parsed netlists cached here (keyed by file size and mtime)")
+    parser.add_argument('--timings', action='store_true',
+                        help="print startup and per-file timing summary to stderr")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    try:
+        inputs = find_inputs(args.inputs, args.pattern)
+    except FileNotFoundError as e:
+        print(f"Error: no such file or directory: {e}", file=sys.stderr)
+        return EXIT_USAGE
+    if not inputs:
+        print("Error: no input files found", file=sys.stderr)
+        return EXIT_USAGE
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    options = {
+        'method': args.method,
+        'iterations': args.iterations,
+        'moves': args.moves,
+        'seed': args.seed,
+        'output_dir': args.output_dir,
+        'cache_dir': args.cache_dir,
+        'legalize': args.legalize,
+    }
+    out = open(args.output, 'w') if args.output else sys.stdout
+    began = time.perf_counter()
+    failed = 0
+    file_seconds = []
+
+    def emit(record):
+        nonlocal failed
+        failed += record['status'] != 'ok'
+        file_seconds.append(record['seconds']['total'])
+        out.write(_to_json(record) + '\n')
+        out.flush()
+
+    try:
+        jobs = max(1, min(args.jobs, len(inputs)))
+        if jobs == 1:
+            for path in inputs:
+                emit(process_file(path, options))
+        else:
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                futures = [pool.submit(process_file, path, options) for path in inputs]
+                for future in as_completed(futures):
+                    emit(future.result())
+    except KeyboardInterrupt:
+        return EXIT_INTERRUPTED
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    if args.timings:
+        wall = time.perf_counter() - began
+        print(f"startup imports: {IMPORT_SECONDS * 1e3:.1f} ms | files: {len(inputs)} | "
+              f"failed: {failed} | wall: {wall:.2f} s | "
+              f"mean per file: {np.mean(file_seconds) * 1e3:.1f} ms | "
+              f"overhead per file: {(wall - sum(file_seconds) / jobs) / len(inputs) * 1e3:.1f} ms",
+              file=sys.stderr)
+
+    return EXIT_FAILED if failed else EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,15 +4,45 @@ Floorplanning Tool - Version 2.0
 Enhanced desktop application with improved handles and non-rectilinear shapes
 """
 
+import logging
+import os
+import time
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import pandas as pd
+
 import numpy as np
-from matplotlib.figure import Figure
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import matplotlib.pyplot as plt
-from matplotlib.patches import Rectangle
-import matplotlib.patches as patches
+# matplotlib, pandas and the placement pool are imported on first use so the
+# window can appear before they load
+from floorplan_cache import NetlistCache
+from floorplan_events import MotionCoalescer
+from floorplan_graph import NetIndex
+from floorplan_history import EditHistory
+from floorplan_io import load_outlines, netlist_from_matrix
+from floorplan_legality import LegalityChecker, legalize
+from floorplan_metrics import MetricsEngine
+from floorplan_overview import DensityTiles, OverviewMap
+from floorplan_polygons import SHAPE_TYPES, contains, move_notch, notch_point, set_height, set_shape, set_width
+from floorplan_profile import PROFILER, ProfileOverlay, span, timed
+from floorplan_project import PROJECT_EXTENSION, autosave_project, load_project, save_project
+from floorplan_spatial import SpatialGrid
+from floorplan_store import BlockStore, NetStore
+from floorplan_tasks import BackgroundTask, apply_in_batches
+from floorplan_tables import BlockTableModel, NetTableModel, VirtualTable
+
+# View scale factor per mouse-wheel notch
+ZOOM_STEP = 1.25
+
+# Undo/redo touching more than this fraction of the blocks rebuilds the
+# spatial index and metrics instead of updating them block by block
+REBUILD_FRACTION = 0.125
+
+# Interval between autosaves of an open project (only changed blocks are written)
+AUTOSAVE_MS = 30_000
+
+# Strongest neighbours of the selected block listed in the info bar
+FANOUT_NEIGHBOURS = 3
+
+logger = logging.getLogger(__name__)
 
 class FloorplanToolV2:
     def __init__(self, root):
@@ -20,17 +50,56 @@ class FloorplanToolV2:
         self.root.title("Floorplanning Tool - Version 2.0")
         self.root.geometry("1400x900")
         
-        # Data storage
-        self.blocks = []
-        self.connections = []
+        # Data storage (array-backed; indexing yields dict-like views)
+        self.blocks = BlockStore()
+        self.connections = NetStore()
         self.hardmacro_names = []
         
+        # Spatial index over block bounding boxes for hit testing
+        self.spatial_index = SpatialGrid()
+        
+        # Block -> nets index for the selection highlight and fan-out (built on load)
+        self.net_index = None
+        
+        # Block area / congestion tiles behind the minimap (built on load)
+        self.density = None
+        
+        # Wirelength / overlap / crossing scores (built on load)
+        self.metrics = None
+        
+        # Overlapping block pairs, kept current while dragging (built on load)
+        self.legality = None
+        
+        # Undo/redo journal of geometry edits (reset on load)
+        self.history = EditHistory(self.blocks)
+        
+        # Collapsed super-block view of a large design (None when showing it flat);
+        # the flat design's index, scores and history wait in flat_state meanwhile
+        self.cluster_view = None
+        self.flat_state = None
+        
+        # Parsed netlists cached on disk, so reopening a large CSV skips the parse
+        self.netlist_cache = NetlistCache()
+        
+        # Project file being autosaved (None until a project is opened or saved)
+        self.project_path = None
+        # Flat nets whose weight was edited since the project was last written
+        # (changed blocks are flagged by the flat undo history)
+        self.dirty_nets = set()
+        
+        # Load or placement running on a worker thread (None when idle)
+        self.task = None
+        
         # Interactive state
         self.selected_block = None
         self.dragging = False
-        self.resize_mode = None  # 'move', 'width', 'height', 'corner'
+        self.resize_mode = None  # 'move', 'width', 'height', 'corner', 'notch'
         self.last_mouse_pos = None
         self.hover_handle = None
+        self.pan_start = None  # (pixel x, pixel y, xlim, ylim) while panning
+        
+        # Blocks dragged since the last placement (Ctrl+G re-solves around them)
+        self.dragged_ids = set()
         
         # Handle configuration
         self.handle_config = {
@@ -47,6 +116,7 @@ class FloorplanToolV2:
         
         # Create GUI
         self.create_widgets()
+        self.root.after(AUTOSAVE_MS, self.autosave)
         
     def create_widgets(self):
         # Main frame
@@ -61,30 +131,84 @@ class FloorplanToolV2:
         self.upload_btn = ttk.Button(control_frame, text="Upload CSV", command=self.upload_csv)
         self.upload_btn.pack(side=tk.LEFT, padx=(0, 10))
         
+        # Project files keep the placement (binary, memory-mapped on open)
+        self.open_btn = ttk.Button(control_frame, text="Open Project", command=self.open_project)
+        self.open_btn.pack(side=tk.LEFT, padx=(0, 5))
+        self.save_btn = ttk.Button(control_frame, text="Save Project", command=self.save_project)
+        self.save_btn.pack(side=tk.LEFT, padx=(0, 10))
+        
         # Interactive controls
         self.interactive_var = tk.BooleanVar(value=True)
         self.interactive_cb = ttk.Checkbutton(control_frame, text="Interactive Mode", 
                                             variable=self.interactive_var)
         self.interactive_cb.pack(side=tk.LEFT, padx=(0, 10))
         
-        # Shape mode controls
+        # Shape mode controls (reshape the selected block, keeping its area)
         self.shape_mode_var = tk.StringVar(value="rectangle")
         shape_frame = ttk.LabelFrame(control_frame, text="Shape Mode")
         shape_frame.pack(side=tk.LEFT, padx=(0, 10))
         
-        ttk.Radiobutton(shape_frame, text="Rectangle", variable=self.shape_mode_var, 
-                       value="rectangle").pack(side=tk.LEFT, padx=5)
-        ttk.Radiobutton(shape_frame, text="L-Shape", variable=self.shape_mode_var, 
-                       value="lshape").pack(side=tk.LEFT, padx=5)
+        for text, value in (("Rectangle", "rectangle"), ("L", "lshape"), ("T", "tshape"), ("U", "ushape")):
+            ttk.Radiobutton(shape_frame, text=text, variable=self.shape_mode_var, value=value,
+                            command=self.apply_shape).pack(side=tk.LEFT, padx=5)
+        
+        # Undo / redo buttons (also Ctrl+Z, Ctrl+Y / Ctrl+Shift+Z)
+        self.undo_btn = ttk.Button(control_frame, text="Undo", command=self.undo, state=tk.DISABLED)
+        self.undo_btn.pack(side=tk.LEFT, padx=(0, 5))
+        self.redo_btn = ttk.Button(control_frame, text="Redo", command=self.redo, state=tk.DISABLED)
+        self.redo_btn.pack(side=tk.LEFT, padx=(0, 10))
+        self.root.bind('<Control-z>', lambda e: self.undo())
+        self.root.bind('<Control-y>', lambda e: self.redo())
+        self.root.bind('<Control-Z>', lambda e: self.redo())
+        
+        # Ctrl+G re-places the neighbourhood of the blocks just dragged
+        self.root.bind('<Control-g>', lambda e: self.run_warm_place())
+        
+        # Profiling: F12 toggles spans and the overlay, Ctrl+F12 also runs
+        # cProfile, Shift+F12 saves a Chrome trace (.json) or cProfile stats
+        self.root.bind('<F12>', lambda e: self.toggle_profiling())
+        self.root.bind('<Control-F12>', lambda e: self.toggle_profiling(cprofile=True))
+        self.root.bind('<Shift-F12>', lambda e: self.save_profile())
         
         # Reset view button
         self.reset_btn = ttk.Button(control_frame, text="Reset View", command=self.reset_view)
         self.reset_btn.pack(side=tk.LEFT, padx=(0, 10))
         
+        # Automatic placement button
+        self.autoplace_btn = ttk.Button(control_frame, text="Auto Place", command=self.run_auto_place)
+        self.autoplace_btn.pack(side=tk.LEFT, padx=(0, 10))
+        
+        # Push overlapping blocks apart with minimal displacement
+        self.legalize_btn = ttk.Button(control_frame, text="Legalize", command=self.run_legalize)
+        self.legalize_btn.pack(side=tk.LEFT, padx=(0, 10))
+        
+        # Collapse the design into min-cut clusters (and back)
+        self.cluster_btn = ttk.Button(control_frame, text="Cluster", command=self.toggle_clusters)
+        self.cluster_btn.pack(side=tk.LEFT, padx=(0, 10))
+        
+        # Placer used by Auto Place: annealing runs, or one analytic solve
+        self.placement_method_var = tk.StringVar(value="Annealing")
+        ttk.Combobox(control_frame, textvariable=self.placement_method_var, values=("Annealing", "Analytic"),
+                     state='readonly', width=10).pack(side=tk.LEFT, padx=(0, 10))
+        
+        # Independent placement runs (best one wins), one worker per core
+        ttk.Label(control_frame, text="Runs:").pack(side=tk.LEFT)
+        self.placement_runs_var = tk.IntVar(value=os.cpu_count() or 1)
+        ttk.Spinbox(control_frame, from_=1, to=64, width=4,
+                    textvariable=self.placement_runs_var).pack(side=tk.LEFT, padx=(0, 10))
+        
         # Info labels
         self.info_label = ttk.Label(control_frame, text="No data loaded")
         self.info_label.pack(side=tk.LEFT)
         
+        # Progress of background work; shown only while a task runs
+        self.task_frame = ttk.Frame(control_frame)
+        self.task_label = ttk.Label(self.task_frame, text="")
+        self.task_label.pack(side=tk.LEFT, padx=(0, 5))
+        self.task_progress = ttk.Progressbar(self.task_frame, length=150, maximum=1.0)
+        self.task_progress.pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(self.task_frame, text="Cancel", command=self.cancel_task).pack(side=tk.LEFT)
+        
         # Create notebook for tabs
         self.notebook = ttk.Notebook(main_frame)
         self.notebook.pack(fill=tk.BOTH, expand=True)
@@ -93,16 +217,21 @@ class FloorplanToolV2:
         self.floorplan_frame = ttk.Frame(self.notebook)
         self.notebook.add(self.floorplan_frame, text="Interactive Floorplan")
         
-        # Create matplotlib figure for floorplan
-        self.fig = Figure(figsize=(12, 8))
-        self.ax = self.fig.add_subplot(111)
-        self.canvas = FigureCanvasTkAgg(self.fig, self.floorplan_frame)
-        self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        # The matplotlib canvas is created on first use (see ensure_canvas);
+        # until then a plain label holds its place
+        self.fig = None
+        self.ax = None
+        self.canvas = None
+        self.renderer = None
+        self.overview = None
+        self.canvas_placeholder = ttk.Label(self.floorplan_frame, text="Upload CSV to see floorplan",
+                                            anchor=tk.CENTER)
+        self.canvas_placeholder.pack(fill=tk.BOTH, expand=True)
         
-        # Connect mouse events
-        self.canvas.mpl_connect('button_press_event', self.on_mouse_press)
-        self.canvas.mpl_connect('button_release_event', self.on_mouse_release)
-        self.canvas.mpl_connect('motion_notify_event', self.on_mouse_move)
+        # Frame time overlay (shown while profiling)
+        self.profile_overlay = ProfileOverlay(self.floorplan_frame)
+        if PROFILER.enabled:
+            self.profile_overlay.show()
         
         # Properties tab
         self.properties_frame = ttk.Frame(self.notebook)
@@ -121,97 +250,145 @@ class FloorplanToolV2:
         # Instructions
         self.create_instructions()
         
-        # Initial plot
-        self.update_plot()
+    def ensure_canvas(self):
+        """Create the matplotlib figure, canvas and renderer on first use"""
+        if self.canvas is not None:
+            return
+            
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from floorplan_render import FloorplanRenderer
+        
+        self.canvas_placeholder.destroy()
+        
+        # Create matplotlib figure for floorplan
+        self.fig = Figure(figsize=(12, 8))
+        self.ax = self.fig.add_subplot(111)
+        self.canvas = FigureCanvasTkAgg(self.fig, self.floorplan_frame)
+        
+        # Minimap of the whole design to the right of the canvas; it follows
+        # the view through the axes' limit callbacks and pans it when dragged
+        self.overview = OverviewMap(self.floorplan_frame, self.center_view)
+        self.overview.canvas.pack(side=tk.RIGHT, anchor=tk.N, padx=(5, 0), before=self.instruction_frame)
+        if self.density is not None:
+            self.overview.set_tiles(self.density)
+        self.ax.callbacks.connect('xlim_changed', self.view_changed)
+        self.ax.callbacks.connect('ylim_changed', self.view_changed)
+        self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, before=self.instruction_frame)
+        
+        # Retained-mode renderer (artists persist, drags are blitted)
+        self.renderer = FloorplanRenderer(self.ax, self.canvas, self.handle_config)
+        
+        # Every full figure draw (including idle ones) is a profiling span
+        self.fig.draw = timed('draw')(self.fig.draw)
+        
+        # Motion events are coalesced into at most one frame per budget
+        self.motion = MotionCoalescer(self.root, self.process_motion)
+        
+        # Connect mouse events
+        self.canvas.mpl_connect('button_press_event', self.on_mouse_press)
+        self.canvas.mpl_connect('button_release_event', self.on_mouse_release)
+        self.canvas.mpl_connect('motion_notify_event', self.on_mouse_move)
+        self.canvas.mpl_connect('scroll_event', self.on_scroll)
+        
+        # Keep the profiling overlay above the new canvas
+        if PROFILER.enabled:
+            self.profile_overlay.show()
         
     def create_instructions(self):
         """Create instruction panel"""
         instruction_frame = ttk.LabelFrame(self.floorplan_frame, text="Instructions")
         instruction_frame.pack(fill=tk.X, pady=(0, 10))
+        self.instruction_frame = instruction_frame
         
         instructions = """
         Interactive Controls (Version 2.0):
         • Click and drag blocks to move them
         • Drag RED corner handles to reshape aspect ratio (area stays constant)
         • Drag TEAL edge handles to change width/height (area stays constant)
+        • Drag the notch handle of an L/T/U block to resize its notch (area stays constant)
         • Hover over handles for visual feedback
-        • Use Shape Mode to switch between rectangle and L-shape
+        • Scroll to zoom, drag with the right or middle button to pan
+        • Drag the orange box on the minimap to pan; scroll over the minimap to zoom it
+        • Use Shape Mode to turn the selected block into a rectangle or an L, T or U shape
+        • Use Auto Place to place blocks by connectivity (Annealing or Analytic)
+        • Ctrl+G re-places the neighbours of the blocks dragged since the last placement
+        • Overlapping blocks are outlined in orange; Legalize pushes them apart
+        • Cluster collapses the design into super-blocks; double-click one to split it,
+          Shift+double-click to merge it back, Flatten to return to the blocks
+        • Ctrl+Z / Ctrl+Y undo and redo moves, resizes, edits and Auto Place
+        • F12 shows frame timings (Ctrl+F12 adds cProfile), Shift+F12 saves the trace
         • Use Properties tab for precise editing
         """
         
         ttk.Label(instruction_frame, text=instructions, justify=tk.LEFT).pack(padx=5, pady=5)
         
     def create_properties_widgets(self):
-        # Scrollable frame for properties
-        canvas = tk.Canvas(self.properties_frame)
-        scrollbar = ttk.Scrollbar(self.properties_frame, orient="vertical", command=canvas.yview)
-        scrollable_frame = ttk.Frame(canvas)
-        
-        scrollable_frame.bind(
-            "<Configure>",
-            lambda e: canvas.configure(scrollregion=canvas.bbox("all"))
-        )
-        
-        canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
-        canvas.configure(yscrollcommand=scrollbar.set)
-        
-        canvas.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
-        
-        self.properties_container = scrollable_frame
+        # Virtualized block table with in-place editing
+        self.properties_table = VirtualTable(self.properties_frame, on_edit=self.on_block_edited,
+                                             before_edit=self.before_block_edit,
+                                             empty_text="No blocks loaded")
+        self.properties_table.pack(fill=tk.BOTH, expand=True)
         
     def create_connections_widgets(self):
-        # Scrollable frame for connections
-        canvas = tk.Canvas(self.connections_frame)
-        scrollbar = ttk.Scrollbar(self.connections_frame, orient="vertical", command=canvas.yview)
-        scrollable_frame = ttk.Frame(canvas)
-        
-        scrollable_frame.bind(
-            "<Configure>",
-            lambda e: canvas.configure(scrollregion=canvas.bbox("all"))
-        )
-        
-        canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
-        canvas.configure(yscrollcommand=scrollbar.set)
-        
-        canvas.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
-        
-        self.connections_container = scrollable_frame
+        # Virtualized connection table (weights are editable)
+        self.connections_table = VirtualTable(self.connections_frame, on_edit=self.on_connection_edited,
+                                              before_edit=self.before_connection_edit,
+                                              empty_text="No connections loaded")
+        self.connections_table.pack(fill=tk.BOTH, expand=True)
         
+    @timed('handles')
     def get_handle_at_position(self, x, y, block):
         """Get handle type at given position with improved detection"""
         corner_size = self.handle_config['corner_size']
         edge_width = self.handle_config['edge_width']
         edge_height = self.handle_config['edge_height']
         
-        # Corner handles (all four corners)
-        corners = [
-            (block['x'] + block['width'] - corner_size, block['y'] + block['height'] - corner_size),  # Top-right
-            (block['x'] + block['width'] - corner_size, block['y']),                                  # Bottom-right
-            (block['x'], block['y'] + block['height'] - corner_size),                                 # Top-left
-            (block['x'], block['y'])                                                                   # Bottom-left
-        ]
+        # Notch corner of L/T/U blocks (inside the box, so tested first)
+        notch = notch_point(self.blocks, block['id'])
+        if notch is not None and abs(x - notch[0]) <= corner_size / 2 and abs(y - notch[1]) <= corner_size / 2:
+            return 'notch'
         
-        for i, (cx, cy) in enumerate(corners):
-            if (x >= cx and x <= cx + corner_size and 
-                y >= cy and y <= cy + corner_size):
-                return f'corner_{i}'
+        # Read the geometry once; handles are tested arithmetically
+        bx, by = block['x'], block['y']
+        right, top = bx + block['width'], by + block['height']
+        
+        # Corner handles (top-right, bottom-right, top-left, bottom-left)
+        in_left = bx <= x <= bx + corner_size
+        in_right = right - corner_size <= x <= right
+        in_bottom = by <= y <= by + corner_size
+        in_top = top - corner_size <= y <= top
+        if in_right and in_top:
+            return 'corner_0'
+        if in_right and in_bottom:
+            return 'corner_1'
+        if in_left and in_top:
+            return 'corner_2'
+        if in_left and in_bottom:
+            return 'corner_3'
         
         # Edge handles (right and bottom edges)
-        if (x >= block['x'] + block['width'] - edge_width and 
-            block['y'] < y < block['y'] + block['height']):
+        if x >= right - edge_width and by < y < top:
             return 'edge_right'
         
-        if (y >= block['y'] + block['height'] - edge_height and 
-            block['x'] < x < block['x'] + block['width']):
+        if y >= top - edge_height and bx < x < right:
             return 'edge_bottom'
         
         return None
         
     def on_mouse_press(self, event):
         """Handle mouse press events with improved handle detection"""
-        if not self.interactive_var.get() or not self.blocks:
+        # Apply the last motion before acting on the press
+        self.motion.flush()
+        self.motion.reset_stats()
+        
+        # Middle or right button pans the view
+        if event.button in (2, 3) and event.inaxes == self.ax and self.blocks:
+            self.pan_start = (event.x, event.y, self.ax.get_xlim(), self.ax.get_ylim())
+            return
+            
+        # No edits while a background task may replace the blocks
+        if not self.interactive_var.get() or not self.blocks or self.task is not None:
             return
             
         if event.inaxes != self.ax:
@@ -220,6 +397,12 @@ class FloorplanToolV2:
         # Find clicked block
         clicked_block = self.get_block_at_position(event.xdata, event.ydata)
         
+        # Double-clicking a super-block splits it (Shift merges it with its siblings)
+        if event.dblclick and self.cluster_view is not None:
+            if clicked_block:
+                self.refine_cluster(clicked_block['id'], merge=event.key == 'shift')
+            return
+        
         if clicked_block:
             self.selected_block = clicked_block
             self.dragging = True
@@ -229,7 +412,9 @@ class FloorplanToolV2:
             handle_type = self.get_handle_at_position(event.xdata, event.ydata, clicked_block)
             
             if handle_type:
-                if handle_type.startswith('corner'):
+                if handle_type == 'notch':
+                    self.resize_mode = 'notch'
+                elif handle_type.startswith('corner'):
                     self.resize_mode = 'corner'
                 elif handle_type.startswith('edge'):
                     if 'right' in handle_type:
@@ -241,373 +426,711 @@ class FloorplanToolV2:
             else:
                 self.resize_mode = 'move'
                 
-            self.update_plot()
+            self.shape_mode_var.set(clicked_block['shape_type'])
+            self.renderer.set_selection(clicked_block, self.hover_handle, self.interactive_var.get())
+            self.renderer.begin_drag(clicked_block)
+            self.history.begin([clicked_block['id']])
+            self.update_info()
         else:
             self.selected_block = None
             self.dragging = False
             self.resize_mode = None
-            self.update_plot()
+            self.renderer.set_selection(None)
+            self.update_info()
             
     def on_mouse_move(self, event):
-        """Handle mouse move events with improved feedback"""
+        """Queue a motion event; the latest one is processed on the next frame"""
+        self.motion.submit(event)
+        
+    @timed('frame', frame=True)
+    def process_motion(self, event):
+        """Apply the newest motion event: pan, hover or drag
+
+        Returns False when the event was dropped unused (outside the axes,
+        with editing off, or with no block selected to hover over or drag);
+        the coalescer counts those.
+        """
+        if self.pan_start is not None:
+            self.pan_to(event)
+            return True
+            
         if not self.interactive_var.get():
-            return
+            return False
             
         if event.inaxes != self.ax:
-            return
+            return False
             
         # Update hover state
         if self.selected_block:
             handle_type = self.get_handle_at_position(event.xdata, event.ydata, self.selected_block)
             if handle_type != self.hover_handle:
                 self.hover_handle = handle_type
-                self.update_plot()
+                self.renderer.set_hover(handle_type)
         
-        if not self.dragging or not self.selected_block:
-            return
-            
-        if self.last_mouse_pos is None:
-            return
+        if not self.dragging or not self.selected_block or self.last_mouse_pos is None:
+            # Only the hover state could use it
+            return self.selected_block is not None
             
         dx = event.xdata - self.last_mouse_pos[0]
         dy = event.ydata - self.last_mouse_pos[1]
         
-        if self.resize_mode == 'move':
-            # Move block
-            self.selected_block['x'] += dx
-            self.selected_block['y'] += dy
-        elif self.resize_mode == 'width':
-            # Resize width (maintain area)
-            new_width = self.selected_block['width'] + dx
-            if new_width > 10:  # Minimum size
-                old_area = self.selected_block['area']
-                self.selected_block['width'] = new_width
-                self.selected_block['height'] = old_area / new_width
-                print(f"Width resize: {new_width:.1f} × {self.selected_block['height']:.1f} = {old_area:.1f}")
-        elif self.resize_mode == 'height':
-            # Resize height (maintain area)
-            new_height = self.selected_block['height'] + dy
-            if new_height > 10:  # Minimum size
-                old_area = self.selected_block['area']
-                self.selected_block['height'] = new_height
-                self.selected_block['width'] = old_area / new_height
-                print(f"Height resize: {self.selected_block['width']:.1f} × {new_height:.1f} = {old_area:.1f}")
-        elif self.resize_mode == 'corner':
-            # Reshape by changing aspect ratio while maintaining area
-            new_width = self.selected_block['width'] + dx
-            new_height = self.selected_block['height'] + dy
-            if new_width > 10 and new_height > 10:
-                old_area = self.selected_block['area']
-                self.selected_block['width'] = new_width
-                self.selected_block['height'] = old_area / new_width
-                print(f"Corner reshape: {new_width:.1f} × {self.selected_block['height']:.1f} = {old_area:.1f}")
+        with span('edit'):
+            if self.resize_mode == 'move':
+                # Move block
+                self.selected_block['x'] += dx
+                self.selected_block['y'] += dy
+            elif self.resize_mode == 'width':
+                # Resize width (maintain area, whatever the shape)
+                set_width(self.blocks, self.selected_block['id'], self.selected_block['width'] + dx)
+            elif self.resize_mode == 'height':
+                # Resize height (maintain area)
+                set_height(self.blocks, self.selected_block['id'], self.selected_block['height'] + dy)
+            elif self.resize_mode == 'corner':
+                # Reshape by changing aspect ratio while maintaining area
+                if self.selected_block['height'] + dy > 10:
+                    set_width(self.blocks, self.selected_block['id'], self.selected_block['width'] + dx)
+            elif self.resize_mode == 'notch':
+                # Move the notch corner; the box rescales to keep the area
+                move_notch(self.blocks, self.selected_block['id'], dx, dy)
         
         self.last_mouse_pos = (event.xdata, event.ydata)
-        self.update_plot()
+        self.block_changed(self.selected_block)
+        self.renderer.drag_update(self.selected_block)
+        return True
         
     def on_mouse_release(self, event):
         """Handle mouse release events"""
+        self.motion.flush()
+        
+        if self.pan_start is not None:
+            self.pan_start = None
+            return
+            
+        was_dragging = self.dragging
+        resize_mode = self.resize_mode
         self.dragging = False
         self.resize_mode = None
         self.last_mouse_pos = None
         self.hover_handle = None
         
+        # Full redraw only once the drag is over
+        if was_dragging:
+            self.renderer.set_hover(None)
+            self.renderer.end_drag()
+            self.overview.refresh()
+            self.properties_table.refresh()
+            
+            # The whole drag is one undo step
+            labels = {'move': "Move", 'width': "Width", 'height': "Height", 'corner': "Reshape",
+                      'notch': "Notch"}
+            entry = self.history.commit(labels[resize_mode])
+            self.update_history_buttons()
+            if entry is not None and resize_mode == 'move':
+                self.dragged_ids.add(self.selected_block['id'])
+            
+            # Logged once per drag, never per motion event
+            block = self.selected_block
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("%s %s: %.1f × %.1f = %.1f", resize_mode, block['name'],
+                             block['width'], block['height'], block['area'])
+                logger.debug("drag: %s", self.motion.summary())
+        
+    @timed('hit_test')
     def get_block_at_position(self, x, y):
         """Find block at given position"""
-        for block in self.blocks:
-            if (x >= block['x'] and x <= block['x'] + block['width'] and
-                y >= block['y'] and y <= block['y'] + block['height']):
-                return block
-        return None
+        # Handles of the selected block stay grabbable even over its notch
+        if self.selected_block and self.get_handle_at_position(x, y, self.selected_block):
+            return self.selected_block
+        
+        # Bounding boxes narrow the search, the shapes decide
+        ids = self.spatial_index.query_rect(x, y, x, y)
+        if len(ids) > 1 or (len(ids) and self.blocks.shape_code[ids[0]]):
+            ids = ids[contains(self.blocks, ids, x, y)]
+        if len(ids) == 0:
+            return None
+        return self.blocks[int(ids[0])]
+        
+    def apply_shape(self):
+        """Give the selected block the shape picked in Shape Mode, keeping its area"""
+        block = self.selected_block
+        if not block or self.dragging or self.task is not None:
+            return
+        code = SHAPE_TYPES.index(self.shape_mode_var.get())
+        if self.blocks.shape_code[block['id']] == code:
+            return
+        with self.history.edit("Shape", [block['id']]):
+            set_shape(self.blocks, block['id'], code)
+        self.update_history_buttons()
+        self.block_changed(block)
+        self.properties_table.refresh()
+        self.update_plot()
         
     def reset_view(self):
         """Reset the plot view"""
-        self.ax.set_xlim(auto=True)
-        self.ax.set_ylim(auto=True)
-        self.canvas.draw()
+        if self.canvas is None:
+            return
+        self.renderer.reset_view()
         
-    def upload_csv(self):
-        """Upload and process CSV file"""
-        try:
-            filename = filedialog.askopenfilename(
-                title="Select CSV file",
-                filetypes=[("CSV files", "*.csv"), ("All files", "*.*")]
-            )
+    def on_scroll(self, event):
+        """Zoom in or out around the cursor with the mouse wheel"""
+        if event.inaxes != self.ax or not self.blocks:
+            return
+        scale = 1 / ZOOM_STEP if event.button == 'up' else ZOOM_STEP
+        (x0, x1), (y0, y1) = self.ax.get_xlim(), self.ax.get_ylim()
+        x, y = event.xdata, event.ydata
+        self.renderer.set_view((x - (x - x0) * scale, x + (x1 - x) * scale),
+                               (y - (y - y0) * scale, y + (y1 - y) * scale))
+        
+    def center_view(self, x, y):
+        """Pan the view to center on a point, keeping its size (minimap drags)"""
+        (x0, x1), (y0, y1) = self.ax.get_xlim(), self.ax.get_ylim()
+        self.renderer.set_view((x - (x1 - x0) / 2, x + (x1 - x0) / 2), (y - (y1 - y0) / 2, y + (y1 - y0) / 2))
+        
+    def view_changed(self, ax):
+        """Outline the new view limits on the minimap"""
+        self.overview.set_view(ax.get_xlim(), ax.get_ylim())
+        
+    def pan_to(self, event):
+        """Shift the view by the mouse movement since the pan started"""
+        px, py, (x0, x1), (y0, y1) = self.pan_start
+        dx = (event.x - px) * (x1 - x0) / self.ax.bbox.width
+        dy = (event.y - py) * (y1 - y0) / self.ax.bbox.height
+        self.renderer.set_view((x0 - dx, x1 - dx), (y0 - dy, y1 - dy))
+        
+    def run_legalize(self):
+        """Remove all overlaps, moving blocks as little as possible"""
+        if not self.blocks or self.task is not None or self.legality.is_legal():
+            return
+        self.history.begin()
+        stats = legalize(self.blocks)
+        entry = self.history.commit("Legalize")
+        logger.info("legalize: %s", stats)
+        if entry is not None:
+            # Only the moved blocks: small passes update the indexes in place
+            self.history_changed(entry.ids)
+        
+    def run_auto_place(self):
+        """Place all blocks in the background from their areas and connections"""
+        if not self.blocks:
+            messagebox.showinfo("Auto Place", "Upload a CSV first")
+            return
+        if self.task is not None:
+            return
             
-            if not filename:
-                return
+        # Best of N force-directed + annealing runs across all cores, or one
+        # analytic solve, on a copy so the live blocks can still be drawn
+        # while it runs
+        analytic = self.placement_method_var.get() == "Analytic"
+        runs = max(1, self.placement_runs_var.get())
+        placed = self.blocks.copy()
+        connections = self.connections
+        net_index = self.net_index
+        
+        def work(progress):
+            progress(0.0, "Placing")
+            began = time.perf_counter()
+            if analytic:
+                from floorplan_analytic import analytic_place
                 
-            # Read CSV with header
-            df = pd.read_csv(filename, index_col=0)
+                result = analytic_place(placed, connections,
+                                        progress=lambda fraction: progress(fraction, "Solving"))
+                result.update(runs=1, wall_seconds=time.perf_counter() - began)
+            else:
+                from floorplan_parallel import parallel_place
+                
+                result = parallel_place(placed, connections, runs=runs, workers=min(runs, os.cpu_count() or 1),
+                                        progress=lambda done, total: progress(done / total,
+                                                                              f"Run {done} of {total}"))
+            progress(1.0, "Scoring")
+            spatial_index = SpatialGrid()
+            spatial_index.build(placed)
+            return (result, spatial_index, MetricsEngine(placed, connections, net_index), LegalityChecker(placed),
+                    DensityTiles(placed, connections, net_index))
             
-            # Get hardmacro names
-            self.hardmacro_names = df.index.tolist()
+        def done(outcome):
+            result, spatial_index, metrics, legality, density = outcome
+            blocks = self.blocks
             
-            # Validate
-            if len(self.hardmacro_names) != len(df.columns):
-                messagebox.showerror("Error", "Number of row names must match number of column names")
-                return
+            def write_back():
+                # Positions changed everywhere: one undo step for the lot
+                with self.history.edit("Auto Place"):
+                    for key in BlockStore.FIELDS:
+                        getattr(blocks, key)[:] = getattr(placed, key)
+                self.spatial_index = spatial_index
+                # Same geometry as the copy it was scored on
+                metrics.rebind(blocks)
+                legality.rebind(blocks)
+                density.blocks = blocks
+                self.metrics = metrics
+                self.legality = legality
+                self.density = density
+                self.overview.set_tiles(density)
+                self.dragged_ids.clear()
+                self.update_history_buttons()
+                
+            def finished():
+                self.task_finished()
+                method = "Analytic placement" if analytic else f"Best of {result['runs']} runs"
+                messagebox.showinfo("Auto Place", f"{method}: cost {result['cost']:,.0f} "
+                                                  f"in {result['wall_seconds']:.1f} s")
                 
-            adjacency_matrix = df.values
+            apply_in_batches(self.root, [write_back, self.update_info, self.update_plot, self.reset_view,
+                                         self.update_properties], on_done=finished)
             
-            if adjacency_matrix.shape[0] != adjacency_matrix.shape[1]:
-                messagebox.showerror("Error", "Matrix must be square")
-                return
+        self.start_task("Auto Place", work, done)
+        
+    def run_warm_place(self):
+        """Re-solve the neighbourhood of the blocks dragged since the last placement"""
+        if self.dragging or self.task is not None or not self.dragged_ids:
+            return
+        from floorplan_analytic import warm_place
+        from floorplan_placement import PlacementProblem, box_centers
+        
+        # The dragged blocks anchor the solve; only their neighbours move
+        problem = PlacementProblem.from_stores(self.blocks, self.connections)
+        with span('warm_place'):
+            cx, cy, moved, iterations = warm_place(problem, *box_centers(self.blocks), sorted(self.dragged_ids))
+        self.dragged_ids.clear()
+        self.history.begin(moved)
+        self.blocks.x[moved] = cx[moved] - problem.width[moved] / 2
+        self.blocks.y[moved] = cy[moved] - problem.height[moved] / 2
+        entry = self.history.commit("Re-place")
+        logger.info("warm place: %d blocks, %d CG iterations", len(moved), iterations)
+        if entry is not None:
+            self.history_changed(entry.ids)
+            
+    def toggle_clusters(self):
+        """Collapse the design into clusters, or go back to the flat design"""
+        if self.cluster_view is not None:
+            self.flatten_clusters()
+        else:
+            self.run_cluster()
+            
+    def run_cluster(self):
+        """Partition the connection graph in the background and show its clusters"""
+        if not self.blocks:
+            messagebox.showinfo("Cluster", "Upload a CSV first")
+            return
+        if self.task is not None:
+            return
+            
+        # The worker reads only areas and nets; positions are collapsed when it is done
+        count, areas = len(self.blocks), self.blocks.area.copy()
+        connections = self.connections
+        
+        def work(progress):
+            from floorplan_partition import ClusterTree
+            
+            progress(0.0, "Partitioning")
+            return ClusterTree.build(count, connections.src, connections.dst, connections.weights, areas,
+                                     progress=lambda fraction: progress(fraction, "Partitioning"))
+            
+        def done(tree):
+            from floorplan_partition import ClusterView
+            
+            self.task_finished()
+            self.flat_state = (self.blocks, self.connections, self.spatial_index, self.metrics,
+                               self.legality, self.history)
+            self.show_clusters(ClusterView(self.blocks, self.connections, tree, tree.frontier()))
+            
+        self.start_task("Cluster", work, done)
+        
+    def show_clusters(self, view, keep_view=False):
+        """Make a cluster view's super-blocks the current design"""
+        flat_state = self.flat_state
+        self.set_design(view.blocks, view.connections)
+        self.cluster_view, self.flat_state = view, flat_state
+        self.cluster_btn.config(text="Flatten")
+        self.update_info()
+        self.update_plot(keep_view=keep_view)
+        self.update_properties()
+        self.update_connections()
+        
+    def write_back_clusters(self):
+        """Move the flat blocks after their super-blocks (one undo step in the flat history)"""
+        history = self.flat_state[5]
+        history.begin()
+        moved = self.cluster_view.write_back()
+        history.commit("Move Clusters")
+        return moved
+        
+    def refine_cluster(self, index, merge=False):
+        """Split a super-block into its two halves, or merge it with its siblings"""
+        self.write_back_clusters()
+        view = self.cluster_view
+        if view.merge(index) if merge else view.expand(index):
+            self.show_clusters(view, keep_view=True)
+            
+    def flatten_clusters(self):
+        """Leave the cluster view, keeping where the super-blocks were moved"""
+        if self.dragging or self.task is not None:
+            return
+        moved = self.write_back_clusters()
+        blocks, connections, spatial_index, metrics, legality, history = self.flat_state
+        self.set_design(blocks, connections, spatial_index, metrics, legality)
+        self.history = history
+        self.history_changed(moved)
+        self.update_properties()
+        self.update_connections()
+        
+    def flat_history(self):
+        """Undo history of the flat design (set aside while the cluster view is shown)"""
+        return self.history if self.cluster_view is None else self.flat_state[5]
+        
+    def saved_design(self):
+        """Blocks and connections to write to the project, and the ids changed since the last write
+
+        In cluster view this is the flat design with the super-block moves
+        applied to a copy, so saving never records an undo entry.
+        """
+        changed = self.flat_history().dirty_ids()
+        if self.cluster_view is None:
+            return self.blocks, self.connections, changed
+        blocks, moved = self.cluster_view.written_back()
+        return blocks, self.flat_state[1], np.union1d(changed, moved)
+        
+    def upload_csv(self):
+        """Pick a CSV and load it in the background"""
+        if self.task is not None:
+            return
+        filename = filedialog.askopenfilename(
+            title="Select CSV file",
+            filetypes=[("CSV files", "*.csv"), ("Edge lists", "*.edges *.txt"), ("All files", "*.*")]
+        )
+        if not filename:
+            return
+            
+        def work(progress):
+            # Stream the matrix (or edge list) into a sparse netlist, or reuse
+            # the cached parse when the file has not changed since
+            with span('load.read'):
+                netlist = self.netlist_cache.read(filename, progress=lambda fraction: progress(fraction * 0.8,
+                                                                                                "Reading"))
+            progress(0.8, "Building blocks")
+            with span('load.stores'):
+                blocks = BlockStore.from_netlist(netlist)
+                connections = NetStore.from_netlist(netlist, blocks)
+                # Free-form outlines from <name>.outlines.csv next to the file
+                load_outlines(filename, blocks)
+            with span('load.index'):
+                spatial_index = SpatialGrid()
+                spatial_index.build(blocks)
+            progress(0.9, "Scoring")
+            with span('load.nets'):
+                net_index = NetIndex(connections, len(blocks))
+            with span('load.metrics'):
+                metrics = MetricsEngine(blocks, connections, net_index)
+            with span('load.legality'):
+                legality = LegalityChecker(blocks)
+            with span('load.overview'):
+                density = DensityTiles(blocks, connections, net_index)
+            return blocks, connections, spatial_index, metrics, legality, net_index, density
+            
+        def done(outcome):
+            def finished():
+                self.task_finished()
+                messagebox.showinfo("Success", f"Loaded {len(self.blocks)} hardmacros with "
+                                               f"{len(self.connections)} connections")
                 
-            # Process data
-            self.process_adjacency_matrix(adjacency_matrix)
+            self.forget_project()
+            apply_in_batches(self.root, [lambda: self.set_design(*outcome), self.update_info, self.update_plot,
+                                         self.update_properties, self.update_connections], on_done=finished)
             
-            # Update UI
-            self.update_info()
-            self.update_plot()
-            self.update_properties()
-            self.update_connections()
+        def failed(error):
+            self.task_finished()
+            messagebox.showerror("Error", f"Failed to load CSV: {str(error)}")
+            
+        self.start_task(f"Loading {os.path.basename(filename)}", work, done, failed)
+        
+    def start_task(self, title, work, on_done, on_error=None):
+        """Run work(progress) on a worker thread with progress and cancel in the toolbar"""
+        def on_error_default(error):
+            self.task_finished()
+            messagebox.showerror(title, f"{title} failed: {str(error)}")
             
-            messagebox.showinfo("Success", f"Loaded {len(self.blocks)} hardmacros with {len(self.connections)} connections")
+        self.task = BackgroundTask(self.root, work, on_done, on_error=on_error or on_error_default,
+                                   on_progress=self.show_progress, on_cancelled=self.task_finished)
+        self.task_title = title
+        self.show_progress(0.0, "")
+        self.task_frame.pack(side=tk.LEFT, padx=(10, 0))
+        for button in (self.upload_btn, self.open_btn, self.autoplace_btn, self.legalize_btn, self.cluster_btn):
+            button.config(state=tk.DISABLED)
+        self.task.start()
+        
+    def show_progress(self, fraction, message):
+        self.task_progress['value'] = fraction
+        self.task_label.config(text=f"{self.task_title}: {message}" if message else self.task_title)
+        
+    def cancel_task(self):
+        """Stop the running task at its next progress report"""
+        if self.task is not None:
+            self.task.cancel()
+            self.task_label.config(text=f"{self.task_title}: cancelling")
             
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load CSV: {str(e)}")
+    def task_finished(self):
+        """Back to idle after a task completed, failed or was cancelled"""
+        self.task = None
+        self.task_frame.pack_forget()
+        for button in (self.upload_btn, self.open_btn, self.autoplace_btn, self.legalize_btn, self.cluster_btn):
+            button.config(state=tk.NORMAL)
+            
+    def toggle_profiling(self, cprofile=False):
+        """Start or stop recording timing spans (and cProfile) with the frame overlay"""
+        if PROFILER.enabled:
+            PROFILER.disable()
+            self.profile_overlay.hide()
+            logger.info("profiling stopped: %s", PROFILER.summary())
+        else:
+            PROFILER.reset()
+            PROFILER.enable(cprofile=cprofile)
+            self.profile_overlay.show()
+            
+    def save_profile(self):
+        """Save the recorded session as a Chrome trace or cProfile statistics"""
+        filename = filedialog.asksaveasfilename(
+            title="Save profile", defaultextension=".json",
+            filetypes=[("Chrome trace", "*.json"), ("cProfile statistics", "*.prof")]
+        )
+        if not filename:
+            return
+        try:
+            PROFILER.dump(filename)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Save Profile", f"Failed to save profile: {str(e)}")
             
     def process_adjacency_matrix(self, matrix):
-        """Process adjacency matrix into blocks and connections"""
-        self.blocks = []
-        self.connections = []
-        
-        for i in range(len(matrix)):
-            # Create block
-            area = matrix[i][i]
-            side_length = np.sqrt(area)
-            
-            block = {
-                'id': i,
-                'name': self.hardmacro_names[i],
-                'area': area,
-                'width': side_length,
-                'height': side_length,
-                'x': 100 + (i % 3) * 200,
-                'y': 100 + (i // 3) * 200,
-                'shape_type': 'rectangle'  # Default shape type
-            }
-            self.blocks.append(block)
-            
-        # Find connections
-        for i in range(len(matrix)):
-            for j in range(i+1, len(matrix)):
-                if matrix[i][j] > 0:
-                    connection = {
-                        'from': i,
-                        'to': j,
-                        'from_name': self.hardmacro_names[i],
-                        'to_name': self.hardmacro_names[j],
-                        'connections': matrix[i][j]
-                    }
-                    self.connections.append(connection)
+        """Process a dense adjacency matrix into blocks and connections"""
+        self.load_netlist(netlist_from_matrix(self.hardmacro_names, matrix))
+        
+    def load_netlist(self, netlist):
+        """Create blocks and connections from a sparse netlist"""
+        # Square blocks on the default grid, nets share the block name table
+        blocks = BlockStore.from_netlist(netlist)
+        self.forget_project()
+        self.set_design(blocks, NetStore.from_netlist(netlist, blocks))
+        
+    def forget_project(self):
+        """A new netlist replaces the design: stop autosaving and drop the pending changes"""
+        self.project_path = None
+        self.dirty_nets.clear()
+        self.flat_history().clear_dirty()
+        
+    def set_design(self, blocks, connections, spatial_index=None, metrics=None, legality=None, net_index=None,
+                   density=None):
+        """Make a block and connection store the current design
+
+        The spatial index, metrics, legality checker, net index and minimap
+        tiles are built here unless they were already built (e.g. on a
+        worker thread).
+        """
+        self.selected_block = None
+        self.hover_handle = None
+        
+        self.blocks = blocks
+        self.connections = connections
+        self.hardmacro_names = self.blocks.names
+        self.cluster_view = None
+        self.flat_state = None
+        self.cluster_btn.config(text="Cluster")
+        self.dragged_ids = set()
+            
+        if spatial_index is None:
+            spatial_index = SpatialGrid()
+            spatial_index.build(self.blocks)
+        self.spatial_index = spatial_index
+        self.net_index = net_index if net_index is not None else NetIndex(self.connections, len(self.blocks))
+        self.metrics = metrics if metrics is not None else MetricsEngine(self.blocks, self.connections,
+                                                                         self.net_index)
+        self.legality = legality if legality is not None else LegalityChecker(self.blocks)
+        self.density = density if density is not None else DensityTiles(self.blocks, self.connections,
+                                                                        self.net_index)
+        if self.overview is not None:
+            self.overview.set_tiles(self.density)
+        self.history = EditHistory(self.blocks)
+        self.update_history_buttons()
+        
+    def design_loaded(self):
+        """Refresh every view after a new design was loaded"""
+        self.update_info()
+        self.update_plot()
+        self.update_properties()
+        self.update_connections()
+        
+    def open_project(self):
+        """Open a saved project with its placement"""
+        filename = filedialog.askopenfilename(
+            title="Open project",
+            filetypes=[("Floorplan projects", f"*{PROJECT_EXTENSION}"), ("All files", "*.*")]
+        )
+        if not filename:
+            return
+        try:
+            blocks, connections = load_project(filename)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Error", f"Failed to open project: {str(e)}")
+            return
+        self.set_design(blocks, connections)
+        self.project_path = filename
+        self.dirty_nets.clear()
+        self.design_loaded()
+        
+    def save_project(self):
+        """Save the design and placement to a project file (autosaved from then on)"""
+        if not self.blocks:
+            messagebox.showinfo("Save Project", "Upload a CSV first")
+            return
+        filename = filedialog.asksaveasfilename(
+            title="Save project", defaultextension=PROJECT_EXTENSION,
+            initialfile=os.path.basename(self.project_path) if self.project_path else None,
+            filetypes=[("Floorplan projects", f"*{PROJECT_EXTENSION}")]
+        )
+        if not filename:
+            return
+        try:
+            blocks, connections, _ = self.saved_design()
+            save_project(filename, blocks, connections)
+        except OSError as e:
+            messagebox.showerror("Error", f"Failed to save project: {str(e)}")
+            return
+        self.project_path = filename
+        self.flat_history().clear_dirty()
+        self.dirty_nets.clear()
+        
+    def autosave(self):
+        """Write the blocks and weights changed since the last save into the open project"""
+        self.root.after(AUTOSAVE_MS, self.autosave)
+        if self.project_path is None or not self.blocks or self.dragging:
+            return
+        blocks, connections, ids = self.saved_design()
+        nets = sorted(self.dirty_nets)
+        try:
+            written = autosave_project(self.project_path, blocks, connections, ids, nets)
+        except OSError:
+            logger.exception("autosave of %s failed", self.project_path)
+            return
+        self.flat_history().clear_dirty(ids)
+        self.dirty_nets.difference_update(nets)
+        if written:
+            logger.debug("autosaved %d blocks to %s", written, self.project_path)
+        
+    @timed('update')
+    def block_changed(self, block):
+        """Refresh the derived indexes and scores after a block's geometry changed"""
+        self.spatial_index.update(block)
+        self.metrics.update_block(block['id'])
+        self.legality.update_block(block['id'])
+        self.density.update_block(block['id'])
+        if self.renderer is not None:
+            self.renderer.set_violations(self.legality.violators())
+        # The minimap catches up once a drag is released
+        if self.overview is not None and not self.dragging:
+            self.overview.refresh()
+        self.update_info()
                     
     def update_info(self):
         """Update info label"""
         if self.blocks:
-            self.info_label.config(text=f"Blocks: {len(self.blocks)} | Connections: {len(self.connections)}")
+            text = (f"Blocks: {len(self.blocks)} | Connections: {len(self.connections)} | "
+                    f"{self.metrics.summary()} | {self.legality.summary()}")
+            if self.selected_block is not None:
+                text += f" | {self.fanout_summary(self.selected_block['id'])}"
+            self.info_label.config(text=text)
         else:
             self.info_label.config(text="No data loaded")
             
-    def update_plot(self):
-        """Update the floorplan visualization with improved handles"""
-        self.ax.clear()
+    def fanout_summary(self, block_id):
+        """One line on a block's nets and its strongest neighbours"""
+        fanout = self.net_index.fanout(block_id)
+        ids, weights = self.net_index.strongest(block_id, k=FANOUT_NEIGHBOURS)
+        text = f"{self.blocks.names[block_id]}: {fanout['nets']} nets to {fanout['neighbours']} blocks"
+        if len(ids):
+            text += ", strongest " + ", ".join(f"{self.blocks.names[i]} ({w:g})"
+                                               for i, w in zip(ids.tolist(), weights.tolist()))
+        return text
         
-        if not self.blocks:
-            self.ax.text(0.5, 0.5, 'Upload CSV to see floorplan', 
-                        ha='center', va='center', transform=self.ax.transAxes)
-            self.canvas.draw()
+    @timed('update_plot')
+    def update_plot(self, keep_view=None):
+        """Rebuild the floorplan visualization with improved handles"""
+        if self.canvas is None and not self.blocks:
+            # Nothing to draw yet: keep the placeholder instead of paying for a Figure
             return
-            
-        # Draw blocks with improved handles
-        for i, block in enumerate(self.blocks):
-            # Determine color based on selection
-            if block == self.selected_block:
-                facecolor = 'lightcoral'
-                edgecolor = 'red'
-                linewidth = 3
-            else:
-                facecolor = 'lightblue'
-                edgecolor = 'blue'
-                linewidth = 2
-                
-            # Draw main rectangle
-            rect = plt.Rectangle((block['x'], block['y']), 
-                               block['width'], block['height'],
-                               linewidth=linewidth, edgecolor=edgecolor, 
-                               facecolor=facecolor, alpha=0.7)
-            self.ax.add_patch(rect)
-            
-            # Draw improved handles for selected block
-            if block == self.selected_block and self.interactive_var.get():
-                self.draw_improved_handles(block)
-            
-            # Add label with area info
-            area_text = f"{block['name']}\n{int(block['area'])} μm²\n{int(block['width'])}×{int(block['height'])}"
-            self.ax.text(block['x'] + block['width']/2, 
-                        block['y'] + block['height']/2,
-                        area_text,
-                        ha='center', va='center', fontsize=8, weight='bold')
-                        
-        # Draw connections
-        for conn in self.connections:
-            from_block = self.blocks[conn['from']]
-            to_block = self.blocks[conn['to']]
-            
-            x1 = from_block['x'] + from_block['width']/2
-            y1 = from_block['y'] + from_block['height']/2
-            x2 = to_block['x'] + to_block['width']/2
-            y2 = to_block['y'] + to_block['height']/2
-            
-            self.ax.plot([x1, x2], [y1, y2], 'r--', linewidth=1, alpha=0.7)
-            
-            # Add connection count
-            mid_x = (x1 + x2) / 2
-            mid_y = (y1 + y2) / 2
-            self.ax.text(mid_x, mid_y, str(conn['connections']), 
-                        ha='center', va='center', fontsize=8,
-                        bbox=dict(boxstyle="round,pad=0.3", facecolor="white", alpha=0.8))
-                        
-        self.ax.set_xlabel('X Position (μm)')
-        self.ax.set_ylabel('Y Position (μm)')
-        self.ax.set_title('Interactive Floorplan Visualization - Version 2.0')
-        self.ax.grid(True, alpha=0.3)
-        self.ax.set_aspect('equal')
-        
-        self.canvas.draw()
-        
-    def draw_improved_handles(self, block):
-        """Draw improved resize handles with better visibility"""
-        corner_size = self.handle_config['corner_size']
-        edge_width = self.handle_config['edge_width']
-        edge_height = self.handle_config['edge_height']
-        colors = self.handle_config['colors']
-        
-        # Corner handles (all four corners)
-        corners = [
-            (block['x'] + block['width'] - corner_size, block['y'] + block['height'] - corner_size),  # Top-right
-            (block['x'] + block['width'] - corner_size, block['y']),                                  # Bottom-right
-            (block['x'], block['y'] + block['height'] - corner_size),                                 # Top-left
-            (block['x'], block['y'])                                                                   # Bottom-left
-        ]
-        
-        for i, (cx, cy) in enumerate(corners):
-            # Determine color based on hover state
-            handle_id = f'corner_{i}'
-            if self.hover_handle == handle_id:
-                color = colors['hover']
-            else:
-                color = colors['corner']
-                
-            handle = plt.Rectangle((cx, cy), corner_size, corner_size,
-                                 linewidth=2, edgecolor='black',
-                                 facecolor=color, alpha=0.9)
-            self.ax.add_patch(handle)
-        
-        # Edge handles (right and bottom edges)
-        edge_handles = [
-            # Right edge
-            (block['x'] + block['width'] - edge_width, block['y'] + (block['height'] - edge_height)/2, edge_width, edge_height),
-            # Bottom edge
-            (block['x'] + (block['width'] - edge_width)/2, block['y'] + block['height'] - edge_height, edge_width, edge_height)
-        ]
-        
-        edge_ids = ['edge_right', 'edge_bottom']
-        
-        for i, (ex, ey, ew, eh) in enumerate(edge_handles):
-            # Determine color based on hover state
-            handle_id = edge_ids[i]
-            if self.hover_handle == handle_id:
-                color = colors['hover']
-            else:
-                color = colors['edge']
-                
-            handle = plt.Rectangle((ex, ey), ew, eh,
-                                 linewidth=2, edgecolor='black',
-                                 facecolor=color, alpha=0.9)
-            self.ax.add_patch(handle)
+        self.ensure_canvas()
+        self.renderer.rebuild(self.blocks, self.connections, self.selected_block,
+                              self.hover_handle, self.interactive_var.get(),
+                              self.legality.violators() if self.blocks else None, keep_view,
+                              self.net_index)
+        self.overview.refresh()
         
     def update_properties(self):
-        """Update properties tab"""
-        # Clear existing widgets
-        for widget in self.properties_container.winfo_children():
-            widget.destroy()
-            
-        if not self.blocks:
-            ttk.Label(self.properties_container, text="No blocks loaded").pack(pady=20)
-            return
-            
-        # Create property editors for each block
-        for i, block in enumerate(self.blocks):
-            frame = ttk.LabelFrame(self.properties_container, text=f"Block {i+1}: {block['name']}")
-            frame.pack(fill=tk.X, padx=5, pady=5)
-            
-            # Area
-            ttk.Label(frame, text="Area (μm²):").grid(row=0, column=0, sticky=tk.W, padx=5, pady=2)
-            area_var = tk.StringVar(value=str(int(block['area'])))
-            area_entry = ttk.Entry(frame, textvariable=area_var, width=15)
-            area_entry.grid(row=0, column=1, padx=5, pady=2)
-            
-            # Width
-            ttk.Label(frame, text="Width (μm):").grid(row=1, column=0, sticky=tk.W, padx=5, pady=2)
-            width_var = tk.StringVar(value=str(int(block['width'])))
-            width_entry = ttk.Entry(frame, textvariable=width_var, width=15)
-            width_entry.grid(row=1, column=1, padx=5, pady=2)
-            
-            # Height
-            ttk.Label(frame, text="Height (μm):").grid(row=2, column=0, sticky=tk.W, padx=5, pady=2)
-            height_var = tk.StringVar(value=str(int(block['height'])))
-            height_entry = ttk.Entry(frame, textvariable=height_var, width=15)
-            height_entry.grid(row=2, column=1, padx=5, pady=2)
-            
-            # Position
-            ttk.Label(frame, text="X Position:").grid(row=3, column=0, sticky=tk.W, padx=5, pady=2)
-            x_var = tk.StringVar(value=str(int(block['x'])))
-            x_entry = ttk.Entry(frame, textvariable=x_var, width=15)
-            x_entry.grid(row=3, column=1, padx=5, pady=2)
-            
-            ttk.Label(frame, text="Y Position:").grid(row=4, column=0, sticky=tk.W, padx=5, pady=2)
-            y_var = tk.StringVar(value=str(int(block['y'])))
-            y_entry = ttk.Entry(frame, textvariable=y_var, width=15)
-            y_entry.grid(row=4, column=1, padx=5, pady=2)
-            
-            # Update button
-            def update_block(block_id=block['id'], area_var=area_var, width_var=width_var, 
-                           height_var=height_var, x_var=x_var, y_var=y_var):
-                try:
-                    block['area'] = float(area_var.get())
-                    block['width'] = float(width_var.get())
-                    block['height'] = float(height_var.get())
-                    block['x'] = float(x_var.get())
-                    block['y'] = float(y_var.get())
-                    self.update_plot()
-                except ValueError:
-                    messagebox.showerror("Error", "Please enter valid numbers")
-                    
-            ttk.Button(frame, text="Update", command=update_block).grid(row=5, column=0, columnspan=2, pady=5)
-            
+        """Show the current blocks in the properties table"""
+        self.properties_table.set_model(BlockTableModel(self.blocks) if self.blocks else None)
+        
     def update_connections(self):
-        """Update connections tab"""
-        # Clear existing widgets
-        for widget in self.connections_container.winfo_children():
-            widget.destroy()
-            
-        if not self.connections:
-            ttk.Label(self.connections_container, text="No connections loaded").pack(pady=20)
+        """Show the current connections in the connections table"""
+        self.connections_table.set_model(NetTableModel(self.connections) if self.connections else None)
+        
+    def before_block_edit(self, block_id, key):
+        """A properties cell is about to be written: start an undo entry (refused while a task runs)"""
+        if self.task is not None:
+            return False
+        self.history.begin([block_id])
+        return True
+        
+    def before_connection_edit(self, net_id, key):
+        """A connection weight is about to be written (refused while a task runs)"""
+        return self.task is None
+        
+    def on_block_edited(self, block_id, key):
+        """A cell of the properties table was edited"""
+        self.history.commit(f"Edit {key}")
+        self.update_history_buttons()
+        self.block_changed(self.blocks[block_id])
+        self.update_plot()
+        
+    def on_connection_edited(self, net_id, key):
+        """A connection weight was edited"""
+        self.net_index.weight_changed(net_id)
+        self.density.update_net(net_id)
+        if self.cluster_view is None:
+            self.dirty_nets.add(net_id)
+        self.update_info()
+        self.update_plot()
+        
+    def undo(self):
+        """Revert the last geometry edit"""
+        if self.dragging or self.task is not None or not self.history.can_undo():
             return
-            
-        # Create connection list
-        for i, conn in enumerate(self.connections):
-            frame = ttk.Frame(self.connections_container)
-            frame.pack(fill=tk.X, padx=5, pady=2)
-            
-            ttk.Label(frame, text=f"{conn['from_name']} ↔ {conn['to_name']}", 
-                     font=('Arial', 10, 'bold')).pack(anchor=tk.W)
-            ttk.Label(frame, text=f"Connections: {conn['connections']}", 
-                     font=('Arial', 9)).pack(anchor=tk.W)
-            
-            ttk.Separator(frame, orient='horizontal').pack(fill=tk.X, pady=2)
+        self.history_changed(self.history.undo())
+        
+    def redo(self):
+        """Reapply the last undone geometry edit"""
+        if self.dragging or self.task is not None or not self.history.can_redo():
+            return
+        self.history_changed(self.history.redo())
+        
+    def history_changed(self, changed):
+        """Bring the derived data and views up to date after undo/redo"""
+        if len(changed) > REBUILD_FRACTION * len(self.blocks):
+            self.spatial_index.build(self.blocks)
+            self.metrics.rebuild()
+            self.legality.rebuild()
+            self.density.rebuild()
+        else:
+            for block_id in changed.tolist():
+                self.spatial_index.update(self.blocks[block_id])
+                self.metrics.update_block(block_id)
+                self.legality.update_block(block_id)
+                self.density.update_block(block_id)
+        self.update_info()
+        self.update_plot()
+        self.properties_table.refresh()
+        self.update_history_buttons()
+        
+    def update_history_buttons(self):
+        """Enable undo/redo and name the edit each would apply"""
+        undo, redo = self.history.undo_label(), self.history.redo_label()
+        self.undo_btn.config(text=f"Undo {undo}" if undo else "Undo", state=tk.NORMAL if undo else tk.DISABLED)
+        self.redo_btn.config(text=f"Redo {redo}" if redo else "Redo", state=tk.NORMAL if redo else tk.DISABLED)
 
 def main():
     root = tk.Tk()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Floorplanning Tool - Mouse event pipeline
+Coalesces motion events into frames paced with root.after
+"""
+
+import math
+import time
+from collections import deque
+
+# Target time between frames (60 fps)
+FRAME_BUDGET = 1 / 60
+
+# Recent frames kept for the latency percentiles
+LATENCY_WINDOW = 600
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of a sequence (0 when empty)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(q / 100 * len(ordered)) - 1))]
+
+
+class MotionCoalescer:
+    """Latest-wins motion handling paced to a frame budget
+
+    Motion events only record themselves. A frame scheduled with
+    root.after hands the newest event to the handler, so however fast the
+    events arrive the handler runs at most once per frame budget and always
+    sees the current cursor position. Counters:
+
+    - coalesced: events replaced by a newer one before their frame ran
+    - dropped: events the handler could not use (it returned False,
+      e.g. the cursor was outside the axes)
+    - latency: time from the first event of a frame arriving to the end
+      of that frame's work
+    """
+
+    def __init__(self, root, handler, budget=FRAME_BUDGET, clock=time.perf_counter):
+        self.root = root
+        self.handler = handler
+        self.budget = budget
+        self.clock = clock
+        self.pending = None
+        self.pending_since = None
+        self.after_id = None
+        self.last_frame = -math.inf
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.received = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.frames = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.frame_times = deque(maxlen=LATENCY_WINDOW)
+
+    def submit(self, event, stamp=None):
+        """Record a motion event and make sure a frame is scheduled"""
+        self.received += 1
+        if self.pending is not None:
+            self.coalesced += 1
+        else:
+            self.pending_since = self.clock() if stamp is None else stamp
+        self.pending = event
+
+        if self.after_id is None:
+            wait = max(0.0, self.last_frame + self.budget - self.clock())
+            self.after_id = self.root.after(int(wait * 1000), self._frame)
+
+    def flush(self):
+        """Run the pending frame now (before a press or release is handled)"""
+        if self.after_id is not None:
+            self.root.after_cancel(self.after_id)
+        self._frame()
+
+    def _frame(self):
+        self.after_id = None
+        event, self.pending = self.pending, None
+        if event is None:
+            return
+
+        start = self.last_frame = self.clock()
+        if self.handler(event) is False:
+            self.dropped += 1
+            return
+        end = self.clock()
+        self.frames += 1
+        self.frame_times.append(end - start)
+        self.latencies.append(end - self.pending_since)
+
+    def stats(self):
+        """Counters and recent latency / frame-time percentiles in milliseconds"""
+        return {
+            'received': self.received,
+            'frames': self.frames,
+            'coalesced': self.coalesced,
+            'dropped': self.dropped,
+            'latency_p50_ms': percentile(self.latencies, 50) * 1e3,
+            'latency_p99_ms': percentile(self.latencies, 99) * 1e3,
+            'frame_p50_ms': percentile(self.frame_times, 50) * 1e3,
+            'frame_max_ms': max(self.frame_times, default=0.0) * 1e3,
+        }
+
+    def summary(self):
+        """One-line summary for the log"""
+        s = self.stats()
+        return (f"{s['received']} motion events -> {s['frames']} frames "
+                f"({s['coalesced']} coalesced, {s['dropped']} dropped), "
+                f"latency p50 {s['latency_p50_ms']:.1f} ms / p99 {s['latency_p99_ms']:.1f} ms, "
+                f"frame p50 {s['frame_p50_ms']:.1f} ms / max {s['frame_max_ms']:.1f} ms")
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Floorplanning Tool - Connection index
+CSR block-to-net index for per-block net queries, neighbours and fan-out
+"""
+
+import numpy as np
+
+
+class NetIndex:
+    """Block -> incident nets in CSR form, with the far ends and weights alongside
+
+    Slots offsets[b]:offsets[b + 1] hold block b's nets, the block at each
+    net's other end and its weight, so every per-block query costs
+    O(degree) instead of a scan of all connections. Each net fills two
+    slots, one per end; slots[net] finds them, so a weight edit updates two
+    entries and two weighted degrees instead of rebuilding the index.
+    """
+
+    def __init__(self, connections, n):
+        src = np.asarray(connections.src, dtype=np.int64)
+        dst = np.asarray(connections.dst, dtype=np.int64)
+        weights = np.asarray(connections.weights, dtype=np.float64)
+        m = len(src)
+        self.connections = connections
+
+        # Both ends of every net, sorted by block (the incident_index order)
+        ends = np.concatenate([src, dst])
+        order = np.argsort(ends, kind='stable')
+        self.net_ids = order % max(m, 1)
+        self.neighbours = np.concatenate([dst, src])[order]
+        self.weights = weights[self.net_ids]
+        self.offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(ends, minlength=n), out=self.offsets[1:])
+
+        # Slot of each net's source end (column 0) and target end (column 1)
+        position = np.empty(2 * m, dtype=np.int64)
+        position[order] = np.arange(2 * m)
+        self.slots = position.reshape(2, m).T
+
+        self.degree = np.diff(self.offsets)
+        self.weighted_degree = np.bincount(ends, np.concatenate([weights, weights]), minlength=n)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def nets(self, block_id):
+        """Ids of the nets touching a block"""
+        return self.net_ids[self.offsets[block_id]:self.offsets[block_id + 1]]
+
+    def neighbours_of(self, block_id):
+        """(far-end block ids, weights) of a block's nets, one entry per net"""
+        start, end = self.offsets[block_id], self.offsets[block_id + 1]
+        return self.neighbours[start:end], self.weights[start:end]
+
+    def strongest(self, block_id, k=5):
+        """Up to k neighbours with the largest total weight to the block, heaviest first
+
+        Parallel nets to the same neighbour are summed. Returns (ids, weights).
+        """
+        neighbours, weights = self.neighbours_of(block_id)
+        if len(neighbours) == 0:
+            return neighbours, weights
+        ids, inverse = np.unique(neighbours, return_inverse=True)
+        totals = np.bincount(inverse, weights=weights, minlength=len(ids))
+        if len(ids) > k:
+            top = np.argpartition(totals, len(ids) - k)[len(ids) - k:]
+            ids, totals = ids[top], totals[top]
+        order = np.argsort(-totals, kind='stable')
+        return ids[order], totals[order]
+
+    def fanout(self, block_id):
+        """Net count, distinct neighbours, total and largest weight of one block"""
+        neighbours, weights = self.neighbours_of(block_id)
+        return {
+            'nets': len(neighbours),
+            'neighbours': len(np.unique(neighbours)),
+            'weight': float(weights.sum()),
+            'max_weight': float(weights.max()) if len(weights) else 0.0,
+        }
+
+    def fanout_stats(self):
+        """Fan-out over the whole design: mean / p50 / p99 / max degree and isolated blocks"""
+        degree = self.degree
+        p50, p99 = np.quantile(degree, [0.5, 0.99], method='inverted_cdf') if len(degree) else (0, 0)
+        return {
+            'mean': float(degree.mean()) if len(degree) else 0.0,
+            'p50': int(p50),
+            'p99': int(p99),
+            'max': int(degree.max()) if len(degree) else 0,
+            'isolated': int(np.count_nonzero(degree == 0)),
+            'hub': int(np.argmax(self.weighted_degree)) if len(degree) else None,
+        }
+
+    def weight_changed(self, net_id):
+        """Pick up a net's new weight from the connection store in O(1)"""
+        weight = float(self.connections.weights[net_id])
+        slots = self.slots[net_id]
+        delta = weight - self.weights[slots[0]]
+        self.weights[slots] = weight
+        self.weighted_degree[self.neighbours[slots]] += delta
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Floorplanning Tool - Undo/redo history
+Journal of per-block geometry deltas with periodic array snapshots
+"""
+
+from contextlib import contextmanager
+
+import numpy as np
+
+from floorplan_store import BlockStore
+
+# Most entries kept before the oldest are evicted
+HISTORY_LIMIT = 500
+
+# Memory budget for entries plus snapshots
+HISTORY_BYTES = 64 * 1024 * 1024
+
+# A full snapshot of the geometry arrays is taken every this many entries
+SNAPSHOT_EVERY = 50
+
+
+def gather(blocks, ids):
+    """Geometry of some blocks as a (k, len(FIELDS)) array in FIELDS order plus shape codes"""
+    geometry = np.column_stack([getattr(blocks, key)[ids] for key in BlockStore.FIELDS])
+    return geometry, blocks.shape_code[ids]
+
+
+def scatter(blocks, ids, geometry, shapes):
+    """Write gathered geometry back; with repeated ids the last row wins"""
+    for k, key in enumerate(BlockStore.FIELDS):
+        getattr(blocks, key)[ids] = geometry[:, k]
+    blocks.shape_code[ids] = shapes
+
+
+class Delta:
+    """One history entry: the blocks an edit changed, before and after"""
+
+    __slots__ = ('label', 'ids', 'old', 'new', 'old_shapes', 'new_shapes')
+
+    def __init__(self, label, ids, old, new, old_shapes, new_shapes):
+        self.label = label
+        self.ids = ids
+        self.old = old
+        self.new = new
+        self.old_shapes = old_shapes
+        self.new_shapes = new_shapes
+
+    def __len__(self):
+        return len(self.ids)
+
+    def nbytes(self):
+        arrays = (self.ids, self.old, self.new, self.old_shapes, self.new_shapes)
+        return sum(a.nbytes for a in arrays)
+
+
+class EditHistory:
+    """Bounded undo/redo journal over a BlockStore
+
+    An edit is bracketed by begin(ids) and commit(label): begin copies the
+    geometry of the blocks that may change, commit compares it with the
+    current arrays and keeps only the rows that actually changed. A whole
+    drag is one begin/commit pair, so it undoes in one step however many
+    motion events it took.
+
+    Positions count committed entries from the start of the session. Every
+    SNAPSHOT_EVERY entries the full geometry arrays are copied; jump()
+    either replays the deltas in between (vectorized, one write per block)
+    or restores the nearest snapshot and replays from there, whichever
+    touches fewer rows. Entries and snapshots are evicted oldest first once
+    the entry limit or the byte budget is exceeded.
+
+    dirty flags every block a commit, undo or redo changed since the last
+    clear_dirty(), for writers that only save what changed.
+    """
+
+    def __init__(self, blocks, limit=HISTORY_LIMIT, max_bytes=HISTORY_BYTES, snapshot_every=SNAPSHOT_EVERY):
+        self.blocks = blocks
+        self.limit = limit
+        self.max_bytes = max_bytes
+        self.snapshot_every = snapshot_every
+        self.entries = []
+        self.base = 0        # position of the state before entries[0]
+        self.position = 0    # position of the current state
+        self.snapshots = {}  # position -> (geometry, shapes)
+        self.pending = None
+        self.dirty = np.zeros(len(blocks), dtype=bool)
+        self._bytes = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def can_undo(self):
+        return self.position > self.base
+
+    def can_redo(self):
+        return self.position < self.base + len(self.entries)
+
+    def undo_label(self):
+        return self.entries[self.position - self.base - 1].label if self.can_undo() else None
+
+    def redo_label(self):
+        return self.entries[self.position - self.base].label if self.can_redo() else None
+
+    def nbytes(self):
+        """Memory held by entries and snapshots"""
+        return self._bytes
+
+    def dirty_ids(self):
+        """Ids of the blocks changed since the last clear_dirty()"""
+        return np.flatnonzero(self.dirty)
+
+    def clear_dirty(self, ids=None):
+        """Mark blocks (None = all) as saved"""
+        self.dirty[slice(None) if ids is None else ids] = False
+
+    def begin(self, ids=None):
+        """Remember the geometry of the blocks an edit may change (None = all)"""
+        ids = np.arange(len(self.blocks)) if ids is None else np.asarray(ids, dtype=np.int64).ravel()
+        self.pending = (ids,) + gather(self.blocks, ids)
+
+    def cancel(self):
+        self.pending = None
+
+    def commit(self, label):
+        """Record what changed since begin(); returns the entry or None"""
+        if self.pending is None:
+            return None
+        ids, old, old_shapes = self.pending
+        self.pending = None
+        new, new_shapes = gather(self.blocks, ids)
+        changed = np.any(old != new, axis=1) | (old_shapes != new_shapes)
+        if not changed.any():
+            return None
+        entry = Delta(label, ids[changed], old[changed], new[changed], old_shapes[changed], new_shapes[changed])
+
+        # A new edit discards whatever could have been redone
+        redo = self.entries[self.position - self.base:]
+        self._bytes -= sum(e.nbytes() for e in redo)
+        del self.entries[self.position - self.base:]
+        for position in [p for p in self.snapshots if p > self.position]:
+            self._drop_snapshot(position)
+
+        self.dirty[entry.ids] = True
+        self.entries.append(entry)
+        self._bytes += entry.nbytes()
+        self.position += 1
+        if self.position % self.snapshot_every == 0:
+            geometry, shapes = gather(self.blocks, slice(None))
+            self.snapshots[self.position] = (geometry, shapes)
+            self._bytes += geometry.nbytes + shapes.nbytes
+        self._evict()
+        return entry
+
+    @contextmanager
+    def edit(self, label, ids=None):
+        """begin() before and commit() after the block, even if it raises"""
+        self.begin(ids)
+        try:
+            yield
+        finally:
+            self.commit(label)
+
+    def undo(self):
+        return self.jump(-1)
+
+    def redo(self):
+        return self.jump(1)
+
+    def jump(self, steps):
+        """Move steps entries back (negative) or forward; returns the changed block ids"""
+        self.pending = None
+        target = min(max(self.position + steps, self.base), self.base + len(self.entries))
+        if target == self.position:
+            return np.zeros(0, dtype=np.int64)
+
+        # Replay from wherever is cheapest: here or a snapshot
+        start, cost = self.position, self._replay_cost(self.position, target)
+        for position in self.snapshots:
+            snapshot_cost = len(self.blocks) + self._replay_cost(position, target)
+            if snapshot_cost < cost:
+                start, cost = position, snapshot_cost
+
+        if start == self.position:
+            changed = self._replay(start, target)
+        else:
+            before, before_shapes = gather(self.blocks, slice(None))
+            scatter(self.blocks, slice(None), *self.snapshots[start])
+            self._replay(start, target)
+            after, after_shapes = gather(self.blocks, slice(None))
+            changed = np.flatnonzero(np.any(before != after, axis=1) | (before_shapes != after_shapes))
+        self.dirty[changed] = True
+        self.position = target
+        return changed
+
+    def _replay_cost(self, start, stop):
+        lo, hi = sorted((start, stop))
+        return sum(len(e) for e in self.entries[lo - self.base:hi - self.base])
+
+    def _replay(self, start, stop):
+        """Apply the entries between two positions in one write per field"""
+        if start == stop:
+            return np.zeros(0, dtype=np.int64)
+        if stop < start:
+            # Undo: newest first, so the oldest 'old' value is written last and wins
+            entries = self.entries[stop - self.base:start - self.base][::-1]
+            rows = [(e.ids, e.old, e.old_shapes) for e in entries]
+        else:
+            entries = self.entries[start - self.base:stop - self.base]
+            rows = [(e.ids, e.new, e.new_shapes) for e in entries]
+        ids = np.concatenate([r[0] for r in rows])
+        scatter(self.blocks, ids, np.concatenate([r[1] for r in rows]), np.concatenate([r[2] for r in rows]))
+        return np.unique(ids)
+
+    def _drop_snapshot(self, position):
+        geometry, shapes = self.snapshots.pop(position)
+        self._bytes -= geometry.nbytes + shapes.nbytes
+
+    def _evict(self):
+        """Drop the oldest entries (and snapshots before them) until within bounds"""
+        while self.entries and (len(self.entries) > self.limit or self._bytes > self.max_bytes):
+            if self.position == self.base:
+                break
+            self._bytes -= self.entries.pop(0).nbytes()
+            self.base += 1
+            for position in [p for p in self.snapshots if p < self.base]:
+                self._drop_snapshot(position)
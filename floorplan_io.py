@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+Floorplanning Tool - Netlist loading
+Streams adjacency matrices and edge lists into a sparse netlist
+"""
+
+import csv
+import os
+from collections import namedtuple
+
+import numpy as np
+
+from floorplan_polygons import set_polygon
+from floorplan_profile import span, timed
+
+# Sparse netlist: block names and areas plus a COO edge list of the upper
+# triangle (src < dst) with one weight per connection
+Netlist = namedtuple('Netlist', ['names', 'areas', 'src', 'dst', 'weights'])
+
+# Cells per chunk when streaming a dense matrix (~8 MB of float64)
+CHUNK_CELLS = 1_000_000
+
+# Free-form block outlines for a netlist file are read from a file next to
+# it with this suffix in place of its extension (design.csv ->
+# design.outlines.csv)
+OUTLINES_SUFFIX = '.outlines.csv'
+
+
+def _integral(values):
+    """Cast to int64 when every value is a whole number (keeps labels like '50')"""
+    if values.size and np.all(np.isfinite(values)) and np.all(values == np.round(values)):
+        return values.astype(np.int64)
+    return values
+
+
+def _read_rows(path, count):
+    """First count CSV rows of a file"""
+    with open(path, newline='') as f:
+        return [row for _, row in zip(range(count), csv.reader(f))]
+
+
+def _read_header(path):
+    """First CSV row of a file"""
+    rows = _read_rows(path, 1)
+    return rows[0] if rows else []
+
+
+def detect_format(path):
+    """Guess whether a file is an adjacency matrix ('matrix') or an edge list ('edges')"""
+    lines = _read_rows(path, 3)
+    if not lines or not lines[0]:
+        raise ValueError("File is empty")
+    header = lines[0]
+    # Matrix headers start with the blank index-column label
+    if header[0].strip() == '':
+        return 'matrix'
+    if len(header) == 3:
+        # A 2-block matrix with a named index column ('name,A,B') labels its
+        # rows with the header's block names; an edge list's rows do not
+        labels = [row[0].strip() for row in lines[1:] if row]
+        if labels == [name.strip() for name in header[1:]]:
+            return 'matrix'
+        return 'edges'
+    return 'matrix'
+
+
+@timed('io.read_netlist')
+def read_netlist(path, fmt=None, progress=None):
+    """Load an adjacency matrix or edge list file into a Netlist
+
+    progress, if given, is called with the fraction read after each chunk
+    (it may raise to abandon the read).
+    """
+    fmt = fmt or detect_format(path)
+    if fmt == 'matrix':
+        return read_adjacency_csv(path, progress=progress)
+    if fmt == 'edges':
+        return read_edge_list(path, progress=progress)
+    raise ValueError(f"Unknown netlist format: {fmt}")
+
+
+def _split_row(line):
+    """Split a matrix row into its name and the text of each numeric cell"""
+    if line.startswith('"'):
+        fields = next(csv.reader([line]))
+        return fields[0], fields[1:]
+    fields = line.split(',')
+    return fields[0], fields[1:]
+
+
+def _parse_cells(name, cells, n):
+    """Values of a matrix row's cells; empty cells mean no connection (0)"""
+    if len(cells) != n:
+        raise ValueError(f"Row '{name.strip()}' has {len(cells)} values for {n} columns")
+    try:
+        return np.array(cells, dtype=np.float64)
+    except ValueError:
+        pass
+    cells = [cell if cell.strip() else '0' for cell in cells]
+    try:
+        return np.array(cells, dtype=np.float64)
+    except ValueError:
+        raise ValueError(f"Row '{name.strip()}' has a non-numeric value") from None
+
+
+def read_adjacency_csv(path, chunksize=None, progress=None):
+    """Stream a square adjacency-matrix CSV in row chunks
+
+    Rows are parsed one at a time into a fixed-size chunk buffer. The diagonal
+    becomes the block areas and the positive cells of the upper triangle
+    become the edge list, so the full matrix is never held in memory.
+    """
+    with open(path, newline='') as f:
+        header = next(csv.reader([f.readline()]), [])
+        names = [name.strip() for name in header[1:]]
+        n = len(names)
+        if chunksize is None:
+            chunksize = max(1, CHUNK_CELLS // max(n, 1))
+
+        row_names = []
+        areas = np.zeros(n, dtype=np.float64)
+        src_parts, dst_parts, weight_parts = [], [], []
+        buffer = np.empty((min(chunksize, max(n, 1)), n), dtype=np.float64)
+        offset = 0
+
+        while True:
+            # Fill the chunk buffer one row at a time
+            with span('io.parse_rows'):
+                count = 0
+                for line in f:
+                    line = line.rstrip('\r\n')
+                    if not line:
+                        continue
+                    if offset + count >= n:
+                        raise ValueError("Matrix must be square")
+                    name, cells = _split_row(line)
+                    buffer[count] = _parse_cells(name, cells, n)
+                    row_names.append(name.strip())
+                    count += 1
+                    if count == len(buffer):
+                        break
+            if count == 0:
+                break
+
+            with span('io.edges'):
+                values = buffer[:count]
+                rows = offset + np.arange(count)
+
+                # Diagonal holds the block areas
+                areas[rows] = values[np.arange(count), rows]
+
+                # Upper triangle only: columns right of the first row in the chunk,
+                # then drop the cells that are on or below the diagonal
+                r, c = np.nonzero(values[:, offset + 1:] > 0)
+                c = c + offset + 1
+                keep = c > rows[r]
+                src_parts.append(rows[r[keep]])
+                dst_parts.append(c[keep])
+                weight_parts.append(values[r[keep], c[keep]])
+
+            offset += count
+            if progress:
+                progress(offset / n)
+
+    if offset != n:
+        raise ValueError("Number of row names must match number of column names")
+
+    return Netlist(
+        names=row_names,
+        areas=_integral(areas),
+        src=np.concatenate(src_parts).astype(np.int32) if src_parts else np.zeros(0, np.int32),
+        dst=np.concatenate(dst_parts).astype(np.int32) if dst_parts else np.zeros(0, np.int32),
+        weights=_integral(np.concatenate(weight_parts)) if weight_parts else np.zeros(0, np.int64),
+    )
+
+
+def read_edge_list(path, chunksize=1_000_000, progress=None):
+    """Stream a 'name,name,weight' edge list without densifying it
+
+    A row connecting a block to itself sets that block's area. An optional
+    header row is skipped. Duplicate pairs (in either direction) are summed.
+    """
+    header = _read_header(path)
+    try:
+        float(header[2])
+        skiprows = 0
+    except (ValueError, IndexError):
+        skiprows = 1
+
+    import pandas as pd
+
+    index = {}
+    names = []
+    src_parts, dst_parts, weight_parts = [], [], []
+
+    # Read through our own handle so its position can report progress
+    with open(path, 'rb') as f:
+        size = max(1, os.fstat(f.fileno()).st_size)
+        reader = pd.read_csv(f, header=None, skiprows=skiprows, usecols=[0, 1, 2],
+                             names=['a', 'b', 'w'], dtype={'a': str, 'b': str, 'w': np.float64},
+                             skipinitialspace=True, chunksize=chunksize)
+        for chunk in reader:
+            # Intern names in order of first appearance
+            for name in pd.unique(np.concatenate([chunk['a'].to_numpy(), chunk['b'].to_numpy()])):
+                if name not in index:
+                    index[name] = len(names)
+                    names.append(name)
+            src_parts.append(chunk['a'].map(index).to_numpy(dtype=np.int64))
+            dst_parts.append(chunk['b'].map(index).to_numpy(dtype=np.int64))
+            weight_parts.append(chunk['w'].to_numpy())
+            if progress:
+                progress(f.tell() / size)
+
+    n = len(names)
+    src = np.concatenate(src_parts) if src_parts else np.zeros(0, np.int64)
+    dst = np.concatenate(dst_parts) if dst_parts else np.zeros(0, np.int64)
+    weights = np.concatenate(weight_parts) if weight_parts else np.zeros(0)
+
+    # Self-loops carry the areas
+    loops = src == dst
+    areas = np.full(n, np.nan)
+    areas[src[loops]] = weights[loops]
+    missing = np.flatnonzero(np.isnan(areas))
+    if missing.size:
+        sample = ', '.join(names[i] for i in missing[:5])
+        raise ValueError(f"Missing area for {missing.size} blocks: {sample}")
+
+    # Canonical upper-triangle pairs, duplicates summed
+    src, dst, weights = src[~loops], dst[~loops], weights[~loops]
+    lo, hi = np.minimum(src, dst), np.maximum(src, dst)
+    keys, inverse = np.unique(lo * n + hi, return_inverse=True)
+    summed = np.bincount(inverse, weights=weights, minlength=len(keys))
+    positive = summed > 0
+
+    return Netlist(
+        names=names,
+        areas=_integral(areas),
+        src=(keys[positive] // n).astype(np.int32),
+        dst=(keys[positive] % n).astype(np.int32),
+        weights=_integral(summed[positive]),
+    )
+
+
+def netlist_from_matrix(names, matrix):
+    """Build a Netlist from an in-memory dense adjacency matrix"""
+    matrix = np.asarray(matrix)
+    n = len(matrix)
+    if matrix.ndim != 2 or matrix.shape[1] != n:
+        raise ValueError("Matrix must be square")
+    src, dst = np.nonzero(np.triu(matrix, k=1) > 0)
+    return Netlist(
+        names=list(names),
+        areas=matrix[np.arange(n), np.arange(n)],
+        src=src.astype(np.int32),
+        dst=dst.astype(np.int32),
+        weights=matrix[src, dst],
+    )
+
+
+def read_outlines(path):
+    """Free-form block outlines from 'name,x,y' rows as {name: (xs, ys)}
+
+    Each row is one vertex; a block's vertices are listed in order around
+    its outline, in absolute coordinates. An optional header row is
+    skipped.
+    """
+    outlines = {}
+    with open(path, newline='') as f:
+        for number, row in enumerate(csv.reader(f), start=1):
+            if not row or not ''.join(row).strip():
+                continue
+            if len(row) != 3:
+                raise ValueError(f"Outline row {number} needs name,x,y")
+            name, x, y = (cell.strip() for cell in row)
+            try:
+                point = float(x), float(y)
+            except ValueError:
+                if number == 1:
+                    continue
+                raise ValueError(f"Outline row {number} ('{name}') has a non-numeric coordinate") from None
+            xs, ys = outlines.setdefault(name, ([], []))
+            xs.append(point[0])
+            ys.append(point[1])
+    return outlines
+
+
+def load_outlines(path, blocks):
+    """Give blocks the outlines of the file next to netlist path, if there is one
+
+    Outlined blocks become free-form polygons whose enclosed area replaces
+    their netlist area. Returns the number of blocks outlined.
+    """
+    outlines_path = os.path.splitext(path)[0] + OUTLINES_SUFFIX
+    if not os.path.exists(outlines_path):
+        return 0
+    outlines = read_outlines(outlines_path)
+    for name, (xs, ys) in outlines.items():
+        try:
+            i = blocks.names.index(name)
+        except KeyError:
+            raise ValueError(f"Outline for unknown block '{name}'") from None
+        try:
+            set_polygon(blocks, i, xs, ys)
+        except ValueError as e:
+            raise ValueError(f"Outline of '{name}': {e}") from None
+    return len(outlines)
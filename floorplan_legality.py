@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Floorplanning Tool - Legality
+Overlapping block pairs kept up to date while dragging, and a legalize pass
+"""
+
+import numpy as np
+
+from floorplan_metrics import overlapping_pairs
+from floorplan_polygons import RectangleCache, rectangles
+from floorplan_profile import timed
+
+# Overlaps thinner than this (μm) are rounding, not violations
+TOLERANCE = 1e-6
+
+# Legalize stops after this many push rounds even if overlaps remain
+LEGALIZE_ITERATIONS = 200
+
+# Rounds moving at most this many blocks test them one by one instead of
+# sorting every rectangle
+FEW_MOVED = 32
+
+
+def _piece_overlaps(rects, owner, pieces):
+    """Overlaps of the rectangles in pieces with those of other blocks as (p, q, area)"""
+    mine = rects[pieces]
+    if len(mine) == 0:
+        return np.zeros(0, np.int64), np.zeros(0, np.int64), np.zeros(0)
+
+    # The pieces' bounding box narrows the candidates to a handful
+    x0, y0 = mine[:, 0].min(), mine[:, 1].min()
+    x1, y1 = mine[:, 2].max(), mine[:, 3].max()
+    near = np.flatnonzero((rects[:, 0] < x1) & (rects[:, 2] > x0) & (rects[:, 1] < y1) & (rects[:, 3] > y0))
+    p = np.repeat(np.arange(len(mine)), len(near))
+    q = np.tile(near, len(mine))
+    w = np.minimum(mine[p, 2], rects[q, 2]) - np.maximum(mine[p, 0], rects[q, 0])
+    h = np.minimum(mine[p, 3], rects[q, 3]) - np.maximum(mine[p, 1], rects[q, 1])
+    hit = (w > TOLERANCE) & (h > TOLERANCE) & (owner[q] != owner[pieces][p])
+    return np.asarray(pieces)[p[hit]], q[hit], w[hit] * h[hit]
+
+
+def _pieces_against(rects, owner, pieces):
+    """Overlaps of many rectangles with those of other blocks as (p, q, area)
+
+    Rectangles no larger than a cell (twice the median extent) are hashed
+    by the cell of their lower-left corner, so two small ones can only
+    overlap when those cells are neighbours: each small piece looks in the
+    3×3 cells around its own. Oversized rectangles are tested against
+    everything directly.
+    """
+    extent = np.maximum(rects[:, 2] - rects[:, 0], rects[:, 3] - rects[:, 1])
+    cell = 2 * max(float(np.median(extent)), TOLERANCE)
+    large = extent > cell
+    ix = np.floor(rects[:, 0] / cell).astype(np.int64)
+    iy = np.floor(rects[:, 1] / cell).astype(np.int64)
+    ix -= ix.min() - 1
+    iy -= iy.min() - 1
+    stride = int(iy.max()) + 2
+    keys = ix * stride + iy
+
+    small = np.flatnonzero(~large)
+    order = small[np.argsort(keys[small], kind='stable')]
+    sorted_keys = keys[order]
+
+    # Small pieces: the small rectangles in the 3×3 neighbouring cells
+    mine = pieces[~large[pieces]]
+    offsets = (np.arange(-1, 2)[:, None] * stride + np.arange(-1, 2)).ravel()
+    wanted = (keys[mine][:, None] + offsets).ravel()
+    lo = np.searchsorted(sorted_keys, wanted, side='left')
+    counts = np.searchsorted(sorted_keys, wanted, side='right') - lo
+    p = [np.repeat(np.repeat(mine, len(offsets)), counts)]
+    q = [order[np.repeat(lo, counts) + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)]]
+
+    # Small pieces against large rectangles, large pieces against everything
+    big = np.flatnonzero(large)
+    p.append(np.repeat(mine, len(big)))
+    q.append(np.tile(big, len(mine)))
+    big_pieces = pieces[large[pieces]]
+    p.append(np.repeat(big_pieces, len(rects)))
+    q.append(np.tile(np.arange(len(rects)), len(big_pieces)))
+
+    p, q = np.concatenate(p), np.concatenate(q)
+    w = np.minimum(rects[p, 2], rects[q, 2]) - np.maximum(rects[p, 0], rects[q, 0])
+    h = np.minimum(rects[p, 3], rects[q, 3]) - np.maximum(rects[p, 1], rects[q, 1])
+    hit = (w > TOLERANCE) & (h > TOLERANCE) & (owner[p] != owner[q])
+    return p[hit], q[hit], w[hit] * h[hit]
+
+
+def _overlapping_pieces(rects, owner):
+    """Every pair of rectangles of different blocks overlapping by more than TOLERANCE"""
+    i, j, area = overlapping_pairs(rects, owner)
+    w = np.minimum(rects[i, 2], rects[j, 2]) - np.maximum(rects[i, 0], rects[j, 0])
+    h = np.minimum(rects[i, 3], rects[j, 3]) - np.maximum(rects[i, 1], rects[j, 1])
+    keep = (w > TOLERANCE) & (h > TOLERANCE)
+    return i[keep], j[keep], area[keep]
+
+
+def _block_pairs(owner, p, q, area, n):
+    """Piece overlaps summed per block pair as ((k, 2) sorted pairs, areas)"""
+    a, b = owner[p], owner[q]
+    keys = np.unique(np.minimum(a, b) * n + np.maximum(a, b), return_inverse=True)
+    unique, inverse = keys
+    return np.column_stack([unique // n, unique % n]), np.bincount(inverse, weights=area, minlength=len(unique))
+
+
+def find_overlaps(blocks):
+    """Every overlapping block pair as ((k, 2) ids i < j, overlap areas)"""
+    rects, owner = rectangles(blocks)
+    return _block_pairs(owner, *_overlapping_pieces(rects, owner), len(blocks))
+
+
+class LegalityChecker:
+    """Overlapping block pairs of a floorplan, updated one block at a time
+
+    A rebuild finds every pair with the grid sweep of overlapping_pairs.
+    update_block then drops the moved block's pairs and tests only its
+    covering rectangles against the others, so a drag frame costs one
+    vectorized pass over the rectangles rather than a new sweep.
+    """
+
+    def __init__(self, blocks):
+        self.blocks = blocks
+        self.rebuild()
+
+    @timed('legality.rebuild')
+    def rebuild(self):
+        """Find every overlap from scratch"""
+        blocks = self.blocks
+        self.pieces = RectangleCache(blocks)
+        rects, owner = self.pieces.rects, self.pieces.owner
+        self.pairs, self.areas = _block_pairs(owner, *_overlapping_pieces(rects, owner), len(blocks))
+        self.counts = np.bincount(self.pairs.ravel(), minlength=len(blocks))
+
+    def rebind(self, blocks):
+        """Follow another store with the same geometry, e.g. the live blocks a copy was checked on"""
+        self.blocks = blocks
+        self.pieces.rebind(blocks)
+
+    @timed('legality.update')
+    def update_block(self, block_id):
+        """Refresh the pairs of one block after it moved or changed shape"""
+        n = len(self.blocks)
+        rows = self.pieces.update(block_id)
+        rects, owner = self.pieces.rects, self.pieces.owner
+
+        old = (self.pairs[:, 0] == block_id) | (self.pairs[:, 1] == block_id)
+        if old.any():
+            np.subtract.at(self.counts, self.pairs[old].ravel(), 1)
+            self.pairs, self.areas = self.pairs[~old], self.areas[~old]
+
+        p, q, area = _piece_overlaps(rects, owner, np.arange(rows.start, rows.stop))
+        if len(p):
+            pairs, areas = _block_pairs(owner, p, q, area, n)
+            np.add.at(self.counts, pairs.ravel(), 1)
+            self.pairs = np.concatenate([self.pairs, pairs])
+            self.areas = np.concatenate([self.areas, areas])
+
+    def violators(self):
+        """Sorted ids of the blocks that overlap another block"""
+        return np.flatnonzero(self.counts)
+
+    def partners(self, block_id):
+        """Ids of the blocks overlapping a block"""
+        rows = self.pairs[(self.pairs[:, 0] == block_id) | (self.pairs[:, 1] == block_id)]
+        return np.sort(np.where(rows[:, 0] == block_id, rows[:, 1], rows[:, 0]))
+
+    def is_legal(self):
+        return len(self.pairs) == 0
+
+    def summary(self):
+        """One-line summary for the info label"""
+        if self.is_legal():
+            return "Legal"
+        return f"Overlapping: {len(self.pairs)} pairs, {len(self.violators())} blocks"
+
+
+def _pushes(bounds, area, a, b, n):
+    """Per-block displacement that separates each overlapping block pair
+
+    Of the four axis moves (right, left, up, down) that take one bounding
+    box clear of the other, the shortest is used; for shaped blocks this
+    also clears a block sitting in the other's notch, which piece-by-piece
+    pushes would bounce between the notch walls. The pair splits the move
+    in inverse proportion to block area, so large blocks stay nearly put,
+    and a block in several pairs takes only its longest push of the round,
+    so opposite pushes cannot cancel.
+    """
+    # Moves of a relative to b: right, left, up, down
+    needs = np.column_stack([bounds[b, 2] - bounds[a, 0], bounds[a, 2] - bounds[b, 0],
+                             bounds[b, 3] - bounds[a, 1], bounds[a, 3] - bounds[b, 1]])
+
+    side = np.argmin(needs, axis=1)
+    move = needs[np.arange(len(side)), side] + 10 * TOLERANCE
+    dx = np.select([side == 0, side == 1], [move, -move], 0.0)
+    dy = np.select([side == 2, side == 3], [move, -move], 0.0)
+    share = area[b] / (area[a] + area[b])
+
+    # Each block keeps its longest push
+    block = np.concatenate([a, b])
+    px = np.concatenate([dx * share, -dx * (1 - share)])
+    py = np.concatenate([dy * share, -dy * (1 - share)])
+    order = np.lexsort((-np.hypot(px, py), block))
+    first = order[np.r_[True, block[order][1:] != block[order][:-1]]]
+    out_x, out_y = np.zeros(n), np.zeros(n)
+    out_x[block[first]] = px[first]
+    out_y[block[first]] = py[first]
+    return out_x, out_y
+
+
+@timed('legalize')
+def legalize(blocks, max_iterations=LEGALIZE_ITERATIONS):
+    """Remove overlaps by pushing blocks apart as little as possible
+
+    Each round pushes every overlapping pair apart by the shortest axis
+    move (see _pushes). Blocks outside this round's pairs did not move and
+    did not overlap, so later rounds only test the moved blocks' rectangles
+    against the rest with a sort-and-search sweep. Moves blocks in place
+    and returns a summary of the pass.
+    """
+    n = len(blocks)
+    x0, y0 = blocks.x.copy(), blocks.y.copy()
+    rects, owner = rectangles(blocks)
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(owner, minlength=n), out=offsets[1:])
+    moved = None
+    iterations = 0
+
+    for iterations in range(1, max_iterations + 1):
+        if moved is None:
+            p, q, _ = _overlapping_pieces(rects, owner)
+        elif len(moved) <= FEW_MOVED:
+            found = [_piece_overlaps(rects, owner, np.arange(offsets[i], offsets[i + 1])) for i in moved.tolist()]
+            p, q = np.concatenate([f[0] for f in found]), np.concatenate([f[1] for f in found])
+        else:
+            p, q, _ = _pieces_against(rects, owner, np.flatnonzero(np.isin(owner, moved)))
+        if len(p) == 0:
+            iterations -= 1
+            break
+        pairs, _ = _block_pairs(owner, p, q, np.zeros(len(p)), n)
+        dx, dy = _pushes(blocks.bounds(), blocks.area, pairs[:, 0], pairs[:, 1], n)
+        moved = np.unique(pairs)
+        blocks.x[moved] += dx[moved]
+        blocks.y[moved] += dy[moved]
+        shift = np.column_stack([dx, dy, dx, dy])[owner]
+        rects += shift
+
+    remaining = find_overlaps(blocks)[0]
+    displacement = np.hypot(blocks.x - x0, blocks.y - y0)
+    return {
+        'iterations': iterations,
+        'moved': int(np.count_nonzero(displacement)),
+        'total_displacement': float(displacement.sum()),
+        'max_displacement': float(displacement.max()) if n else 0.0,
+        'remaining_pairs': len(remaining),
+    }
@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+"""
+Floorplanning Tool - Floorplan metrics
+Vectorized wirelength, overlap and net-crossing scores with incremental updates
+"""
+
+import numpy as np
+
+from floorplan_graph import NetIndex
+from floorplan_polygons import RectangleCache
+from floorplan_profile import timed
+
+# Upper bound on candidate pairs materialized at once
+PAIR_CHUNK = 2_000_000
+
+# Most candidate net pairs a crossing count tests. Nets spanning the die
+# cross Θ(E²) times, so past this the count is left off (None) rather than
+# stalling a load
+CROSSING_PAIR_LIMIT = 20_000_000
+
+# Smallest crossing-grid cell as a fraction of the nets' extent, which
+# bounds the cells a long net passes through
+MIN_CELL_FRACTION = 1 / 1024
+
+# Rows a segment covers inside a column are padded by this fraction of a
+# cell, so rounding never drops the cell where two segments meet
+CELL_PAD = 1e-6
+
+# Nets moved since the crossing grid was built are tested against every
+# update directly; past this many the grid is rebuilt
+MOVED_NETS = 1024
+
+
+def wirelengths(cx, cy, src, dst):
+    """Per-net Manhattan and Euclidean center-to-center lengths
+
+    Pins sit at block centers, so for these two-pin nets the half-perimeter
+    of the pin bounding box equals the Manhattan length.
+    """
+    dx = np.abs(cx[src] - cx[dst])
+    dy = np.abs(cy[src] - cy[dst])
+    return dx + dy, np.hypot(dx, dy)
+
+
+def incident_index(src, dst, n):
+    """Block -> incident nets in CSR form as (order, offsets)
+
+    The nets of block b are order[offsets[b]:offsets[b + 1]].
+    """
+    ends = np.concatenate([src, dst])
+    order = np.argsort(ends, kind='stable') % max(len(src), 1)
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(ends, minlength=n), out=offsets[1:])
+    return order, offsets
+
+
+def _pairs_in_groups(keys):
+    """All (a, b) position pairs, a < b, that share a key in a sorted key array"""
+    n = len(keys)
+    if n < 2:
+        return np.zeros(0, np.int64), np.zeros(0, np.int64)
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    group_end = np.repeat(np.r_[starts[1:], n], np.diff(np.r_[starts, n]))
+    counts = group_end - np.arange(n) - 1
+    total = int(counts.sum())
+    first = np.repeat(np.arange(n), counts)
+    offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    return first, first + 1 + offsets
+
+
+def _grid_candidates(bounds, max_span=64):
+    """Candidate pairs whose boxes share a uniform-grid cell
+
+    Boxes are hashed into every cell they cover (cell size is the median box
+    extent), so the work grows with the number of near neighbours rather
+    than n². Boxes spanning more than max_span cells are paired with every
+    box directly.
+    """
+    n = len(bounds)
+    extent = np.maximum(bounds[:, 2] - bounds[:, 0], bounds[:, 3] - bounds[:, 1])
+    cell = max(float(np.median(extent)), 1e-9)
+    ix0, iy0 = np.floor(bounds[:, 0] / cell), np.floor(bounds[:, 1] / cell)
+    wx = (np.floor(bounds[:, 2] / cell) - ix0 + 1).astype(np.int64)
+    wy = (np.floor(bounds[:, 3] / cell) - iy0 + 1).astype(np.int64)
+    spans = wx * wy
+    large = np.flatnonzero(spans > max_span)
+    small = np.flatnonzero(spans <= max_span)
+
+    # One entry per (box, covered cell)
+    box = np.repeat(small, spans[small])
+    k = np.arange(len(box)) - np.repeat(np.cumsum(spans[small]) - spans[small], spans[small])
+    cx = ix0[box] + k % wx[box]
+    cy = iy0[box] + k // wx[box]
+    keys = (cx - cx.min() if len(cx) else cx) * (2 ** 31) + (cy - cy.min() if len(cy) else cy)
+    order = np.argsort(keys, kind='stable')
+    a, b = _pairs_in_groups(keys[order])
+    i, j = box[order[a]], box[order[b]]
+
+    # Oversized boxes against everything
+    if len(large):
+        li = np.repeat(large, n)
+        lj = np.tile(np.arange(n), len(large))
+        keep = (li != lj) & ~((spans[lj] > max_span) & (lj < li))
+        i, j = np.concatenate([i, li[keep]]), np.concatenate([j, lj[keep]])
+
+    # Pairs sharing several cells show up more than once
+    lo, hi = np.minimum(i, j), np.maximum(i, j)
+    unique = np.unique(lo * n + hi)
+    return unique // n, unique % n
+
+
+def overlapping_pairs(bounds, owner=None):
+    """All overlapping box pairs as (i, j, overlap area) arrays
+
+    With owner (the block each box belongs to, as from
+    floorplan_polygons.rectangles), boxes of the same block are not paired.
+    """
+    if len(bounds) < 2:
+        return np.zeros(0, np.int64), np.zeros(0, np.int64), np.zeros(0)
+    i, j = _grid_candidates(bounds)
+    w = np.minimum(bounds[i, 2], bounds[j, 2]) - np.maximum(bounds[i, 0], bounds[j, 0])
+    h = np.minimum(bounds[i, 3], bounds[j, 3]) - np.maximum(bounds[i, 1], bounds[j, 1])
+    hit = (w > 0) & (h > 0)
+    if owner is not None:
+        hit &= owner[i] != owner[j]
+    return i[hit], j[hit], w[hit] * h[hit]
+
+
+def overlap_area(bounds, owner=None):
+    """Total pairwise overlap area between boxes (of different blocks, given owner)"""
+    return float(overlapping_pairs(bounds, owner)[2].sum())
+
+
+def block_overlap(bounds, i, owner=None, pieces=None):
+    """Overlap area between block i and every other block
+
+    Without owner, bounds holds one box per block. With owner, block i is
+    the boxes in pieces (a slice or index array) and is compared against
+    the boxes of every other owner.
+    """
+    if owner is None:
+        b = bounds[i]
+        w = np.minimum(bounds[:, 2], b[2]) - np.maximum(bounds[:, 0], b[0])
+        h = np.minimum(bounds[:, 3], b[3]) - np.maximum(bounds[:, 1], b[1])
+        area = np.where((w > 0) & (h > 0), w * h, 0.0)
+        area[i] = 0.0
+        return float(area.sum())
+    others = owner != i
+    total = 0.0
+    for b in bounds[pieces]:
+        w = np.minimum(bounds[:, 2], b[2]) - np.maximum(bounds[:, 0], b[0])
+        h = np.minimum(bounds[:, 3], b[3]) - np.maximum(bounds[:, 1], b[1])
+        total += float(np.where(others & (w > 0) & (h > 0), w * h, 0.0).sum())
+    return total
+
+
+def _orientation(ax, ay, bx, by, px, py):
+    """Twice the signed area of the turn a -> b -> p (positive for a left turn)"""
+    return (bx - ax) * (py - ay) - (by - ay) * (px - ax)
+
+
+def _crosses(seg, i, j, src, dst):
+    """Mask of segment pairs that properly cross and share no block"""
+    x1, y1, x2, y2 = seg
+    ax, ay, bx, by = x1[i], y1[i], x2[i], y2[i]
+    cx, cy, dx, dy = x1[j], y1[j], x2[j], y2[j]
+    hit = ((_orientation(ax, ay, bx, by, cx, cy) * _orientation(ax, ay, bx, by, dx, dy) < 0) &
+           (_orientation(cx, cy, dx, dy, ax, ay) * _orientation(cx, cy, dx, dy, bx, by) < 0))
+    hit[hit] = ((src[i[hit]] != src[j[hit]]) & (src[i[hit]] != dst[j[hit]]) &
+                (dst[i[hit]] != src[j[hit]]) & (dst[i[hit]] != dst[j[hit]]))
+    return hit
+
+
+def _ranges(starts, counts):
+    """Concatenated arange(start, start + count) for every (start, count)"""
+    offsets = np.arange(int(counts.sum())) - np.repeat(np.cumsum(counts) - counts, counts)
+    return np.repeat(starts, counts) + offsets
+
+
+def segment_cells(seg, cell, nets=None):
+    """(net, cell key) entries for every grid cell each segment passes through
+
+    A segment is walked column by column and, inside each column, covers
+    the rows between its y at the column's edges. A key packs the column
+    into the high 32 bits and the row into the low ones.
+    """
+    ids = np.arange(seg.shape[1]) if nets is None else np.asarray(nets)
+    x1, y1, x2, y2 = seg[:, ids]
+    swap = x1 > x2
+    x1, x2, y1, y2 = np.where(swap, x2, x1), np.where(swap, x1, x2), np.where(swap, y2, y1), np.where(swap, y1, y2)
+    first = np.floor(x1 / cell).astype(np.int64)
+    columns = np.floor(x2 / cell).astype(np.int64) - first + 1
+    entry = np.repeat(np.arange(len(ids)), columns)
+    column = _ranges(first, columns)
+
+    # y where the segment enters and leaves each column (its whole span if vertical)
+    dx, dy = (x2 - x1)[entry], (y2 - y1)[entry]
+    slope = np.divide(dy, dx, out=np.zeros(len(entry)), where=dx > 0)
+    ya = np.where(dx > 0, y1[entry] + (np.maximum(x1[entry], column * cell) - x1[entry]) * slope, y1[entry])
+    yb = np.where(dx > 0, y1[entry] + (np.minimum(x2[entry], (column + 1) * cell) - x1[entry]) * slope, y2[entry])
+    pad = CELL_PAD * cell
+    bottom = np.floor((np.minimum(ya, yb) - pad) / cell).astype(np.int64)
+    rows = np.floor((np.maximum(ya, yb) + pad) / cell).astype(np.int64) - bottom + 1
+    row = _ranges(bottom, rows)
+    entry, column = np.repeat(entry, rows), np.repeat(column, rows)
+    return ids[entry], (column << 32) + row
+
+
+def _crossing_keys(seg, i, j, cell):
+    """Cell key of the point where each crossing pair (i, j) meets"""
+    x1, y1, x2, y2 = seg
+    rx, ry = x2[i] - x1[i], y2[i] - y1[i]
+    sx, sy = x2[j] - x1[j], y2[j] - y1[j]
+    t = ((x1[j] - x1[i]) * sy - (y1[j] - y1[i]) * sx) / (rx * sy - ry * sx)
+    # Clamped into both segments' boxes so rounding cannot push it outside them
+    px = np.clip(x1[i] + t * rx, np.maximum(np.minimum(x1[i], x2[i]), np.minimum(x1[j], x2[j])),
+                 np.minimum(np.maximum(x1[i], x2[i]), np.maximum(x1[j], x2[j])))
+    py = np.clip(y1[i] + t * ry, np.maximum(np.minimum(y1[i], y2[i]), np.minimum(y1[j], y2[j])),
+                 np.minimum(np.maximum(y1[i], y2[i]), np.maximum(y1[j], y2[j])))
+    return (np.floor(px / cell).astype(np.int64) << 32) + np.floor(py / cell).astype(np.int64)
+
+
+class CrossingGrid:
+    """Nets bucketed by the uniform-grid cells their lines pass through
+
+    Only nets sharing a cell can cross, so counting tests the pairs within
+    each cell; each crossing is counted once, in the cell holding its
+    intersection point. The cell size is the median net extent, so on a
+    placed design a net meets a handful of others instead of all of them.
+    Nets moved since the grid was built are listed in moved and tested
+    against every query until the grid is rebuilt.
+    """
+
+    def __init__(self, seg):
+        x1, y1, x2, y2 = seg
+        cell = 1.0
+        if len(x1):
+            extent = max(np.ptp(np.r_[x1, x2]), np.ptp(np.r_[y1, y2]))
+            cell = float(np.median(np.maximum(np.abs(x2 - x1), np.abs(y2 - y1))))
+            cell = max(cell, extent * MIN_CELL_FRACTION, 1e-9)
+        self.cell = cell
+        self.build(seg)
+
+    def build(self, seg):
+        """Bucket every net at its current position"""
+        nets, keys = segment_cells(seg, self.cell)
+        order = np.argsort(keys, kind='stable')
+        self.nets, self.keys = nets[order], keys[order]
+        self.moved = set()
+
+    def count(self, seg, src, dst, limit=CROSSING_PAIR_LIMIT):
+        """Number of crossing net pairs, or None if more than limit pairs would need testing"""
+        keys = self.keys
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) if len(keys) else np.zeros(0, np.int64)
+        sizes = np.diff(np.r_[starts, len(keys)])
+        cumulative = np.cumsum(sizes * (sizes - 1) // 2)
+        if len(cumulative) and cumulative[-1] > limit:
+            return None
+
+        # Lines, ends and extents laid out in cell order, so pairs index memory close together
+        seg, src, dst = seg[:, self.nets], src[self.nets], dst[self.nets]
+        xlo, xhi = np.minimum(seg[0], seg[2]), np.maximum(seg[0], seg[2])
+        ylo, yhi = np.minimum(seg[1], seg[3]), np.maximum(seg[1], seg[3])
+        total, group = 0, 0
+        while group < len(starts):
+            # As many whole cells as fit in one chunk of pairs
+            done = cumulative[group - 1] if group else 0
+            stop = max(group + 1, int(np.searchsorted(cumulative, done + PAIR_CHUNK, side='right')))
+            lo, hi = starts[group], starts[stop] if stop < len(starts) else len(keys)
+            a, b = _pairs_in_groups(keys[lo:hi])
+            i, j = lo + a, lo + b
+            near = (xlo[i] <= xhi[j]) & (xlo[j] <= xhi[i]) & (ylo[i] <= yhi[j]) & (ylo[j] <= yhi[i])
+            i, j = i[near], j[near]
+            hit = _crosses(seg, i, j, src, dst)
+            i, j = i[hit], j[hit]
+            total += int(np.count_nonzero(_crossing_keys(seg, i, j, self.cell) == keys[i]))
+            group = stop
+        return total
+
+    def pairs(self, seg, nets):
+        """(i, j) pairs of the given nets and every other net sharing a cell with them"""
+        i, keys = segment_cells(seg, self.cell, nets)
+        lo = np.searchsorted(self.keys, keys, side='left')
+        counts = np.searchsorted(self.keys, keys, side='right') - lo
+        i, j = np.repeat(i, counts), self.nets[_ranges(lo, counts)]
+        if self.moved:
+            moved = np.fromiter(self.moved, dtype=np.int64, count=len(self.moved))
+            i = np.concatenate([i, np.repeat(nets, len(moved))])
+            j = np.concatenate([j, np.tile(moved, len(nets))])
+        keep = i != j
+        codes = np.unique(i[keep] * seg.shape[1] + j[keep])
+        return codes // seg.shape[1], codes % seg.shape[1]
+
+    def crossings(self, seg, nets, src, dst):
+        """Crossings between the given nets and every other net"""
+        i, j = self.pairs(seg, nets)
+        return int(np.count_nonzero(_crosses(seg, i, j, src, dst)))
+
+    def move(self, seg, nets):
+        """Note nets whose lines changed, rebuilding once too many have"""
+        self.moved.update(np.asarray(nets).tolist())
+        if len(self.moved) > MOVED_NETS:
+            self.build(seg)
+
+
+def count_crossings(seg, src, dst, limit=CROSSING_PAIR_LIMIT):
+    """Number of crossing net-line pairs, or None if the nets are too dense to count
+
+    Nets sharing a block meet at its center and are not counted.
+    """
+    return CrossingGrid(seg).count(seg, src, dst, limit)
+
+
+class MetricsEngine:
+    """Floorplan scores kept up to date as blocks move
+
+    A full rebuild computes every metric; update_block then recomputes only
+    the nets touching the moved block and its overlap with the rest. The
+    block -> net lookup is the app's shared NetIndex when one is passed.
+    """
+
+    def __init__(self, blocks, connections, net_index=None):
+        self.blocks = blocks
+        self.connections = connections
+        self.net_index = net_index if net_index is not None else NetIndex(connections, len(blocks))
+        self.rebuild()
+
+    @timed('metrics.rebuild')
+    def rebuild(self):
+        """Compute every metric from scratch"""
+        blocks, nets = self.blocks, self.connections
+        src, dst = nets.src, nets.dst
+
+        # Cached geometry the incremental overlap updates diff against
+        self.pieces = RectangleCache(blocks)
+        cx, cy = blocks.centers()
+        self.segments = np.array([cx[src], cy[src], cx[dst], cy[dst]])
+        self.manhattan, self.euclidean = wirelengths(cx, cy, src, dst)
+
+        self.overlap = overlap_area(self.pieces.rects, self.pieces.owner)
+
+        # Crossings stay None (and are not tracked) when the nets are too dense to count
+        self.crossing_grid = CrossingGrid(self.segments)
+        self.crossings = self.crossing_grid.count(self.segments, src, dst)
+        if self.crossings is None:
+            self.crossing_grid = None
+
+    def rebind(self, blocks):
+        """Follow another store with the same geometry, e.g. the live blocks a copy was scored on"""
+        self.blocks = blocks
+        self.pieces.rebind(blocks)
+
+    def incident_nets(self, block_id):
+        """Indices of the nets touching a block"""
+        return self.net_index.nets(block_id)
+
+    @timed('metrics.update')
+    def update_block(self, block_id):
+        """Refresh the metrics after one block moved or changed shape"""
+        blocks, nets = self.blocks, self.connections
+        src, dst = nets.src, nets.dst
+        incident = self.incident_nets(block_id)
+
+        # Overlap: remove the old contribution, add the new one
+        pieces = self.pieces
+        old_overlap = block_overlap(pieces.rects, block_id, pieces.owner, pieces.rows(block_id))
+        rows = pieces.update(block_id)
+        self.overlap += block_overlap(pieces.rects, block_id, pieces.owner, rows) - old_overlap
+
+        if len(incident) == 0:
+            return
+
+        # Crossings of the incident nets before and after the move
+        grid = self.crossing_grid
+        if grid is not None:
+            old_crossings = grid.crossings(self.segments, incident, src, dst)
+        (cx,), (cy,) = blocks.centers([block_id])
+        at_src = src[incident] == block_id
+        self.segments[0, incident[at_src]] = cx
+        self.segments[1, incident[at_src]] = cy
+        self.segments[2, incident[~at_src]] = cx
+        self.segments[3, incident[~at_src]] = cy
+        if grid is not None:
+            grid.move(self.segments, incident)
+            self.crossings += grid.crossings(self.segments, incident, src, dst) - old_crossings
+
+        # Wirelength of the incident nets only
+        x1, y1, x2, y2 = self.segments[:, incident]
+        dx, dy = np.abs(x1 - x2), np.abs(y1 - y2)
+        self.manhattan[incident] = dx + dy
+        self.euclidean[incident] = np.hypot(dx, dy)
+
+    def totals(self):
+        """Weighted wirelengths, overlap area and crossing count"""
+        weights = self.connections.weights
+        manhattan = float(weights @ self.manhattan)
+        return {
+            'hpwl': manhattan,
+            'manhattan': manhattan,
+            'euclidean': float(weights @ self.euclidean),
+            'overlap': max(self.overlap, 0.0),
+            'crossings': self.crossings,
+        }
+
+    def summary(self):
+        """One-line summary for the info label"""
+        t = self.totals()
+        crossings = 'too dense to count' if t['crossings'] is None else t['crossings']
+        return (f"HPWL: {t['hpwl']:,.0f} | Euclidean: {t['euclidean']:,.0f} | "
+                f"Overlap: {t['overlap']:,.0f} μm² | Crossings: {crossings}")
@@ -0,0 +1,412 @@
+#!/usr/bin/env python3
+"""
+Floorplanning Tool - Overview map
+Tiled block-area and net-congestion raster of the whole design, and the minimap that shows it
+"""
+
+import numpy as np
+
+from floorplan_events import MotionCoalescer
+
+# Side of one cached tile in pixels
+TILE_PIXELS = 64
+
+# Zoom levels of the tile pyramid: level k is 2**k tiles across, so the finest
+# raster is TILE_PIXELS * 2**(LEVELS - 1) cells across
+LEVELS = 4
+
+# Level the minimap shows at first; its size is the minimap's size (256 pixels)
+OVERVIEW_LEVEL = 2
+
+# Empty border around the design, as a fraction of its larger side
+MARGIN = 0.05
+
+# Congestion at this quantile of the cells with nets maps to full color. The
+# scale is fixed when the raster is built, so a re-rendered tile matches its
+# neighbours
+CONGESTION_QUANTILE = 0.99
+
+# Heatmap colors (RGB): empty die, fully covered cells, saturated congestion
+EMPTY_RGB = np.array([255, 255, 255], dtype=np.float64)
+BLOCK_RGB = np.array([70, 110, 180], dtype=np.float64)
+CONGESTION_RGB = np.array([220, 30, 30], dtype=np.float64)
+
+# Outline of the main view's extent on the minimap
+VIEWPORT_COLOR = '#FF8C00'
+
+
+def _interval_steps(lo, hi, cells):
+    """Difference-array entries of the intervals [lo, hi) in cell units, as (index, value) pairs
+
+    Integrating the four entries per interval gives the fraction of every
+    cell it covers; ends are clipped to the grid.
+    """
+    lo, hi = np.clip(lo, 0, cells), np.clip(hi, 0, cells)
+    k0, k1 = np.floor(lo), np.floor(hi)
+    f0, f1 = lo - k0, hi - k1
+    k0, k1 = k0.astype(np.int64), k1.astype(np.int64)
+    index = np.column_stack([k0, k0 + 1, k1, k1 + 1])
+    value = np.column_stack([1 - f0, f0, f1 - 1, -f1])
+    return index, value
+
+
+def rasterize(cells, x0, y0, x1, y1, values):
+    """Spread values over a cells x cells grid by the area each rectangle covers
+
+    Rectangles are in cell units and values are per unit of covered cell
+    area. Their corners are histogrammed into a difference array with
+    np.bincount and two cumulative sums integrate it, so the cost is
+    O(rectangles + cells) however large the rectangles are. Rows are y.
+    """
+    size = cells + 2
+    xi, xv = _interval_steps(x0, x1, cells)
+    yi, yv = _interval_steps(y0, y1, cells)
+    index = (yi[:, :, None] * size + xi[:, None, :]).ravel()
+    weight = (yv[:, :, None] * xv[:, None, :] * np.asarray(values, dtype=np.float64)[:, None, None]).ravel()
+    steps = np.bincount(index, weight, minlength=size * size).reshape(size, size)
+    return steps.cumsum(axis=0).cumsum(axis=1)[:cells, :cells]
+
+
+def _coverage(lo, hi, cells):
+    """First cell and per-cell covered fraction of one interval [lo, hi) in cell units"""
+    lo, hi = min(max(lo, 0.0), cells), min(max(hi, 0.0), cells)
+    start, end = int(np.floor(lo)), min(int(np.ceil(hi)), cells)
+    edges = np.arange(start, end + 1, dtype=np.float64)
+    return start, np.maximum(np.minimum(hi, edges[1:]) - np.maximum(lo, edges[:-1]), 0.0)
+
+
+def ppm(rgb):
+    """Binary PPM bytes of an (h, w, 3) uint8 image (what Tk's PhotoImage reads directly)"""
+    height, width = rgb.shape[:2]
+    return b'P6 %d %d 255\n' % (width, height) + rgb.tobytes()
+
+
+class DensityTiles:
+    """Block-area and net-congestion rasters of a design in a tile pyramid
+
+    The finest level holds, per cell, the fraction covered by blocks and the
+    RUDY congestion of the nets (each net's weight times its half-perimeter
+    spread evenly over its bounding box). Each coarser level averages 2 x 2
+    cells of the one below. Tiles are rendered to PPM on demand and cached.
+    Edited blocks are queued and applied by flush() (a dragged block is
+    re-rasterized once per refresh, not once per frame): each subtracts the
+    block's and its nets' old footprints, adds the new ones and invalidates
+    only the tiles they touch, at every level.
+    """
+
+    def __init__(self, blocks, connections, net_index):
+        self.blocks = blocks
+        self.connections = connections
+        self.net_index = net_index
+        self.cells = TILE_PIXELS << (LEVELS - 1)
+        self.rebuild()
+
+    def rebuild(self):
+        """Fit the raster to the design and rasterize every block and net"""
+        blocks, nets, cells = self.blocks, self.connections, self.cells
+        if len(blocks):
+            bounds = blocks.bounds()
+            x0, y0 = bounds[:, 0].min(), bounds[:, 1].min()
+            side = max(bounds[:, 2].max() - x0, bounds[:, 3].max() - y0, 1.0)
+        else:
+            x0, y0, side = 0.0, 0.0, 1.0
+        pad = MARGIN * side
+        self.origin = (x0 - pad, y0 - pad)
+        self.side = side + 2 * pad
+
+        # Footprints in cell units, kept so an edit can subtract them again
+        self.block_rects = self._block_rects(np.arange(len(blocks)))
+        self.block_values = self._block_values(np.arange(len(blocks)))
+        net_ids = np.arange(len(nets))
+        self.net_rects = self._net_rects(net_ids)
+        self.net_values = self._net_values(net_ids, self.net_rects)
+
+        area = rasterize(cells, *self.block_rects.T, self.block_values)
+        congestion = rasterize(cells, *self.net_rects.T, self.net_values)
+        self.levels = [None] * LEVELS
+        self.levels[-1] = (area, congestion)
+        for level in range(LEVELS - 2, -1, -1):
+            self.levels[level] = tuple(self._halve(grid) for grid in self.levels[level + 1])
+
+        self.scales = []
+        for area, congestion in self.levels:
+            occupied = congestion[congestion > 0]
+            self.scales.append(float(np.quantile(occupied, CONGESTION_QUANTILE)) if len(occupied) else 1.0)
+
+        self.tiles = {}
+        self.pending = set()
+        self.dirty = [set() for _ in range(LEVELS)]
+        for level in range(LEVELS):
+            self.dirty[level].update(np.ndindex(1 << level, 1 << level))
+
+    def update_block(self, block_id):
+        """Queue a block whose geometry changed for the next flush"""
+        self.pending.add(block_id)
+
+    def flush(self):
+        """Re-rasterize the queued blocks and their nets"""
+        pending, self.pending = self.pending, set()
+        for block_id in pending:
+            self._update_block(block_id)
+
+    def _update_block(self, block_id):
+        ids = np.array([block_id])
+        self._replace(self.levels[-1][0], self.block_rects, self.block_values, ids,
+                      self._block_rects(ids), self._block_values(ids))
+        nets = self.net_index.nets(block_id)
+        if len(nets):
+            rects = self._net_rects(nets)
+            self._replace(self.levels[-1][1], self.net_rects, self.net_values, nets, rects,
+                          self._net_values(nets, rects))
+
+    def update_net(self, net_id):
+        """Re-rasterize one net after its weight changed"""
+        nets = np.array([net_id])
+        rects = self.net_rects[nets]
+        self._replace(self.levels[-1][1], self.net_rects, self.net_values, nets, rects,
+                      self._net_values(nets, rects))
+
+    def tile(self, level, row, col):
+        """PPM bytes of one tile (row 0 at the top), rendered on first use and cached"""
+        self.flush()
+        key = (level, row, col)
+        data = self.tiles.get(key)
+        if data is None:
+            size = TILE_PIXELS << level
+            rows = slice(size - (row + 1) * TILE_PIXELS, size - row * TILE_PIXELS)
+            cols = slice(col * TILE_PIXELS, (col + 1) * TILE_PIXELS)
+            area, congestion = self.levels[level]
+            data = self.tiles[key] = ppm(self.render(area[rows, cols], congestion[rows, cols],
+                                                     self.scales[level])[::-1])
+        return data
+
+    @staticmethod
+    def render(area, congestion, scale):
+        """RGB heatmap of area and congestion cells (rows as given)"""
+        covered = np.clip(area, 0.0, 1.0)[..., None]
+        heat = np.clip(congestion / scale, 0.0, 1.0)[..., None]
+        rgb = EMPTY_RGB * (1 - covered) + BLOCK_RGB * covered
+        rgb = rgb * (1 - heat) + CONGESTION_RGB * heat
+        return rgb.astype(np.uint8)
+
+    def image(self, level):
+        """The whole level as one RGB image (row 0 at the top)"""
+        self.flush()
+        area, congestion = self.levels[level]
+        return self.render(area, congestion, self.scales[level])[::-1]
+
+    def take_dirty(self, level):
+        """Tiles of a level invalidated since the last call, as (row, col) pairs"""
+        self.flush()
+        dirty, self.dirty[level] = self.dirty[level], set()
+        return dirty
+
+    def to_pixels(self, level, x, y):
+        """Image pixel of a design point at a level (y grows downwards)"""
+        scale = (TILE_PIXELS << level) / self.side
+        return (x - self.origin[0]) * scale, (self.side - (y - self.origin[1])) * scale
+
+    def to_data(self, level, px, py):
+        """Design point of an image pixel at a level"""
+        scale = self.side / (TILE_PIXELS << level)
+        return self.origin[0] + px * scale, self.origin[1] + self.side - py * scale
+
+    def _block_rects(self, ids):
+        """Bounding boxes of blocks in cell units"""
+        b = self.blocks
+        return self._to_cells(np.column_stack([b.x[ids], b.y[ids], b.x[ids] + b.width[ids],
+                                               b.y[ids] + b.height[ids]]))
+
+    def _block_values(self, ids):
+        """Share of each block's bounding box its shape covers (1 for rectangles)"""
+        box = self.blocks.width[ids] * self.blocks.height[ids]
+        return np.divide(self.blocks.area[ids], box, out=np.zeros(len(ids)), where=box > 0)
+
+    def _net_rects(self, nets):
+        """Bounding boxes of nets' end centers in cell units, at least a cell wide"""
+        blocks, src, dst = self.blocks, self.connections.src[nets], self.connections.dst[nets]
+        (sx, sy), (dx, dy) = blocks.centers(src), blocks.centers(dst)
+        rects = self._to_cells(np.column_stack([np.minimum(sx, dx), np.minimum(sy, dy),
+                                                np.maximum(sx, dx), np.maximum(sy, dy)]))
+        for lo, hi in ((0, 2), (1, 3)):
+            short = np.maximum(1.0 - (rects[:, hi] - rects[:, lo]), 0.0) / 2
+            rects[:, lo] -= short
+            rects[:, hi] += short
+        return rects
+
+    def _net_values(self, nets, rects):
+        """RUDY density of nets: weight x half-perimeter per unit of bounding box area"""
+        width, height = rects[:, 2] - rects[:, 0], rects[:, 3] - rects[:, 1]
+        return self.connections.weights[nets] * (width + height) / (width * height)
+
+    def _to_cells(self, bounds):
+        """Design-space (x0, y0, x1, y1) rows in finest-level cell units"""
+        scale = self.cells / self.side
+        origin = np.array(self.origin * 2)
+        return (bounds - origin) * scale
+
+    def _replace(self, grid, rects, values, ids, new_rects, new_values):
+        """Swap footprints in a finest-level grid and invalidate what each swap touched"""
+        for i, index in enumerate(ids.tolist()):
+            old = self._add(grid, rects[index], -values[index])
+            self._invalidate(self._union(old, self._add(grid, new_rects[i], new_values[i])))
+            rects[index] = new_rects[i]
+            values[index] = new_values[i]
+
+    def _add(self, grid, rect, value):
+        """Add one rectangle's footprint to a grid; returns the (row0, row1, col0, col1) cells touched"""
+        col, xs = _coverage(rect[0], rect[2], self.cells)
+        row, ys = _coverage(rect[1], rect[3], self.cells)
+        if len(xs) == 0 or len(ys) == 0:
+            return None
+        grid[row:row + len(ys), col:col + len(xs)] += value * np.outer(ys, xs)
+        return row, row + len(ys), col, col + len(xs)
+
+    @staticmethod
+    def _union(a, b):
+        """Bounding (row0, row1, col0, col1) region of two regions, either of which may be None"""
+        if a is None or b is None:
+            return a if b is None else b
+        return min(a[0], b[0]), max(a[1], b[1]), min(a[2], b[2]), max(a[3], b[3])
+
+    @staticmethod
+    def _halve(grid):
+        """Average 2 x 2 cells"""
+        rows, cols = grid.shape
+        return grid.reshape(rows // 2, 2, cols // 2, 2).mean(axis=(1, 3))
+
+    def _invalidate(self, region):
+        """Carry a changed finest-level region up the pyramid and drop the tiles it touches"""
+        if region is None:
+            return
+        row0, row1, col0, col1 = region
+        for level in range(LEVELS - 1, -1, -1):
+            if level < LEVELS - 1:
+                row0, col0 = row0 // 2, col0 // 2
+                row1, col1 = (row1 + 1) // 2, (col1 + 1) // 2
+                for finer, grid in zip(self.levels[level + 1], self.levels[level]):
+                    grid[row0:row1, col0:col1] = self._halve(finer[2 * row0:2 * row1, 2 * col0:2 * col1])
+            # Tile rows count from the top of the image, grid rows from the bottom
+            size = TILE_PIXELS << level
+            for tile_row in range((size - row1) // TILE_PIXELS, (size - row0 - 1) // TILE_PIXELS + 1):
+                for tile_col in range(col0 // TILE_PIXELS, (col1 - 1) // TILE_PIXELS + 1):
+                    self.tiles.pop((level, tile_row, tile_col), None)
+                    self.dirty[level].add((tile_row, tile_col))
+
+
+class OverviewMap:
+    """Minimap of the whole design with the main view's extent outlined
+
+    One Tk PhotoImage per tile of the shown level, fed the cached PPM tiles;
+    refresh() re-renders only the tiles an edit invalidated. Clicking or
+    dragging pans the main view (through on_pan(x, y), coalesced to one call
+    per frame), the mouse wheel steps through the pyramid's levels and,
+    between drags, a level larger than the map scrolls to keep the view's
+    outline in sight.
+    """
+
+    SIZE = TILE_PIXELS << OVERVIEW_LEVEL
+
+    def __init__(self, parent, on_pan):
+        import tkinter as tk
+
+        self.tk = tk
+        self.on_pan = on_pan
+        self.canvas = tk.Canvas(parent, width=self.SIZE, height=self.SIZE, bg='white', highlightthickness=1,
+                                highlightbackground='gray', cursor='fleur')
+        self.tiles = None
+        self.level = OVERVIEW_LEVEL
+        self.photos = {}
+        self.view = None
+        self.grab = (0.0, 0.0)
+        self.panning = False
+        self.viewport = self.canvas.create_rectangle(0, 0, 0, 0, outline=VIEWPORT_COLOR, width=2)
+        self.motion = MotionCoalescer(self.canvas, self._pan)
+
+        self.canvas.bind('<ButtonPress-1>', self._on_press)
+        self.canvas.bind('<B1-Motion>', self.motion.submit)
+        self.canvas.bind('<ButtonRelease-1>', self._on_release)
+        self.canvas.bind('<MouseWheel>', lambda event: self.zoom(1 if event.delta > 0 else -1))
+        self.canvas.bind('<Button-4>', lambda event: self.zoom(1))
+        self.canvas.bind('<Button-5>', lambda event: self.zoom(-1))
+
+    def set_tiles(self, tiles):
+        """Show a new design's tiles"""
+        self.tiles = tiles
+        self._show_level()
+
+    def zoom(self, steps):
+        """Step the shown level of the pyramid (positive is finer)"""
+        level = min(max(self.level + steps, 0), LEVELS - 1)
+        if level != self.level and self.tiles is not None:
+            self.level = level
+            self._show_level()
+
+    def refresh(self):
+        """Re-render the tiles invalidated since the last refresh"""
+        if self.tiles is None:
+            return
+        for row, col in self.tiles.take_dirty(self.level):
+            self.photos[row, col].configure(data=self.tiles.tile(self.level, row, col), format='PPM')
+        self._place_viewport()
+
+    def set_view(self, xlim, ylim):
+        """Outline the main view's new extent"""
+        self.view = (xlim, ylim)
+        self._place_viewport()
+
+    def _show_level(self):
+        """Lay out one PhotoImage per tile of the current level"""
+        self.canvas.delete('tile')
+        self.photos = {}
+        self.tiles.take_dirty(self.level)
+        count = 1 << self.level
+        for row in range(count):
+            for col in range(count):
+                photo = self.tk.PhotoImage(master=self.canvas, data=self.tiles.tile(self.level, row, col),
+                                           format='PPM')
+                self.photos[row, col] = photo
+                self.canvas.create_image(col * TILE_PIXELS, row * TILE_PIXELS, image=photo, anchor='nw',
+                                         tags='tile')
+        size = TILE_PIXELS << self.level
+        self.canvas.configure(scrollregion=(0, 0, size, size))
+        self.canvas.tag_raise(self.viewport)
+        self._place_viewport()
+
+    def _place_viewport(self):
+        """Move the outline to the main view and scroll a large level to keep it centered"""
+        if self.view is None or self.tiles is None:
+            return
+        (x0, x1), (y0, y1) = self.view
+        left, top = self.tiles.to_pixels(self.level, x0, y1)
+        right, bottom = self.tiles.to_pixels(self.level, x1, y0)
+        self.canvas.coords(self.viewport, left, top, right, bottom)
+        size = TILE_PIXELS << self.level
+        if size > self.SIZE and not self.panning:
+            self.canvas.xview_moveto(((left + right) / 2 - self.SIZE / 2) / size)
+            self.canvas.yview_moveto(((top + bottom) / 2 - self.SIZE / 2) / size)
+
+    def _on_press(self, event):
+        """Grab the outline where it was clicked, or jump the view to the click"""
+        px, py = self.canvas.canvasx(event.x), self.canvas.canvasy(event.y)
+        self.panning = True
+        left, top, right, bottom = self.canvas.coords(self.viewport)
+        if left <= px <= right and top <= py <= bottom:
+            self.grab = ((left + right) / 2 - px, (top + bottom) / 2 - py)
+        else:
+            self.grab = (0.0, 0.0)
+            self.motion.submit(event)
+
+    def _on_release(self, event):
+        """Apply the last drag position, then let the map follow the view again"""
+        self.motion.flush()
+        self.panning = False
+        self._place_viewport()
+
+    def _pan(self, event):
+        """Center the main view under the cursor, keeping the grab offset"""
+        if self.tiles is None:
+            return False
+        px = self.canvas.canvasx(event.x) + self.grab[0]
+        py = self.canvas.canvasy(event.y) + self.grab[1]
+        self.on_pan(*self.tiles.to_data(self.level, px, py))
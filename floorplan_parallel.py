@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Floorplanning Tool - Parallel placement
+Best-of-N placement runs in a process pool over shared-memory block arrays
+"""
+
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from floorplan_placement import PlacementProblem, partition_positions, place, write_positions
+
+# Problem arrays shared with the workers
+SHARED_FIELDS = ('width', 'height', 'src', 'dst', 'weights')
+
+
+class SharedArrays:
+    """NumPy arrays copied once into shared memory
+
+    Workers attach by the small spec dict instead of receiving pickled
+    copies of the arrays with every task.
+    """
+
+    def __init__(self, arrays):
+        self.segments = []
+        self.arrays = {}
+        self.spec = {}
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            view = np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)
+            view[...] = array
+            self.segments.append(shm)
+            self.arrays[name] = view
+            self.spec[name] = (shm.name, array.shape, array.dtype.str)
+
+    @staticmethod
+    def attach(spec):
+        """Views of shared arrays from a spec; returns (arrays, segments)"""
+        arrays, segments = {}, []
+        for name, (shm_name, shape, dtype) in spec.items():
+            shm = shared_memory.SharedMemory(name=shm_name)
+            arrays[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+            segments.append(shm)
+        return arrays, segments
+
+    def close(self):
+        """Release and remove the shared segments"""
+        self.arrays = {}
+        for shm in self.segments:
+            shm.close()
+            shm.unlink()
+        self.segments = []
+
+
+# Per-worker state set up once by _init_worker
+_worker = {}
+
+
+def _init_worker(spec, overlap_weight):
+    """Attach the shared arrays and build the placement problem once per worker"""
+    arrays, segments = SharedArrays.attach(spec)
+    _worker['segments'] = segments
+    _worker['results'] = arrays.pop('results')
+    _worker['problem'] = PlacementProblem(arrays['width'], arrays['height'], arrays['src'],
+                                          arrays['dst'], arrays['weights'], overlap_weight)
+
+
+def _run(run, seed, start, method, iterations, moves):
+    """One placement run; centers go to the shared results array"""
+    began = time.perf_counter()
+    problem = _worker['problem']
+    if start > 1:
+        cx, cy = partition_positions(problem, start, seed)
+    else:
+        cx, cy = problem.initial_positions(seed)
+    cx, cy = place(problem, method, cx, cy, iterations=iterations, moves=moves, seed=seed)
+    _worker['results'][run, 0] = cx
+    _worker['results'][run, 1] = cy
+    return run, problem.cost(cx, cy), time.perf_counter() - began
+
+
+def run_starts(runs, seed=0, partitions=True):
+    """(seed, start) per run: even runs start randomly, odd runs from graph parts"""
+    starts = []
+    for run in range(runs):
+        parts = 2 ** (1 + (run // 2) % 4) if partitions and run % 2 else 1
+        starts.append((seed + run, parts))
+    return starts
+
+
+def parallel_place(blocks, connections, runs=None, workers=None, method='both', iterations=300,
+                   moves=None, seed=0, partitions=True, overlap_weight=None, progress=None):
+    """Best-of-N placement over a process pool, written back into the BlockStore
+
+    Runs differ by seed and by start: random scatter, or the block graph
+    grown into 2-16 parts with each part in its own tile. Returns the winning
+    cost plus per-run costs and timings. progress, if given, is called with
+    (runs finished, runs) as runs complete; if it raises, runs that have
+    not started are cancelled and the exception propagates.
+    """
+    workers = workers or os.cpu_count() or 1
+    runs = runs or workers
+    problem = PlacementProblem.from_stores(blocks, connections, overlap_weight)
+    shared = SharedArrays({
+        'width': problem.width, 'height': problem.height, 'src': problem.src,
+        'dst': problem.dst, 'weights': problem.weights,
+        'results': np.zeros((runs, 2, problem.n)),
+    })
+
+    began = time.perf_counter()
+    costs = [None] * runs
+    seconds = [None] * runs
+    tasks = [(run, run_seed, start, method, iterations, moves)
+             for run, (run_seed, start) in enumerate(run_starts(runs, seed, partitions))]
+    try:
+        if workers == 1:
+            # No pool: run in this process against the same shared arrays
+            _init_worker(shared.spec, problem.overlap_weight)
+            try:
+                for done, task in enumerate(tasks, 1):
+                    run, cost, elapsed = _run(*task)
+                    costs[run], seconds[run] = cost, elapsed
+                    if progress:
+                        progress(done, runs)
+            finally:
+                for shm in _worker.pop('segments'):
+                    shm.close()
+                _worker.clear()
+        else:
+            context = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                                     initargs=(shared.spec, problem.overlap_weight)) as pool:
+                futures = [pool.submit(_run, *task) for task in tasks]
+                try:
+                    for done, future in enumerate(as_completed(futures), 1):
+                        run, cost, elapsed = future.result()
+                        costs[run], seconds[run] = cost, elapsed
+                        if progress:
+                            progress(done, runs)
+                except BaseException:
+                    # Don't wait for runs that have not started
+                    for future in futures:
+                        future.cancel()
+                    raise
+
+        best = int(np.argmin(costs))
+        cx, cy = shared.arrays['results'][best].copy()
+    finally:
+        shared.close()
+
+    result = write_positions(blocks, problem, cx, cy)
+    result.update({
+        'best_run': best,
+        'runs': runs,
+        'workers': workers,
+        'costs': costs,
+        'run_seconds': seconds,
+        'wall_seconds': time.perf_counter() - began,
+    })
+    return result
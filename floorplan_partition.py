@@ -0,0 +1,618 @@
+#!/usr/bin/env python3
+"""
+Floorplanning Tool - Partitioning
+Multilevel and spectral min-cut clustering of the connection graph into super-blocks
+"""
+
+import heapq
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.linalg import ArpackError, ArpackNoConvergence, eigsh
+
+from floorplan_store import BlockStore, NetStore
+
+# Coarsening stops once a level has at most this many vertices...
+COARSEST = 200
+
+# ...or when matching shrank the graph by less than this fraction
+MIN_SHRINK = 0.1
+
+# Rounds of mutual heavy-edge matching per coarsening level
+MATCH_ROUNDS = 4
+
+# Each side of a bisection holds (1 ± IMBALANCE) / 2 of the total area
+IMBALANCE = 0.1
+
+# Greedy graph-growing starts tried on the coarsest graph
+INITIAL_TRIES = 4
+
+# Graphs up to this size are refined by sequential FM with hill climbing,
+# larger ones by batched positive-gain moves
+FM_EXACT = 500
+
+# Refinement passes per level
+FM_PASSES = 8
+
+# An FM pass gives up after this many moves without a new best cut
+FM_PATIENCE = 25
+
+# Clusters of at most this many blocks are not split further
+LEAF_SIZE = 32
+
+# Clusters shown when a design is first collapsed
+VISIBLE_CLUSTERS = 300
+
+# Lloyd iterations of the k-means step of spectral clustering
+KMEANS_ITERATIONS = 30
+
+# Eigenvectors embedding the blocks for spectral clustering, at most
+# (eigsh slows down sharply with the number requested)
+EMBEDDING_DIM = 32
+
+# Relative eigenvalue tolerance of the sparse eigensolver
+EIGEN_TOLERANCE = 1e-4
+
+
+def adjacency(n, src, dst, weights):
+    """Symmetric CSR matrix of connection weights (parallel nets summed, no self loops)"""
+    src, dst = np.asarray(src, dtype=np.int64), np.asarray(dst, dtype=np.int64)
+    weights = np.asarray(weights, dtype=np.float64)
+    keep = (src != dst) & (weights > 0)
+    src, dst, weights = src[keep], dst[keep], weights[keep]
+    return sparse.csr_matrix((np.concatenate([weights, weights]),
+                              (np.concatenate([src, dst]), np.concatenate([dst, src]))), shape=(n, n))
+
+
+def cut_weight(adj, labels):
+    """Total weight of the edges whose ends carry different labels"""
+    coo = adj.tocoo()
+    return float(coo.data[labels[coo.row] != labels[coo.col]].sum()) / 2
+
+
+def _bounds(vweights):
+    """Allowed area range of side 0 of a bisection"""
+    total = float(vweights.sum())
+    # A vertex heavier than the slack would make every split infeasible
+    slack = max(IMBALANCE * total, float(vweights.max(initial=0.0)))
+    return (total - slack) / 2, (total + slack) / 2
+
+
+def _match(adj, vweights, rng, max_weight):
+    """Coarse vertex of every vertex after heavy-edge matching
+
+    Each round every free vertex picks its heaviest free neighbour (weight
+    scaled down by the pair's area so coarse vertices stay even); mutual
+    picks are matched. Vertices left without a connected partner are
+    paired among themselves, so disconnected pieces still coarsen.
+    """
+    n = adj.shape[0]
+    match = np.full(n, -1, dtype=np.int64)
+    rows = np.repeat(np.arange(n), np.diff(adj.indptr))
+    cols = adj.indices
+    pair_weight = vweights[rows] + vweights[cols]
+    score = adj.data / pair_weight * (1 + 1e-6 * rng.random(len(rows)))
+    # Each row's neighbours by falling score, too-heavy pairs dropped
+    order = np.lexsort((-score, rows))
+    order = order[pair_weight[order] <= max_weight]
+    rows, cols = rows[order], cols[order]
+
+    for _ in range(MATCH_ROUNDS):
+        free = np.flatnonzero((match[rows] < 0) & (match[cols] < 0))
+        if len(free) == 0:
+            break
+        first = free[np.r_[True, rows[free][1:] != rows[free][:-1]]]
+        best = np.full(n, -1, dtype=np.int64)
+        best[rows[first]] = cols[first]
+        v = np.flatnonzero(best >= 0)
+        mutual = v[best[best[v]] == v]
+        if len(mutual) == 0:
+            break
+        match[mutual] = best[mutual]
+
+    # Leftovers without a free neighbour are paired with each other by area
+    free = np.flatnonzero(match < 0)
+    free = free[np.argsort(vweights[free], kind='stable')]
+    pairs = len(free) // 2
+    a, b = free[:pairs], free[pairs:2 * pairs]
+    fits = vweights[a] + vweights[b] <= max_weight
+    match[a[fits]], match[b[fits]] = b[fits], a[fits]
+    single = match < 0
+    match[single] = np.flatnonzero(single)
+
+    leader = np.minimum(np.arange(n), match)
+    return np.unique(leader, return_inverse=True)[1]
+
+
+def _contract(adj, vweights, cmap, nc):
+    """Coarse graph (P^T A P, summed vertex areas) of a matching"""
+    n = adj.shape[0]
+    p = sparse.csr_matrix((np.ones(n), (np.arange(n), cmap)), shape=(n, nc))
+    coarse = (p.T @ adj @ p).tocsr()
+    coarse.setdiag(0)
+    coarse.eliminate_zeros()
+    return coarse, np.bincount(cmap, weights=vweights, minlength=nc)
+
+
+def _gains(adj, labels):
+    """Cut reduction of moving each vertex to the other side"""
+    s = 2.0 * labels - 1
+    return -s * (adj @ s)
+
+
+def _grow(adj, vweights, start, target):
+    """Side 0 grown from one vertex, always adding the most connected one"""
+    n = adj.shape[0]
+    labels = np.ones(n, dtype=np.int64)
+    conn = np.zeros(n)
+    area = 0.0
+    v = start
+    while area < target:
+        labels[v] = 0
+        area += vweights[v]
+        row = slice(adj.indptr[v], adj.indptr[v + 1])
+        conn[adj.indices[row]] += adj.data[row]
+        conn[v] = -np.inf
+        if not np.isfinite(conn).any():
+            break
+        v = int(np.argmax(conn))
+    return labels
+
+
+def _fm_pass(adj, vweights, labels, lo, hi):
+    """One Fiduccia-Mattheyses pass: move vertices once each, keep the best prefix
+
+    Moves continue through negative gains to climb out of local minima, but
+    stop FM_PATIENCE moves after the last improvement.
+    """
+    n = adj.shape[0]
+    # Gains of the unlocked vertices on each side; others are -inf
+    gain = _gains(adj, labels)
+    gains = [np.where(labels == 0, gain, -np.inf), np.where(labels == 1, gain, -np.inf)]
+    side0 = float(vweights[labels == 0].sum())
+    moved = []
+    total = best = 0.0
+    best_at = 0
+    for step in range(n):
+        v0, v1 = int(np.argmax(gains[0])), int(np.argmax(gains[1]))
+        fits0 = gains[0][v0] > -np.inf and side0 - vweights[v0] >= lo
+        fits1 = gains[1][v1] > -np.inf and side0 + vweights[v1] <= hi
+        if fits0 and (not fits1 or gains[0][v0] >= gains[1][v1]):
+            v, side = v0, 0
+        elif fits1:
+            v, side = v1, 1
+        else:
+            # The best vertex of each side is too heavy to move: lighter ones
+            afters = np.where(labels == 0, side0 - vweights, side0 + vweights)
+            best_gain = np.maximum(gains[0], gains[1])
+            allowed = (afters >= lo) & (afters <= hi) & (best_gain > -np.inf)
+            if not allowed.any():
+                break
+            v = int(np.argmax(np.where(allowed, best_gain, -np.inf)))
+            side = int(labels[v])
+        total += gains[side][v]
+        side0 += -vweights[v] if side == 0 else vweights[v]
+        labels[v] ^= 1
+        gains[side][v] = -np.inf
+        moved.append(v)
+        row = slice(adj.indptr[v], adj.indptr[v + 1])
+        u, w = adj.indices[row], adj.data[row]
+        delta = np.where(labels[u] == labels[v], -2 * w, 2 * w)
+        gains[0][u] += delta
+        gains[1][u] += delta
+        if total > best + 1e-12:
+            best, best_at = total, step + 1
+        elif step + 1 - best_at >= FM_PATIENCE:
+            break
+    for v in moved[best_at:]:
+        labels[v] ^= 1
+    return best
+
+
+def _batch_pass(adj, vweights, labels, lo, hi):
+    """Move every positive-gain vertex of one side at a time, within balance
+
+    An edge between two vertices leaving the same side stays uncut although
+    each gain counted it as newly cut, so moving them together never does
+    worse than the sum of their gains.
+    """
+    improved = 0.0
+    for side in (0, 1):
+        gain = _gains(adj, labels)
+        candidates = np.flatnonzero((labels == side) & (gain > 0))
+        if len(candidates) == 0:
+            continue
+        candidates = candidates[np.argsort(-gain[candidates], kind='stable')]
+        side0 = float(vweights[labels == 0].sum())
+        room = side0 - lo if side == 0 else hi - side0
+        fits = np.cumsum(vweights[candidates]) <= room
+        chosen = candidates[fits]
+        labels[chosen] = 1 - side
+        improved += float(gain[chosen].sum())
+    return improved
+
+
+def _rebalance(vweights, labels, gain, lo, hi):
+    """Move the cheapest vertices off an overfull side until it fits"""
+    side0 = float(vweights[labels == 0].sum())
+    if lo <= side0 <= hi:
+        return
+    heavy = 0 if side0 > hi else 1
+    over = side0 - hi if heavy == 0 else lo - side0
+    candidates = np.flatnonzero(labels == heavy)
+    candidates = candidates[np.argsort(-gain[candidates], kind='stable')]
+    count = int(np.searchsorted(np.cumsum(vweights[candidates]), over)) + 1
+    labels[candidates[:count]] = 1 - heavy
+
+
+def refine(adj, vweights, labels, passes=FM_PASSES):
+    """Improve a bisection in place (FM for small graphs, batched moves otherwise)"""
+    lo, hi = _bounds(vweights)
+    _rebalance(vweights, labels, _gains(adj, labels), lo, hi)
+    step = _fm_pass if adj.shape[0] <= FM_EXACT else _batch_pass
+    for _ in range(passes):
+        if step(adj, vweights, labels, lo, hi) <= 1e-12:
+            break
+    return labels
+
+
+def _initial_bisection(adj, vweights, rng):
+    """Best refined greedy-growing bisection of a small graph"""
+    n = adj.shape[0]
+    target = vweights.sum() / 2
+    best, best_cut = None, np.inf
+    for start in rng.choice(n, size=min(INITIAL_TRIES, n), replace=False):
+        labels = refine(adj, vweights, _grow(adj, vweights, int(start), target))
+        cut = cut_weight(adj, labels)
+        if cut < best_cut:
+            best, best_cut = labels, cut
+    return best
+
+
+def multilevel_bisect(adj, vweights, seed=0):
+    """Min-cut bisection of a weighted graph by multilevel coarsening and FM
+
+    The graph is coarsened by heavy-edge matching down to about COARSEST
+    vertices, bisected there by greedy growing, and the labels projected
+    back level by level with refinement at each. Returns 0/1 labels.
+    """
+    n = adj.shape[0]
+    if n < 2:
+        return np.zeros(n, dtype=np.int64)
+    rng = np.random.default_rng(seed)
+    vweights = np.asarray(vweights, dtype=np.float64)
+    max_weight = max(3 * vweights.sum() / COARSEST, float(vweights.max()))
+    levels = []
+    graph, weights = adj, vweights
+    while graph.shape[0] > COARSEST:
+        cmap = _match(graph, weights, rng, max_weight)
+        nc = int(cmap.max()) + 1
+        if nc > (1 - MIN_SHRINK) * graph.shape[0]:
+            break
+        levels.append((graph, weights, cmap))
+        graph, weights = _contract(graph, weights, cmap, nc)
+
+    labels = _initial_bisection(graph, weights, rng)
+    for graph, weights, cmap in reversed(levels):
+        labels = refine(graph, weights, labels[cmap])
+    return labels
+
+
+def _normalized(adj):
+    """D^-1/2 A D^-1/2 (isolated vertices get zero rows)"""
+    degree = np.asarray(adj.sum(axis=1)).ravel()
+    scale = np.zeros_like(degree)
+    np.divide(1.0, np.sqrt(degree), out=scale, where=degree > 0)
+    return sparse.diags(scale) @ adj @ sparse.diags(scale), scale
+
+
+def _top_eigenvectors(matrix, k, seed):
+    """Eigenvectors of the k largest eigenvalues of a symmetric matrix"""
+    n = matrix.shape[0]
+    if n <= 2 * k + 16:
+        values, vectors = np.linalg.eigh(matrix.toarray())
+        return vectors[:, ::-1][:, :k]
+    v0 = np.random.default_rng(seed).random(n)
+    try:
+        values, vectors = eigsh(matrix, k=k, which='LA', v0=v0, tol=EIGEN_TOLERANCE, maxiter=20 * n)
+    except ArpackNoConvergence as e:
+        values, vectors = e.eigenvalues, e.eigenvectors
+        if len(values) < k:
+            raise
+    return vectors[:, np.argsort(-values)]
+
+
+def spectral_bisect(adj, vweights, seed=0):
+    """Min-cut bisection from the Fiedler vector, split at the area median
+
+    The second eigenvector of the normalized adjacency (the Fiedler vector
+    of the normalized Laplacian) orders the vertices; the split puts half
+    the area on each side and FM refinement cleans up the boundary.
+    """
+    n = adj.shape[0]
+    if n < 2:
+        return np.zeros(n, dtype=np.int64)
+    vweights = np.asarray(vweights, dtype=np.float64)
+    matrix, scale = _normalized(adj)
+    try:
+        fiedler = _top_eigenvectors(matrix, 2, seed)[:, 1] * scale
+    except (ArpackNoConvergence, ArpackError):
+        return multilevel_bisect(adj, vweights, seed)
+    order = np.argsort(fiedler, kind='stable')
+    labels = np.ones(n, dtype=np.int64)
+    half = int(np.searchsorted(np.cumsum(vweights[order]), vweights.sum() / 2)) + 1
+    labels[order[:min(half, n - 1)]] = 0
+    return refine(adj, vweights, labels)
+
+
+def spectral_clusters(adj, k, seed=0):
+    """Flat k-way clustering: k-means++ on the rows of the top eigenvectors
+
+    Up to EMBEDDING_DIM eigenvectors of the normalized adjacency are used,
+    row-normalized, whatever k is.
+    """
+    n = adj.shape[0]
+    k = min(k, n)
+    matrix, _ = _normalized(adj)
+    embedding = _top_eigenvectors(matrix, min(k, EMBEDDING_DIM), seed)
+    norms = np.linalg.norm(embedding, axis=1, keepdims=True)
+    embedding = embedding / np.where(norms > 0, norms, 1)
+
+    rng = np.random.default_rng(seed)
+    centers = [embedding[rng.integers(n)]]
+    nearest = ((embedding - centers[0]) ** 2).sum(axis=1)
+    for _ in range(1, k):
+        total = nearest.sum()
+        pick = rng.choice(n, p=nearest / total) if total > 0 else rng.integers(n)
+        centers.append(embedding[pick])
+        nearest = np.minimum(nearest, ((embedding - embedding[pick]) ** 2).sum(axis=1))
+    centers = np.array(centers)
+
+    labels = np.zeros(n, dtype=np.int64)
+    for iteration in range(KMEANS_ITERATIONS):
+        distances = (embedding ** 2).sum(axis=1)[:, None] - 2 * embedding @ centers.T + (centers ** 2).sum(axis=1)
+        new = np.argmin(distances, axis=1)
+        if iteration and np.array_equal(new, labels):
+            break
+        labels = new
+        counts = np.bincount(labels, minlength=k)
+        sums = np.zeros_like(centers)
+        np.add.at(sums, labels, embedding)
+        filled = counts > 0
+        centers[filled] = sums[filled] / counts[filled, None]
+    return np.unique(labels, return_inverse=True)[1]
+
+
+BISECTORS = {'multilevel': multilevel_bisect, 'spectral': spectral_bisect}
+
+
+class ClusterTree:
+    """Binary hierarchy of block clusters, refined by min-cut bisection on demand
+
+    order lists the block ids so that every node's members are the range
+    order[start[node]:end[node]]; node 0 is the root holding every block.
+    Nodes are only bisected when asked to (refine for the largest ones,
+    expand for a chosen one), so a 50k-block design costs a few hundred
+    bisections to show, not the full hierarchy. A frontier is a sorted
+    array of nodes whose ranges tile the blocks exactly once: the clusters
+    currently shown.
+    """
+
+    def __init__(self, adj, areas, method='multilevel', leaf_size=LEAF_SIZE, seed=0):
+        if method not in BISECTORS:
+            raise ValueError(f"Unknown partitioning method: {method}")
+        self.adj = adj
+        self.areas = np.asarray(areas, dtype=np.float64)
+        self.bisect = BISECTORS[method]
+        self.leaf_size = leaf_size
+        self.seed = seed
+        n = len(self.areas)
+        self.order = np.arange(n)
+        self.start, self.end = [0], [n]
+        self.left, self.right, self.parent = [-1], [-1], [-1]
+        self.area = [float(self.areas.sum())]
+        # Nodes whose bisection put everything on one side
+        self.atomic = set()
+
+    @classmethod
+    def build(cls, n, src, dst, weights, areas, max_clusters=VISIBLE_CLUSTERS, leaf_size=LEAF_SIZE,
+              method='multilevel', seed=0, progress=None):
+        """Hierarchy of n blocks refined down to max_clusters clusters"""
+        tree = cls(adjacency(n, src, dst, weights), areas, method, leaf_size, seed)
+        tree.refine(max_clusters, progress)
+        return tree
+
+    def __len__(self):
+        return len(self.start)
+
+    def size(self, node):
+        return self.end[node] - self.start[node]
+
+    def is_leaf(self, node):
+        return self.left[node] < 0
+
+    def can_split(self, node):
+        return not self.is_leaf(node) or (self.size(node) > self.leaf_size and node not in self.atomic)
+
+    def members(self, node):
+        """Block ids of a cluster"""
+        return self.order[self.start[node]:self.end[node]]
+
+    def split(self, node):
+        """Bisect a leaf cluster into two children; False when it cannot be split"""
+        if not self.is_leaf(node):
+            return True
+        if not self.can_split(node):
+            return False
+        lo, hi = self.start[node], self.end[node]
+        ids = self.order[lo:hi]
+        labels = self.bisect(self.adj[ids][:, ids], self.areas[ids], self.seed + node)
+        if labels.all() or not labels.any():
+            self.atomic.add(node)
+            return False
+        self.order[lo:hi] = ids[np.argsort(labels, kind='stable')]
+        mid = lo + int(np.count_nonzero(labels == 0))
+        left_area = float(self.areas[ids[labels == 0]].sum())
+        for a, b, area in ((lo, mid, left_area), (mid, hi, self.area[node] - left_area)):
+            self.start.append(a)
+            self.end.append(b)
+            self.left.append(-1)
+            self.right.append(-1)
+            self.parent.append(node)
+            self.area.append(area)
+        self.left[node], self.right[node] = len(self.start) - 2, len(self.start) - 1
+        return True
+
+    def refine(self, max_clusters, progress=None):
+        """Split the largest leaves until there are max_clusters of them
+
+        progress(fraction), if given, is called after every split.
+        """
+        leaves = [v for v in range(len(self)) if self.is_leaf(v)]
+        heap = [(-self.area[v], v) for v in leaves if self.can_split(v)]
+        heapq.heapify(heap)
+        count = len(leaves)
+        while heap and count < max_clusters:
+            _, node = heapq.heappop(heap)
+            if not self.split(node):
+                continue
+            count += 1
+            for child in (self.left[node], self.right[node]):
+                if self.can_split(child):
+                    heapq.heappush(heap, (-self.area[child], child))
+            if progress is not None:
+                progress(count / max_clusters)
+
+    def frontier(self, max_clusters=VISIBLE_CLUSTERS):
+        """Up to max_clusters already-split nodes tiling the blocks, largest clusters opened first"""
+        nodes = {0}
+        heap = [] if self.is_leaf(0) else [(-self.area[0], 0)]
+        while heap and len(nodes) < max_clusters:
+            _, node = heapq.heappop(heap)
+            nodes.remove(node)
+            for child in (self.left[node], self.right[node]):
+                nodes.add(child)
+                if not self.is_leaf(child):
+                    heapq.heappush(heap, (-self.area[child], child))
+        return np.array(sorted(nodes))
+
+    def expand(self, frontier, node):
+        """Frontier with a cluster replaced by its two halves (bisecting it if needed)"""
+        if not self.split(node):
+            return frontier
+        kept = frontier[frontier != node]
+        return np.sort(np.concatenate([kept, [self.left[node], self.right[node]]]))
+
+    def collapse(self, frontier, node):
+        """Frontier with a cluster's parent shown in place of all its descendants"""
+        top = self.parent[node]
+        if top < 0:
+            return frontier
+        start, end = np.array(self.start)[frontier], np.array(self.end)[frontier]
+        inside = (start >= self.start[top]) & (end <= self.end[top])
+        return np.sort(np.concatenate([frontier[~inside], [top]]))
+
+    def labels(self, frontier):
+        """Index into frontier of the cluster holding each block"""
+        labels = np.empty(len(self.order), dtype=np.int64)
+        for i, node in enumerate(frontier.tolist()):
+            labels[self.members(node)] = i
+        return labels
+
+
+def collapse(blocks, connections, tree, frontier):
+    """Super-block design of a frontier as (BlockStore, NetStore, labels)
+
+    Each cluster becomes one square block with the summed area of its
+    members, centred on their area-weighted centroid and named after its
+    largest member. Nets between clusters are merged with summed weights;
+    nets inside a cluster are dropped. labels maps each block to its
+    super-block.
+    """
+    k = len(frontier)
+    labels = tree.labels(frontier)
+    area = np.bincount(labels, weights=blocks.area, minlength=k)
+    cx, cy = blocks.centers()
+    sx = np.bincount(labels, weights=cx * blocks.area, minlength=k) / area
+    sy = np.bincount(labels, weights=cy * blocks.area, minlength=k) / area
+
+    largest = np.lexsort((-blocks.area, labels))
+    first = largest[np.r_[True, labels[largest][1:] != labels[largest][:-1]]]
+    sizes = np.bincount(labels, minlength=k)
+    names = [blocks.names[int(i)] if size == 1 else f"{blocks.names[int(i)]}+{size - 1}"
+             for i, size in zip(first.tolist(), sizes.tolist())]
+
+    clustered = BlockStore(names, area)
+    clustered.x[:] = sx - clustered.width / 2
+    clustered.y[:] = sy - clustered.height / 2
+
+    a, b = labels[connections.src], labels[connections.dst]
+    between = a != b
+    keys = np.minimum(a, b)[between] * k + np.maximum(a, b)[between]
+    unique, inverse = np.unique(keys, return_inverse=True)
+    weights = np.bincount(inverse, weights=connections.weights[between], minlength=len(unique))
+    nets = NetStore.from_arrays(clustered.names, unique // k, unique % k, weights)
+    return clustered, nets, labels
+
+
+def apply_moves(blocks, labels, dx, dy):
+    """Move every block by its cluster's displacement; returns the ids that moved"""
+    moved = np.flatnonzero((dx[labels] != 0) | (dy[labels] != 0))
+    blocks.x[moved] += dx[labels[moved]]
+    blocks.y[moved] += dy[labels[moved]]
+    return moved
+
+
+class ClusterView:
+    """A flat design shown as the super-blocks of a cluster frontier
+
+    blocks and connections are the collapsed design the GUI edits; moving
+    a super-block moves nothing until write_back() shifts its members by
+    the same amount. Resizing a super-block does not change its members.
+    """
+
+    def __init__(self, flat_blocks, flat_connections, tree, frontier):
+        self.flat_blocks = flat_blocks
+        self.flat_connections = flat_connections
+        self.tree = tree
+        self.show(frontier)
+
+    def show(self, frontier):
+        """Collapse the flat design to a new frontier"""
+        self.frontier = frontier
+        self.blocks, self.connections, self.labels = collapse(self.flat_blocks, self.flat_connections,
+                                                              self.tree, frontier)
+        self.origin = (self.blocks.x.copy(), self.blocks.y.copy())
+
+    def write_back(self):
+        """Move each cluster's members as far as its super-block moved; returns their ids"""
+        x0, y0 = self.origin
+        moved = apply_moves(self.flat_blocks, self.labels, self.blocks.x - x0, self.blocks.y - y0)
+        self.origin = (self.blocks.x.copy(), self.blocks.y.copy())
+        return moved
+
+    def written_back(self):
+        """A copy of the flat blocks as write_back() would leave them, and the ids it moves
+
+        The flat design itself is untouched, so it can be saved without
+        leaving the view or recording an edit.
+        """
+        x0, y0 = self.origin
+        blocks = self.flat_blocks.copy()
+        return blocks, apply_moves(blocks, self.labels, self.blocks.x - x0, self.blocks.y - y0)
+
+    def expand(self, index):
+        """Split the super-block at index into its two halves; False if it is a leaf"""
+        frontier = self.tree.expand(self.frontier, self.frontier[index])
+        if len(frontier) == len(self.frontier):
+            return False
+        self.show(frontier)
+        return True
+
+    def merge(self, index):
+        """Replace the super-block at index and its siblings by their parent; False at the root"""
+        frontier = self.tree.collapse(self.frontier, self.frontier[index])
+        if np.array_equal(frontier, self.frontier):
+            return False
+        self.show(frontier)
+        return True
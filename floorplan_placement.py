@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+"""
+Floorplanning Tool - Automatic placement
+Force-directed global placement and simulated-annealing refinement
+"""
+
+import math
+from collections import deque
+
+import numpy as np
+
+from floorplan_metrics import incident_index, overlapping_pairs
+from floorplan_spatial import SpatialGrid
+
+# Fraction of the placement bounding box the blocks should fill before the
+# final overlap-removal iterations
+TARGET_UTILIZATION = 0.6
+
+
+class PlacementProblem:
+    """Block sizes and weighted nets to place, independent of the GUI
+
+    Positions are handled as block centers (cx, cy); widths and heights are
+    fixed during placement.
+    """
+
+    def __init__(self, width, height, src, dst, weights, overlap_weight=None):
+        self.width = np.asarray(width, dtype=np.float64)
+        self.height = np.asarray(height, dtype=np.float64)
+        self.src = np.asarray(src, dtype=np.int64)
+        self.dst = np.asarray(dst, dtype=np.int64)
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.n = len(self.width)
+        self.net_order, self.net_offsets = incident_index(self.src, self.dst, self.n)
+
+        # Weighted degree per block
+        self.degree = (np.bincount(self.src, self.weights, minlength=self.n) +
+                       np.bincount(self.dst, self.weights, minlength=self.n))
+
+        # Balance the overlap penalty against wirelength: sliding a block one
+        # side length into a neighbour should cost about as much as
+        # stretching its nets by the same distance
+        if overlap_weight is None:
+            mean_side = float(np.mean(np.sqrt(self.width * self.height))) if self.n else 1.0
+            mean_degree = float(np.mean(self.degree)) if self.n else 0.0
+            overlap_weight = 2.0 * max(mean_degree, 1.0) / max(mean_side, 1.0)
+        self.overlap_weight = overlap_weight
+
+    @classmethod
+    def from_stores(cls, blocks, connections, overlap_weight=None):
+        """Problem for the blocks and connections held by the GUI stores"""
+        return cls(blocks.width, blocks.height, connections.src, connections.dst,
+                   connections.weights, overlap_weight)
+
+    def bounds(self, cx, cy):
+        """Bounding boxes for the given centers"""
+        hw, hh = self.width / 2, self.height / 2
+        return np.column_stack([cx - hw, cy - hh, cx + hw, cy + hh])
+
+    def wirelength(self, cx, cy):
+        """Weighted Manhattan wirelength between block centers"""
+        return float(self.weights @ (np.abs(cx[self.src] - cx[self.dst]) +
+                                     np.abs(cy[self.src] - cy[self.dst])))
+
+    def cost(self, cx, cy):
+        """Wirelength plus the weighted total overlap area"""
+        overlap = overlapping_pairs(self.bounds(cx, cy))[2].sum()
+        return self.wirelength(cx, cy) + self.overlap_weight * float(overlap)
+
+    def initial_positions(self, seed=0):
+        """Random centers inside a square with room for every block"""
+        rng = np.random.default_rng(seed)
+        side = math.sqrt(float(np.sum(self.width * self.height)) * 1.5)
+        return rng.uniform(0, side, self.n), rng.uniform(0, side, self.n)
+
+
+def _spread(problem, cx, cy, step=0.5):
+    """Push blocks down the gradient of a binned area-density map
+
+    Block areas are histogrammed into roughly one bin per block over the
+    current extent (plus an empty border), so crowded regions expand into
+    their surroundings in O(n + bins).
+    """
+    n = problem.n
+    bins = int(min(max(math.sqrt(n), 4), 256))
+    area = problem.width * problem.height
+    pad = math.sqrt(float(area.mean()))
+    x0, x1 = cx.min() - pad, cx.max() + pad
+    y0, y1 = cy.min() - pad, cy.max() + pad
+    bin_w = (x1 - x0) / bins
+    bin_h = (y1 - y0) / bins
+
+    density, _, _ = np.histogram2d(cx, cy, bins=bins, range=[[x0, x1], [y0, y1]], weights=area)
+    density = np.pad(density / (bin_w * bin_h), 1)
+    gx, gy = np.gradient(density)
+
+    bx = np.clip(((cx - x0) / bin_w).astype(np.int64), 0, bins - 1) + 1
+    by = np.clip(((cy - y0) / bin_h).astype(np.int64), 0, bins - 1) + 1
+    dx = np.clip(-step * gx[bx, by], -1, 1) * bin_w
+    dy = np.clip(-step * gy[bx, by], -1, 1) * bin_h
+    return cx + dx, cy + dy
+
+
+def _separate(problem, cx, cy, rng):
+    """Push every overlapping pair apart along its smaller overlap axis"""
+    n = problem.n
+    bounds = problem.bounds(cx, cy)
+    i, j, _ = overlapping_pairs(bounds)
+    if len(i) == 0:
+        return cx, cy, 0
+    ox = np.minimum(bounds[i, 2], bounds[j, 2]) - np.maximum(bounds[i, 0], bounds[j, 0])
+    oy = np.minimum(bounds[i, 3], bounds[j, 3]) - np.maximum(bounds[i, 1], bounds[j, 1])
+    along_x = ox < oy
+    # Direction from j to i (random tie-break for coincident centers)
+    ties = rng.choice([-1.0, 1.0], len(i))
+    sx = np.sign(cx[i] - cx[j])
+    sy = np.sign(cy[i] - cy[j])
+    sx = np.where(sx == 0, ties, sx)
+    sy = np.where(sy == 0, ties, sy)
+    px = np.where(along_x, sx * ox / 2, 0.0)
+    py = np.where(along_x, 0.0, sy * oy / 2)
+    cx = cx + np.bincount(i, px, n) - np.bincount(j, px, n)
+    cy = cy + np.bincount(i, py, n) - np.bincount(j, py, n)
+    return cx, cy, len(i)
+
+
+def force_directed(problem, cx=None, cy=None, iterations=300, seed=0):
+    """Vectorized force-directed placement
+
+    Each iteration pulls every block toward the weighted centroid of its
+    neighbours and spreads crowded regions along the area-density gradient.
+    The pull fades out over the run. The result is then scaled up to the
+    target utilization and the last iterations push remaining overlapping
+    pairs apart directly.
+    """
+    if cx is None or cy is None:
+        cx, cy = problem.initial_positions(seed)
+    cx, cy = np.array(cx, dtype=np.float64), np.array(cy, dtype=np.float64)
+    if problem.n < 2:
+        return cx, cy
+    rng = np.random.default_rng(seed)
+    n, src, dst, w = problem.n, problem.src, problem.dst, problem.weights
+    connected = problem.degree > 0
+    degree = np.where(connected, problem.degree, 1.0)
+    global_iterations = int(iterations * 0.8)
+
+    for it in range(global_iterations):
+        # Attraction toward the weighted neighbour centroid
+        pull = 0.2 * (1.0 - it / global_iterations)
+        if len(src):
+            tx = (np.bincount(src, w * cx[dst], n) + np.bincount(dst, w * cx[src], n)) / degree
+            ty = (np.bincount(src, w * cy[dst], n) + np.bincount(dst, w * cy[src], n)) / degree
+            cx = np.where(connected, cx + pull * (tx - cx), cx)
+            cy = np.where(connected, cy + pull * (ty - cy), cy)
+
+        # Spreading away from crowded bins
+        for _ in range(2):
+            cx, cy = _spread(problem, cx, cy)
+
+    # Make sure the placement has room for every block before separating
+    required = float(np.sum(problem.width * problem.height)) / TARGET_UTILIZATION
+    current = float(np.ptp(cx) * np.ptp(cy))
+    if 0 < current < required:
+        scale = math.sqrt(required / current)
+        cx = cx.mean() + (cx - cx.mean()) * scale
+        cy = cy.mean() + (cy - cy.mean()) * scale
+
+    # Direct overlap removal once the density is even
+    for _ in range(iterations - global_iterations):
+        cx, cy, pairs = _separate(problem, cx, cy, rng)
+        if pairs == 0:
+            break
+
+    return cx, cy
+
+
+class _Annealer:
+    """Incremental cost bookkeeping for simulated annealing
+
+    State is kept in plain Python lists because each move touches only a
+    handful of nets and neighbours, where scalar code beats NumPy calls.
+    """
+
+    def __init__(self, problem, cx, cy, seed):
+        self.p = problem
+        self.cx = [float(v) for v in cx]
+        self.cy = [float(v) for v in cy]
+        self.hw = (problem.width / 2).tolist()
+        self.hh = (problem.height / 2).tolist()
+        self.overlap_weight = problem.overlap_weight
+
+        # Per-block (neighbour, weight) lists
+        self.neighbours = [[] for _ in range(problem.n)]
+        for a, b, w in zip(problem.src.tolist(), problem.dst.tolist(), problem.weights.tolist()):
+            self.neighbours[a].append((b, w))
+            self.neighbours[b].append((a, w))
+
+        self.index = SpatialGrid()
+        self.index.build_bounds(problem.bounds(np.asarray(self.cx), np.asarray(self.cy)))
+
+    def block_cost(self, i):
+        """Wirelength of block i's nets plus its weighted overlap"""
+        cx, cy = self.cx, self.cy
+        x, y = cx[i], cy[i]
+        wl = 0.0
+        for j, w in self.neighbours[i]:
+            wl += w * (abs(x - cx[j]) + abs(y - cy[j]))
+
+        boxes = self.index.boxes
+        x0, y0, x1, y1 = boxes[i]
+        overlap = 0.0
+        for j in self.index.candidates(x0, y0, x1, y1):
+            if j == i:
+                continue
+            bx0, by0, bx1, by1 = boxes[j]
+            if bx0 < x1 and x0 < bx1 and by0 < y1 and y0 < by1:
+                overlap += (min(x1, bx1) - max(x0, bx0)) * (min(y1, by1) - max(y0, by0))
+        return wl + self.overlap_weight * overlap
+
+    def place(self, i, x, y):
+        """Move block i's center"""
+        hw, hh = self.hw[i], self.hh[i]
+        self.cx[i], self.cy[i] = x, y
+        self.index.move(i, (x - hw, y - hh, x + hw, y + hh))
+
+    def move_delta(self, i, x, y):
+        """Apply a move and return its cost delta"""
+        before = self.block_cost(i)
+        self.place(i, x, y)
+        return self.block_cost(i) - before
+
+    def swap_delta(self, i, j):
+        """Swap two block centers and return the cost delta"""
+        xi, yi, xj, yj = self.cx[i], self.cy[i], self.cx[j], self.cy[j]
+        delta = self.move_delta(i, xj, yj)
+        return delta + self.move_delta(j, xi, yi)
+
+
+def anneal(problem, cx, cy, moves=None, seed=0, swap_fraction=0.2, initial_acceptance=0.3):
+    """Simulated-annealing refinement with incremental cost deltas
+
+    Moves displace one block (by a radius shrinking with temperature) or swap
+    two blocks. Each move only re-scores the nets and neighbours of the
+    blocks it touches.
+    """
+    n = problem.n
+    if n < 2:
+        return np.array(cx, dtype=np.float64), np.array(cy, dtype=np.float64)
+    moves = moves if moves is not None else 10 * n
+    rng = np.random.default_rng(seed)
+    state = _Annealer(problem, cx, cy, seed)
+
+    mean_side = float(np.mean(np.sqrt(problem.width * problem.height)))
+    spread = max(float(np.ptp(cx)), float(np.ptp(cy)), mean_side)
+
+    # Pick the start temperature so a typical uphill move is accepted with
+    # the requested probability
+    samples = []
+    for i in rng.integers(0, n, min(200, n)).tolist():
+        x, y = state.cx[i], state.cy[i]
+        delta = state.move_delta(i, x + rng.normal(0, mean_side), y + rng.normal(0, mean_side))
+        state.place(i, x, y)
+        if delta > 0:
+            samples.append(delta)
+    t0 = (np.mean(samples) / -math.log(initial_acceptance)) if samples else 1.0
+    t_end = t0 * 1e-3
+    cooling = (t_end / t0) ** (1.0 / max(moves, 1))
+
+    temperature = t0
+    blocks = rng.integers(0, n, moves).tolist()
+    others = rng.integers(0, n, moves).tolist()
+    kinds = (rng.random(moves) < swap_fraction).tolist()
+    accept_draws = rng.random(moves).tolist()
+    steps = rng.normal(0, 1, (moves, 2)).tolist()
+
+    for k in range(moves):
+        i = blocks[k]
+        if kinds[k] and others[k] != i:
+            j = others[k]
+            delta = state.swap_delta(i, j)
+            if delta > 0 and accept_draws[k] >= math.exp(-delta / temperature):
+                state.swap_delta(i, j)
+        else:
+            radius = max(mean_side * 0.1, spread * 0.25 * temperature / t0)
+            x, y = state.cx[i], state.cy[i]
+            delta = state.move_delta(i, x + steps[k][0] * radius, y + steps[k][1] * radius)
+            if delta > 0 and accept_draws[k] >= math.exp(-delta / temperature):
+                state.place(i, x, y)
+        temperature *= cooling
+
+    return np.array(state.cx), np.array(state.cy)
+
+
+def grow_partitions(problem, parts, seed=0):
+    """Split the block graph into connected-ish parts by BFS growing
+
+    Parts are grown one after another from random unvisited roots until each
+    holds about n / parts blocks. Returns a part label per block.
+    """
+    n = problem.n
+    rng = np.random.default_rng(seed)
+    labels = np.full(n, -1, dtype=np.int64)
+    order, offsets = problem.net_order, problem.net_offsets
+    src, dst = problem.src, problem.dst
+    target = math.ceil(n / max(parts, 1))
+    unvisited = rng.permutation(n).tolist()
+
+    part, size, queue = 0, 0, deque()
+    while unvisited or queue:
+        if queue:
+            b = queue.popleft()
+        else:
+            b = unvisited.pop()
+        if labels[b] >= 0:
+            continue
+        if size >= target:
+            part, size = part + 1, 0
+            queue.clear()
+        labels[b] = part
+        size += 1
+        nets = order[offsets[b]:offsets[b + 1]]
+        neighbours = np.where(src[nets] == b, dst[nets], src[nets])
+        queue.extend(int(j) for j in neighbours if labels[j] < 0)
+    return labels
+
+
+def partition_positions(problem, parts, seed=0):
+    """Initial centers with each graph part scattered inside its own tile"""
+    rng = np.random.default_rng(seed)
+    labels = grow_partitions(problem, parts, seed)
+    n_parts = int(labels.max()) + 1 if problem.n else 0
+    columns = max(1, math.ceil(math.sqrt(n_parts)))
+    side = math.sqrt(float(np.sum(problem.width * problem.height)) * 1.5)
+    tile = side / columns
+    cx = (labels % columns) * tile + rng.uniform(0, tile, problem.n)
+    cy = (labels // columns) * tile + rng.uniform(0, tile, problem.n)
+    return cx, cy
+
+
+def place(problem, method='both', cx=None, cy=None, iterations=300, moves=None, seed=0):
+    """Run the placer on a PlacementProblem and return the new centers
+
+    method is 'force', 'anneal' (from the given centers) or 'both'. The
+    force-directed pass starts from cx, cy when given, else from a random
+    scatter.
+    """
+    if method not in ('force', 'anneal', 'both'):
+        raise ValueError(f"Unknown placement method: {method}")
+    if method in ('force', 'both'):
+        cx, cy = force_directed(problem, cx, cy, iterations=iterations, seed=seed)
+    if method in ('anneal', 'both'):
+        cx, cy = anneal(problem, cx, cy, moves=moves, seed=seed)
+    return cx, cy
+
+
+def box_centers(blocks):
+    """Bounding-box centers of a BlockStore, the positions the placers work in
+
+    Not BlockStore.centers(): those are area centroids, which sit off the box
+    center for shaped blocks.
+    """
+    return blocks.x + blocks.width / 2, blocks.y + blocks.height / 2
+
+
+def write_positions(blocks, problem, cx, cy):
+    """Store placed centers in a BlockStore and return the final cost
+
+    The placement is shifted so its lower-left corner sits at the origin
+    offset the default grid uses.
+    """
+    x = cx - problem.width / 2
+    y = cy - problem.height / 2
+    if len(x):
+        x += 100 - x.min()
+        y += 100 - y.min()
+    blocks.x[:] = x
+    blocks.y[:] = y
+
+    return {
+        'cost': problem.cost(cx, cy),
+        'wirelength': problem.wirelength(cx, cy),
+        'overlap_weight': problem.overlap_weight,
+    }
+
+
+def auto_place(blocks, connections, method='both', iterations=300, moves=None, seed=0,
+               overlap_weight=None):
+    """Place the blocks of a BlockStore in place and return the final cost
+
+    method is 'force', 'anneal' (from the current positions), 'both' or
+    'analytic' (quadratic placement, see floorplan_analytic).
+    """
+    if method == 'analytic':
+        # SciPy is only needed for the analytic placer
+        from floorplan_analytic import analytic_place
+
+        return analytic_place(blocks, connections, overlap_weight=overlap_weight)
+    problem = PlacementProblem.from_stores(blocks, connections, overlap_weight)
+    if method == 'anneal':
+        cx, cy = place(problem, method, *box_centers(blocks), moves=moves, seed=seed)
+    else:
+        cx, cy = place(problem, method, iterations=iterations, moves=moves, seed=seed)
+    return write_positions(blocks, problem, cx, cy)
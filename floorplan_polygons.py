@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+"""
+Floorplanning Tool - Rectilinear block shapes
+L, T and U shapes and free-form orthogonal polygons as flat vertex arrays
+"""
+
+import numpy as np
+
+# Shape type codes stored per block
+SHAPE_TYPES = ('rectangle', 'lshape', 'tshape', 'ushape', 'polygon')
+RECTANGLE, LSHAPE, TSHAPE, USHAPE, POLYGON = range(len(SHAPE_TYPES))
+
+# Notch size as a fraction of the bounding box (width and height) and its range
+DEFAULT_NOTCH = 0.5
+NOTCH_MIN = 0.05
+NOTCH_MAX = 0.95
+
+# Smallest bounding-box side an edit may produce
+MIN_SIDE = 10.0
+
+
+def _template(code, a, b):
+    """Unit-square outlines (counter-clockwise) of a parametric shape as (k, m) u, v arrays
+
+    a and b are the notch width and height fractions:
+    - lshape: an a × b notch cut from the top-right corner
+    - tshape: two (a/2) × b notches cut from the bottom corners
+    - ushape: an a × b notch cut from the middle of the top edge
+    """
+    zero, one = np.zeros_like(a), np.ones_like(a)
+    if code == RECTANGLE:
+        u, v = [zero, one, one, zero], [zero, zero, one, one]
+    elif code == LSHAPE:
+        u = [zero, one, one, 1 - a, 1 - a, zero]
+        v = [zero, zero, 1 - b, 1 - b, one, one]
+    elif code == TSHAPE:
+        u = [a / 2, 1 - a / 2, 1 - a / 2, one, one, zero, zero, a / 2]
+        v = [zero, zero, b, b, one, one, b, b]
+    elif code == USHAPE:
+        u = [zero, one, one, (1 + a) / 2, (1 + a) / 2, (1 - a) / 2, (1 - a) / 2, zero]
+        v = [zero, zero, one, one, 1 - b, 1 - b, one, one]
+    else:
+        raise ValueError(f"Not a parametric shape: {code}")
+    return np.column_stack(u), np.column_stack(v)
+
+
+def _template_rectangles(code, a, b):
+    """Disjoint unit-square rectangles covering a parametric shape as (k, r, 4) u0, v0, u1, v1"""
+    zero, one = np.zeros_like(a), np.ones_like(a)
+    if code == RECTANGLE:
+        rects = [(zero, zero, one, one)]
+    elif code == LSHAPE:
+        rects = [(zero, zero, one, 1 - b), (zero, 1 - b, 1 - a, one)]
+    elif code == TSHAPE:
+        rects = [(a / 2, zero, 1 - a / 2, b), (zero, b, one, one)]
+    elif code == USHAPE:
+        rects = [(zero, zero, one, 1 - b), (zero, 1 - b, (1 - a) / 2, one), ((1 + a) / 2, 1 - b, one, one)]
+    else:
+        raise ValueError(f"Not a parametric shape: {code}")
+    return np.stack([np.column_stack(r) for r in rects], axis=1)
+
+
+def polygon_area(u, v):
+    """Signed shoelace area of one closed polygon"""
+    return 0.5 * float(np.dot(u, np.roll(v, -1)) - np.dot(np.roll(u, -1), v))
+
+
+def polygon_rectangles(u, v):
+    """Disjoint rectangles covering an orthogonal polygon (even-odd slabs between vertex ys)"""
+    u0, v0 = np.asarray(u, dtype=np.float64), np.asarray(v, dtype=np.float64)
+    u1, v1 = np.roll(u0, -1), np.roll(v0, -1)
+    vertical = u0 == u1
+    ex = u0[vertical]
+    elo, ehi = np.minimum(v0, v1)[vertical], np.maximum(v0, v1)[vertical]
+
+    rects = []
+    ys = np.unique(v0)
+    for lo, hi in zip(ys[:-1].tolist(), ys[1:].tolist()):
+        mid = (lo + hi) / 2
+        xs = np.sort(ex[(elo < mid) & (ehi > mid)])
+        rects.extend((x0, lo, x1, hi) for x0, x1 in zip(xs[0::2].tolist(), xs[1::2].tolist()))
+    return np.array(rects, dtype=np.float64).reshape(-1, 4)
+
+
+class PolygonTable:
+    """Unit-square outlines of free-form blocks as flat vertex arrays plus offsets
+
+    Block i's outline is u[offsets[i]:offsets[i + 1]] (and v), in fractions of
+    its bounding box, so moving or resizing a block never touches it. Blocks
+    that are not free-form polygons have an empty range.
+    """
+
+    def __init__(self, n=0):
+        self.u = np.zeros(0)
+        self.v = np.zeros(0)
+        self.offsets = np.zeros(n + 1, dtype=np.int64)
+        self._rectangles = {}
+
+    @classmethod
+    def from_arrays(cls, u, v, offsets):
+        table = cls.__new__(cls)
+        table.u, table.v, table.offsets = u, v, offsets
+        table._rectangles = {}
+        return table
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def get(self, i):
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return self.u[start:end], self.v[start:end]
+
+    def set(self, i, u, v):
+        """Replace block i's outline (splices the flat arrays)"""
+        start, end = self.offsets[i], self.offsets[i + 1]
+        self.u = np.concatenate([self.u[:start], np.asarray(u, dtype=np.float64), self.u[end:]])
+        self.v = np.concatenate([self.v[:start], np.asarray(v, dtype=np.float64), self.v[end:]])
+        self.offsets = self.offsets.copy()
+        self.offsets[i + 1:] += len(u) - (end - start)
+        self._rectangles.pop(i, None)
+
+    def rectangles(self, i):
+        """Unit rectangles covering block i's outline (cached until it changes)"""
+        if i not in self._rectangles:
+            self._rectangles[i] = polygon_rectangles(*self.get(i))
+        return self._rectangles[i]
+
+    def copy(self):
+        return PolygonTable.from_arrays(self.u.copy(), self.v.copy(), self.offsets.copy())
+
+    def nbytes(self):
+        return self.u.nbytes + self.v.nbytes + self.offsets.nbytes
+
+
+def _ids(blocks, ids):
+    return np.arange(len(blocks)) if ids is None else np.asarray(ids, dtype=np.int64).reshape(-1)
+
+
+def _shaped(blocks, ids):
+    """Whether any of the ids is not a plain rectangle"""
+    codes = blocks.shape_code if ids is None else blocks.shape_code[ids]
+    return bool(codes.any())
+
+
+def unit_rectangles(blocks, ids=None):
+    """Unit rectangles of the given blocks as ((k, 4) u0, v0, u1, v1, owner ids), grouped by owner"""
+    ids = _ids(blocks, ids)
+    codes = blocks.shape_code[ids]
+    parts, owners = [], []
+    for code in np.unique(codes).tolist():
+        sel = ids[codes == code]
+        if code == POLYGON:
+            for i in sel.tolist():
+                rects = blocks.polygons.rectangles(i)
+                parts.append(rects)
+                owners.append(np.full(len(rects), i, dtype=np.int64))
+            continue
+        rects = _template_rectangles(code, blocks.notch_w[sel], blocks.notch_h[sel])
+        parts.append(rects.reshape(-1, 4))
+        owners.append(np.repeat(sel, rects.shape[1]))
+    if not parts:
+        return np.zeros((0, 4)), np.zeros(0, dtype=np.int64)
+    rects, owner = np.concatenate(parts), np.concatenate(owners)
+    order = np.argsort(owner, kind='stable')
+    return rects[order], owner[order]
+
+
+def rectangles(blocks, ids=None):
+    """Absolute rectangles covering the given blocks as ((k, 4) x0, y0, x1, y1, owner ids)
+
+    For plain rectangles these are the bounding boxes, one per block.
+    """
+    if not _shaped(blocks, ids):
+        ids = _ids(blocks, ids)
+        x, y = blocks.x[ids], blocks.y[ids]
+        return np.column_stack([x, y, x + blocks.width[ids], y + blocks.height[ids]]), ids
+    unit, owner = unit_rectangles(blocks, ids)
+    x, y, w, h = blocks.x[owner], blocks.y[owner], blocks.width[owner], blocks.height[owner]
+    return np.column_stack([x + unit[:, 0] * w, y + unit[:, 1] * h,
+                            x + unit[:, 2] * w, y + unit[:, 3] * h]), owner
+
+
+class RectangleCache:
+    """The rectangles covering every block, grouped by block, kept in step with edits
+
+    Block b owns rows offsets[b]:offsets[b + 1] of rects and owner. The
+    incremental overlap and legality updates diff against these rows, so
+    update() rewrites one block's rows in place, splicing only when a shape
+    change alters its piece count.
+    """
+
+    def __init__(self, blocks):
+        self.blocks = blocks
+        self.rebuild()
+
+    def rebuild(self):
+        blocks = self.blocks
+        self.rects, self.owner = rectangles(blocks)
+        self.offsets = np.zeros(len(blocks) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.owner, minlength=len(blocks)), out=self.offsets[1:])
+
+    def rebind(self, blocks):
+        """Follow another store with the same geometry (the cached rows stay valid)"""
+        self.blocks = blocks
+
+    def rows(self, block_id):
+        """Slice of a block's rows"""
+        return slice(self.offsets[block_id], self.offsets[block_id + 1])
+
+    def update(self, block_id):
+        """Re-read one block's rectangles and return the slice of its new rows"""
+        start, end = self.offsets[block_id], self.offsets[block_id + 1]
+        rects, _ = rectangles(self.blocks, [block_id])
+        if len(rects) != end - start:
+            # A shape change altered the piece count: splice the block's rows
+            self.rects = np.concatenate([self.rects[:start], rects, self.rects[end:]])
+            self.owner = np.concatenate([self.owner[:start], np.full(len(rects), block_id), self.owner[end:]])
+            self.offsets[block_id + 1:] += len(rects) - (end - start)
+            end = start + len(rects)
+        self.rects[start:end] = rects
+        return slice(start, end)
+
+
+def fill_fractions(blocks, ids=None):
+    """Share of each bounding box the shape covers (area = fill × width × height)"""
+    ids = _ids(blocks, ids)
+    codes = blocks.shape_code[ids]
+    fill = np.ones(len(ids))
+    notched = (codes != RECTANGLE) & (codes != POLYGON)
+    fill[notched] = 1 - blocks.notch_w[ids[notched]] * blocks.notch_h[ids[notched]]
+    for k in np.flatnonzero(codes == POLYGON).tolist():
+        fill[k] = abs(polygon_area(*blocks.polygons.get(ids[k])))
+    return fill
+
+
+def centers(blocks, ids=None):
+    """Area centroids of the given blocks as (cx, cy); the pin location of their nets"""
+    ids = _ids(blocks, ids)
+    cx = blocks.x[ids] + blocks.width[ids] / 2
+    cy = blocks.y[ids] + blocks.height[ids] / 2
+    shaped = np.flatnonzero(blocks.shape_code[ids])
+    if len(shaped) == 0:
+        return cx, cy
+
+    # Area-weighted mean of the covering rectangles, in unit coordinates,
+    # once per distinct block (ids may repeat, e.g. the ends of many nets)
+    distinct = np.unique(ids[shaped])
+    unit, owner = unit_rectangles(blocks, distinct)
+    area = (unit[:, 2] - unit[:, 0]) * (unit[:, 3] - unit[:, 1])
+    slot = np.searchsorted(distinct, owner)
+    total = np.bincount(slot, weights=area, minlength=len(distinct))
+    ux = np.bincount(slot, weights=area * (unit[:, 0] + unit[:, 2]) / 2, minlength=len(distinct)) / total
+    uy = np.bincount(slot, weights=area * (unit[:, 1] + unit[:, 3]) / 2, minlength=len(distinct)) / total
+    pos = np.searchsorted(distinct, ids[shaped])
+    sel = ids[shaped]
+    cx[shaped] = blocks.x[sel] + ux[pos] * blocks.width[sel]
+    cy[shaped] = blocks.y[sel] + uy[pos] * blocks.height[sel]
+    return cx, cy
+
+
+def vertices(blocks, ids=None):
+    """Absolute outlines as an (k, m, 2) array padded to the longest by repeating the last vertex
+
+    The padding adds zero-length edges only, so the result can go straight
+    into a PolyCollection.
+    """
+    ids = _ids(blocks, ids)
+    codes = blocks.shape_code[ids]
+    counts = np.full(len(ids), 4, dtype=np.int64)
+    counts[codes == LSHAPE] = 6
+    counts[(codes == TSHAPE) | (codes == USHAPE)] = 8
+    polygons = np.flatnonzero(codes == POLYGON)
+    offsets = blocks.polygons.offsets
+    counts[polygons] = offsets[ids[polygons] + 1] - offsets[ids[polygons]]
+    m = int(counts.max()) if len(ids) else 4
+
+    u = np.ones((len(ids), m))
+    v = np.ones((len(ids), m))
+    for code in np.unique(codes).tolist():
+        rows = np.flatnonzero(codes == code)
+        if code == POLYGON:
+            for k in rows.tolist():
+                pu, pv = blocks.polygons.get(ids[k])
+                u[k, :len(pu)], v[k, :len(pv)] = pu, pv
+                u[k, len(pu):], v[k, len(pv):] = pu[-1], pv[-1]
+            continue
+        tu, tv = _template(code, blocks.notch_w[ids[rows]], blocks.notch_h[ids[rows]])
+        u[rows, :tu.shape[1]], v[rows, :tv.shape[1]] = tu, tv
+        u[rows, tu.shape[1]:] = tu[:, -1:]
+        v[rows, tv.shape[1]:] = tv[:, -1:]
+
+    x, y = blocks.x[ids, None], blocks.y[ids, None]
+    return np.stack([x + u * blocks.width[ids, None], y + v * blocks.height[ids, None]], axis=2)
+
+
+def contains(blocks, ids, px, py):
+    """Mask over ids of the blocks whose shape contains the point (edges included)"""
+    ids = _ids(blocks, ids)
+    rects, owner = rectangles(blocks, ids)
+    hit = (rects[:, 0] <= px) & (px <= rects[:, 2]) & (rects[:, 1] <= py) & (py <= rects[:, 3])
+    return np.isin(ids, owner[hit])
+
+
+def _rescale(blocks, i, fill_before):
+    """Scale block i's box about its origin so its area survives a fill change"""
+    scale = np.sqrt(fill_before / fill_fractions(blocks, [i])[0])
+    blocks.width[i] *= scale
+    blocks.height[i] *= scale
+
+
+def set_width(blocks, i, width):
+    """Change the width of block i, adjusting the height to keep its area"""
+    if width <= MIN_SIDE:
+        return False
+    fill = fill_fractions(blocks, [i])[0]
+    height = blocks.area[i] / (fill * width)
+    if height <= MIN_SIDE:
+        return False
+    blocks.width[i], blocks.height[i] = width, height
+    return True
+
+
+def set_height(blocks, i, height):
+    """Change the height of block i, adjusting the width to keep its area"""
+    if height <= MIN_SIDE:
+        return False
+    fill = fill_fractions(blocks, [i])[0]
+    width = blocks.area[i] / (fill * height)
+    if width <= MIN_SIDE:
+        return False
+    blocks.width[i], blocks.height[i] = width, height
+    return True
+
+
+def set_shape(blocks, i, code):
+    """Switch block i to a parametric shape, keeping its area and aspect ratio"""
+    if code == POLYGON:
+        raise ValueError("Use set_polygon for free-form shapes")
+    fill = fill_fractions(blocks, [i])[0]
+    blocks.shape_code[i] = code
+    if code != RECTANGLE and not (NOTCH_MIN <= blocks.notch_w[i] <= NOTCH_MAX):
+        blocks.notch_w[i] = blocks.notch_h[i] = DEFAULT_NOTCH
+    _rescale(blocks, i, fill)
+
+
+def notch_point(blocks, i):
+    """Absolute position of the draggable inner notch corner of block i, or None"""
+    code = blocks.shape_code[i]
+    a, b = blocks.notch_w[i], blocks.notch_h[i]
+    if code == LSHAPE:
+        u, v = 1 - a, 1 - b
+    elif code == TSHAPE:
+        u, v = a / 2, b
+    elif code == USHAPE:
+        u, v = (1 - a) / 2, 1 - b
+    else:
+        return None
+    return blocks.x[i] + u * blocks.width[i], blocks.y[i] + v * blocks.height[i]
+
+
+def move_notch(blocks, i, dx, dy):
+    """Drag the notch corner of block i by (dx, dy), keeping the area
+
+    The notch fractions follow the corner, then the box is rescaled about
+    its origin so fill × width × height stays equal to the area.
+    """
+    code = blocks.shape_code[i]
+    du, dv = dx / blocks.width[i], dy / blocks.height[i]
+    if code == LSHAPE:
+        a, b = blocks.notch_w[i] - du, blocks.notch_h[i] - dv
+    elif code == TSHAPE:
+        a, b = blocks.notch_w[i] + 2 * du, blocks.notch_h[i] + dv
+    elif code == USHAPE:
+        a, b = blocks.notch_w[i] - 2 * du, blocks.notch_h[i] - dv
+    else:
+        return False
+    fill = fill_fractions(blocks, [i])[0]
+    blocks.notch_w[i] = min(max(a, NOTCH_MIN), NOTCH_MAX)
+    blocks.notch_h[i] = min(max(b, NOTCH_MIN), NOTCH_MAX)
+    _rescale(blocks, i, fill)
+    return True
+
+
+def set_polygon(blocks, i, xs, ys):
+    """Give block i a free-form orthogonal outline in absolute coordinates
+
+    The bounding box becomes the block's geometry and the enclosed area its
+    area. Raises ValueError for outlines with diagonal edges.
+    """
+    xs, ys = np.asarray(xs, dtype=np.float64), np.asarray(ys, dtype=np.float64)
+    if len(xs) < 4 or len(xs) != len(ys):
+        raise ValueError("An orthogonal polygon needs at least 4 vertices")
+    if np.any((xs != np.roll(xs, -1)) & (ys != np.roll(ys, -1))):
+        raise ValueError("Polygon edges must be horizontal or vertical")
+    x0, y0 = xs.min(), ys.min()
+    w, h = xs.max() - x0, ys.max() - y0
+    if w <= 0 or h <= 0:
+        raise ValueError("Polygon has no area")
+    u, v = (xs - x0) / w, (ys - y0) / h
+    if polygon_area(u, v) < 0:
+        u, v = u[::-1], v[::-1]
+    blocks.polygons.set(i, u, v)
+    blocks.shape_code[i] = POLYGON
+    blocks.x[i], blocks.y[i], blocks.width[i], blocks.height[i] = x0, y0, w, h
+    blocks.area[i] = polygon_area(u, v) * w * h
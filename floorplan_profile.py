@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Floorplanning Tool - Profiling
+Timing spans, frame breakdowns, an overlay and trace dumps for the hot paths
+"""
+
+import bisect
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+from floorplan_events import LATENCY_WINDOW, percentile
+
+# Finished spans kept for the Chrome trace (oldest dropped first, ~100 B each)
+TRACE_CAPACITY = 200_000
+
+# Upper edges (ms) of the frame-time histogram buckets; the last bucket is open
+HISTOGRAM_EDGES_MS = (0.5, 1, 2, 4, 8, 16, 33, 66)
+
+# Set to 1 to profile from startup, or to 'cprofile' to also run cProfile
+PROFILE_ENV = 'FLOORPLAN_PROFILE'
+
+# Overlay refresh interval
+OVERLAY_MS = 250
+
+
+class _NullSpan:
+    """Shared do-nothing span handed out while profiling is off"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    """One timed region; a frame span also collects its children's times"""
+
+    __slots__ = ('profiler', 'name', 'is_frame', 'start', 'parts', 'depth')
+
+    def __init__(self, profiler, name, is_frame):
+        self.profiler = profiler
+        self.name = name
+        self.is_frame = is_frame
+
+    def __enter__(self):
+        local = self.profiler._local
+        self.depth = getattr(local, 'depth', 0)
+        local.depth = self.depth + 1
+        if self.is_frame:
+            self.parts = {}
+            local.frames = getattr(local, 'frames', []) + [self]
+        self.start = self.profiler.clock()
+        return self
+
+    def __exit__(self, *exc):
+        end = self.profiler.clock()
+        local = self.profiler._local
+        local.depth = self.depth
+        frames = getattr(local, 'frames', None)
+        if self.is_frame:
+            frames.pop()
+        if frames and frames[-1].depth == self.depth - 1:
+            parts = frames[-1].parts
+            parts[self.name] = parts.get(self.name, 0.0) + end - self.start
+        self.profiler._record(self, end)
+        return False
+
+
+class Profiler:
+    """Timing spans for the interactive hot paths, cheap enough to leave on
+
+    with profiler.span(name) times a region; profiler.frame(name) also
+    breaks the frame down by the spans directly inside it. While disabled
+    both return one shared no-op context manager (well under a microsecond
+    per span). Enabled, a span costs a few microseconds: two clock reads, a
+    ring-buffer append for the Chrome trace and one for the per-name
+    percentiles. cProfile is separate and opt-in, as it slows every Python
+    call.
+    """
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.enabled = False
+        self.cprofile = None
+        self._local = threading.local()
+        self.reset()
+
+    def reset(self):
+        """Forget every recorded span and frame"""
+        self.origin = self.clock()
+        self.trace = deque(maxlen=TRACE_CAPACITY)
+        self.durations = {}
+        self.frame_times = deque(maxlen=LATENCY_WINDOW)
+        self.last_breakdown = {}
+
+    def enable(self, cprofile=False):
+        """Start recording spans (and cProfile of the calling thread if asked)"""
+        self.enabled = True
+        if cprofile and self.cprofile is None:
+            import cProfile
+
+            self.cprofile = cProfile.Profile()
+            self.cprofile.enable()
+
+    def disable(self):
+        """Stop recording; what was recorded stays available for dumps"""
+        self.enabled = False
+        if self.cprofile is not None:
+            self.cprofile.disable()
+
+    def span(self, name):
+        """Context manager timing a region"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, False)
+
+    def frame(self, name='frame'):
+        """Context manager timing a frame and the spans directly inside it"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, True)
+
+    def _record(self, span, end):
+        elapsed = end - span.start
+        self.trace.append((span.name, span.start, end, threading.get_ident()))
+        durations = self.durations.get(span.name)
+        if durations is None:
+            durations = self.durations.setdefault(span.name, deque(maxlen=LATENCY_WINDOW))
+        durations.append(elapsed)
+        if span.is_frame:
+            self.frame_times.append(elapsed)
+            breakdown = dict(span.parts)
+            breakdown['other'] = max(0.0, elapsed - sum(span.parts.values()))
+            self.last_breakdown = breakdown
+
+    def stats(self):
+        """Recent p50 / p99 / max (ms) and count of every span name"""
+        return {name: {'count': len(times),
+                       'p50_ms': percentile(times, 50) * 1e3,
+                       'p99_ms': percentile(times, 99) * 1e3,
+                       'max_ms': max(times, default=0.0) * 1e3}
+                for name, times in sorted(self.durations.items())}
+
+    def frame_stats(self):
+        """p50 / p99 / max (ms) of the recent frames"""
+        times = self.frame_times
+        return {'frames': len(times),
+                'p50_ms': percentile(times, 50) * 1e3,
+                'p99_ms': percentile(times, 99) * 1e3,
+                'max_ms': max(times, default=0.0) * 1e3}
+
+    def histogram(self):
+        """Recent frame counts per HISTOGRAM_EDGES_MS bucket (plus one open bucket)"""
+        counts = [0] * (len(HISTOGRAM_EDGES_MS) + 1)
+        for elapsed in self.frame_times:
+            counts[bisect.bisect_left(HISTOGRAM_EDGES_MS, elapsed * 1e3)] += 1
+        return counts
+
+    def summary(self):
+        """One-line summary for the log"""
+        s = self.frame_stats()
+        return (f"{s['frames']} frames, p50 {s['p50_ms']:.1f} ms / p99 {s['p99_ms']:.1f} ms / "
+                f"max {s['max_ms']:.1f} ms, {len(self.trace)} spans recorded")
+
+    def chrome_trace(self):
+        """Recorded spans as a Chrome trace (chrome://tracing, Perfetto)"""
+        pid = os.getpid()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        events = [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid,
+                   'args': {'name': names.get(tid, f"thread {tid}")}}
+                  for tid in sorted({tid for _, _, _, tid in self.trace})]
+        for name, start, end, tid in self.trace:
+            events.append({'name': name, 'ph': 'X', 'pid': pid, 'tid': tid,
+                           'ts': (start - self.origin) * 1e6, 'dur': (end - start) * 1e6})
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def dump_trace(self, path):
+        """Write the recorded spans as a Chrome trace JSON file"""
+        with open(path, 'w') as f:
+            json.dump(self.chrome_trace(), f)
+
+    def dump_cprofile(self, path):
+        """Write the cProfile statistics (pstats format) and stop cProfile"""
+        if self.cprofile is None:
+            raise ValueError("cProfile was not recording (enable it with cprofile=True)")
+        self.cprofile.dump_stats(path)
+        self.cprofile = None
+
+    def dump(self, path):
+        """Chrome trace for .json paths, cProfile statistics otherwise"""
+        if path.lower().endswith('.json'):
+            self.dump_trace(path)
+        else:
+            self.dump_cprofile(path)
+
+
+# The application-wide profiler; instrumented modules use span()/timed()
+PROFILER = Profiler()
+span = PROFILER.span
+
+if os.environ.get(PROFILE_ENV):
+    PROFILER.enable(cprofile=os.environ[PROFILE_ENV] == 'cprofile')
+
+
+def timed(name, frame=False):
+    """Decorator timing every call of a function as a span (or a frame)"""
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not PROFILER.enabled:
+                return function(*args, **kwargs)
+            with _Span(PROFILER, name, frame):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+class ProfileOverlay:
+    """Frame time, its breakdown and a latency histogram drawn over a Tk widget
+
+    A small canvas placed in the widget's top-right corner, redrawn every
+    OVERLAY_MS while shown. It is a Tk widget, not part of the matplotlib
+    figure, so it never invalidates the blit background.
+    """
+
+    WIDTH = 260
+    HEIGHT = 200
+
+    def __init__(self, parent, profiler=PROFILER):
+        import tkinter as tk
+
+        self.parent = parent
+        self.profiler = profiler
+        self.canvas = tk.Canvas(parent, width=self.WIDTH, height=self.HEIGHT, bg='#202020',
+                                highlightthickness=0)
+        self.after_id = None
+
+    def show(self):
+        self.canvas.place(relx=1.0, x=-10, y=10, anchor='ne')
+        self.canvas.lift()
+        if self.after_id is None:
+            self.refresh()
+
+    def hide(self):
+        if self.after_id is not None:
+            self.canvas.after_cancel(self.after_id)
+            self.after_id = None
+        self.canvas.place_forget()
+
+    def refresh(self):
+        """Redraw from the profiler's recent frames"""
+        self.after_id = self.canvas.after(OVERLAY_MS, self.refresh)
+        c = self.canvas
+        c.delete('all')
+        s = self.profiler.frame_stats()
+        lines = [f"frame p50 {s['p50_ms']:.2f} ms  p99 {s['p99_ms']:.2f} ms",
+                 f"max {s['max_ms']:.2f} ms over {s['frames']} frames"]
+        breakdown = sorted(self.profiler.last_breakdown.items(), key=lambda item: -item[1])
+        lines += [f"  {name:<16} {seconds * 1e3:7.2f} ms" for name, seconds in breakdown[:6]]
+        for i, line in enumerate(lines):
+            c.create_text(8, 8 + 14 * i, text=line, anchor='nw', fill='#E0E0E0', font=('TkFixedFont', 9))
+
+        # Histogram of recent frame times along the bottom
+        counts = self.profiler.histogram()
+        top, bottom = 8 + 14 * len(lines) + 6, self.HEIGHT - 18
+        width = (self.WIDTH - 16) / len(counts)
+        tallest = max(counts) or 1
+        labels = [f"<{edge:g}" for edge in HISTOGRAM_EDGES_MS] + [f">{HISTOGRAM_EDGES_MS[-1]:g}"]
+        for i, (count, label) in enumerate(zip(counts, labels)):
+            x = 8 + i * width
+            height = (bottom - top) * count / tallest
+            c.create_rectangle(x + 1, bottom - height, x + width - 1, bottom, fill='#4ECDC4', width=0)
+            c.create_text(x + width / 2, bottom + 2, text=label, anchor='n', fill='#A0A0A0',
+                          font=('TkFixedFont', 7))
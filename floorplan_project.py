@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Floorplanning Tool - Project files
+Columnar binary save/load of a placed design, memory-mapped on load
+"""
+
+import json
+import mmap
+import os
+import stat
+import struct
+import tempfile
+
+import numpy as np
+
+from floorplan_polygons import PolygonTable
+from floorplan_store import BlockStore, NameTable, NetStore
+
+# File layout: MAGIC, a little-endian u32 format version and u32 header
+# length, a JSON header, then raw arrays each starting on an ALIGN boundary
+MAGIC = b'FPLANPRJ'
+VERSION = 1
+ALIGN = 64
+PREFIX = struct.Struct('<8sII')
+
+PROJECT_EXTENSION = '.fplan'
+
+# Per-block arrays patched in place by autosave
+GEOMETRY_ARRAYS = BlockStore.FIELDS + ('shape_code',)
+
+# Permissions of a new file (an existing one keeps its own)
+FILE_MODE = 0o644
+
+
+def _pad(offset):
+    return -offset % ALIGN
+
+
+def write_arrays(path, arrays, meta=None):
+    """Write named arrays (plus JSON-able meta) as one binary file
+
+    The file is written to a uniquely named temporary next to the target
+    and renamed over it, so readers never see a half-written file and
+    concurrent writers never share a temporary.
+    """
+    table = {}
+    offset = 0
+    ordered = []
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        if array.dtype.byteorder == '>':
+            array = array.astype(array.dtype.newbyteorder('<'))
+        table[name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+        ordered.append(array)
+        offset += array.nbytes + _pad(array.nbytes)
+
+    header = json.dumps({'arrays': table, 'meta': meta or {}}).encode('utf-8')
+    start = PREFIX.size + len(header)
+    start += _pad(start)
+
+    directory, name = os.path.split(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(prefix=f"{name}.", suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(PREFIX.pack(MAGIC, VERSION, len(header)))
+            f.write(header)
+            f.write(b'\0' * (start - PREFIX.size - len(header)))
+            for array in ordered:
+                f.write(array.tobytes())
+                f.write(b'\0' * _pad(array.nbytes))
+        # mkstemp creates the file private to the owner
+        os.chmod(tmp, stat.S_IMODE(os.stat(path).st_mode) if os.path.exists(path) else FILE_MODE)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def read_header(f):
+    """Parse the prefix and JSON header; returns (header dict, data start offset)"""
+    prefix = f.read(PREFIX.size)
+    if len(prefix) < PREFIX.size:
+        raise ValueError("Not a floorplan binary file (too short)")
+    magic, version, length = PREFIX.unpack(prefix)
+    if magic != MAGIC:
+        raise ValueError("Not a floorplan binary file")
+    if version != VERSION:
+        raise ValueError(f"Unsupported file version {version}")
+    header = json.loads(f.read(length).decode('utf-8'))
+    start = PREFIX.size + length
+    return header, start + _pad(start)
+
+
+def map_arrays(path, access=mmap.ACCESS_COPY):
+    """Memory-map a file written by write_arrays; returns (arrays, meta)
+
+    Arrays are zero-copy views of the mapping. With the default
+    ACCESS_COPY they are writable and changes stay private to this process;
+    ACCESS_WRITE writes through to the file, ACCESS_READ is read-only.
+    """
+    arrays, meta, _ = _map(path, access)
+    return arrays, meta
+
+
+def _map(path, access):
+    mode = 'r+b' if access == mmap.ACCESS_WRITE else 'rb'
+    with open(path, mode) as f:
+        header, start = read_header(f)
+        size = os.fstat(f.fileno()).st_size
+        # mmap cannot map an empty range; a file of empty arrays has no data
+        mapping = mmap.mmap(f.fileno(), 0, access=access) if size > start else None
+
+    arrays = {}
+    for name, spec in header['arrays'].items():
+        dtype = np.dtype(spec['dtype'])
+        count = int(np.prod(spec['shape'], dtype=np.int64))
+        if count == 0 or mapping is None:
+            arrays[name] = np.zeros(spec['shape'], dtype=dtype)
+            continue
+        array = np.frombuffer(mapping, dtype=dtype, count=count, offset=start + spec['offset'])
+        arrays[name] = array.reshape(spec['shape'])
+    return arrays, header['meta'], mapping
+
+
+def save_project(path, blocks, connections):
+    """Write the full design: names, geometry, shapes and nets"""
+    arrays = {
+        'name_blob': np.frombuffer(bytes(blocks.names.blob), dtype=np.uint8),
+        'name_offsets': blocks.names.offsets,
+    }
+    arrays.update((key, getattr(blocks, key)) for key in GEOMETRY_ARRAYS)
+    arrays.update({
+        'polygon_u': blocks.polygons.u, 'polygon_v': blocks.polygons.v,
+        'polygon_offsets': blocks.polygons.offsets,
+        'src': connections.src, 'dst': connections.dst, 'weights': connections.weights,
+    })
+    write_arrays(path, arrays, meta={'kind': 'project', 'blocks': len(blocks), 'nets': len(connections)})
+
+
+def load_project(path):
+    """Open a project as stores backed by a private (copy-on-write) mapping
+
+    Nothing is read up front: pages are faulted in as the arrays are used,
+    and edits in the app never reach the file until it is saved.
+    """
+    arrays, meta = map_arrays(path)
+    if meta.get('kind') != 'project':
+        raise ValueError("Not a floorplan project file")
+    names = NameTable.from_arrays(arrays['name_blob'], arrays['name_offsets'])
+    polygons = None
+    if 'polygon_offsets' in arrays:
+        polygons = PolygonTable.from_arrays(arrays['polygon_u'], arrays['polygon_v'],
+                                            arrays['polygon_offsets'])
+    # Files saved before shaped blocks have no notch arrays: from_arrays fills defaults
+    geometry = {key: arrays[key] for key in GEOMETRY_ARRAYS if key in arrays}
+    blocks = BlockStore.from_arrays(names, polygons=polygons, **geometry)
+    connections = NetStore.from_arrays(names, arrays['src'], arrays['dst'], arrays['weights'])
+    return blocks, connections
+
+
+def autosave_project(path, blocks, connections, ids, nets=()):
+    """Write the given blocks' rows and nets' weights into a saved project in place
+
+    ids and nets are what changed since the file was last written (the app
+    tracks them from its undo history and connection edits). Only the
+    header is read: the rows are patched through a shared mapping, so an
+    autosave costs O(changed rows) however large the design. Anything but
+    a project of this design's size (no file yet, other block or net
+    counts, a bad file) falls back to a full save_project. Returns the
+    number of blocks written.
+    """
+    try:
+        arrays, meta, mapping = _map(path, mmap.ACCESS_WRITE)
+    except (OSError, ValueError):
+        arrays, meta, mapping = None, {}, None
+    if (meta.get('kind') != 'project' or meta.get('blocks') != len(blocks)
+            or meta.get('nets') != len(connections) or any(key not in arrays for key in GEOMETRY_ARRAYS)):
+        save_project(path, blocks, connections)
+        return len(blocks)
+
+    ids = np.asarray(ids, dtype=np.int64)
+    nets = np.asarray(nets, dtype=np.int64)
+    for key in GEOMETRY_ARRAYS:
+        arrays[key][ids] = getattr(blocks, key)[ids]
+    arrays['weights'][nets] = connections.weights[nets]
+
+    if mapping is not None and (len(ids) or len(nets)):
+        mapping.flush()
+    return len(ids)
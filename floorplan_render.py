@@ -0,0 +1,597 @@
+#!/usr/bin/env python3
+"""
+Floorplanning Tool - Retained-mode renderer
+Culls to the view, picks a level of detail and blits drag updates
+"""
+
+import numpy as np
+from matplotlib.collections import LineCollection, PolyCollection
+from matplotlib.colors import to_rgba
+from matplotlib.patches import Polygon
+
+from floorplan_graph import NetIndex
+from floorplan_polygons import notch_point, vertices
+from floorplan_profile import span, timed
+
+# Level of detail is chosen from what falls inside the view. Block labels and
+# net counts appear only when few blocks are visible and they are big enough
+# to read. Nets are bundled per pair of screen cells once blocks shrink to a
+# few pixels or too many individual lines would cross the view.
+DETAIL_MAX_BLOCKS = 150
+DETAIL_MAX_NETS = 600
+LABEL_MIN_PIXELS = 80
+BUNDLE_MAX_PIXELS = 6
+BUNDLE_CELL_PIXELS = 40
+MAX_NET_LINES = 2000
+MAX_BUNDLES = 500
+
+# Net opacity per weight quartile, line width grows with the square root of weight
+NET_ALPHAS = (0.15, 0.3, 0.5, 0.8)
+NET_MIN_WIDTH = 0.5
+NET_WIDTH_RANGE = 2.5
+
+# While a block is selected its nets are drawn on top and the others fade to
+# this fraction of their opacity
+DIM_ALPHA = 0.25
+
+# Padding around the data extent used by reset_view
+VIEW_MARGIN = 0.05
+
+BLOCK_FACE = to_rgba('lightblue', 0.7)
+BLOCK_EDGE = to_rgba('blue')
+SELECTED_FACE = to_rgba('lightcoral', 0.7)
+SELECTED_EDGE = to_rgba('red')
+NET_COLOR = to_rgba('red')
+HIGHLIGHT_COLOR = to_rgba('crimson')
+VIOLATION_EDGE = to_rgba('darkorange')
+
+
+def block_label(block):
+    """Label text shown in the middle of a block"""
+    return f"{block['name']}\n{int(block['area'])} μm²\n{int(block['width'])}×{int(block['height'])}"
+
+
+def block_center(block):
+    """Center point of a block (the area centroid of a shaped store block)"""
+    store = getattr(block, 'store', None)
+    if store is not None and store.shape_code[block.index]:
+        (cx,), (cy,) = store.centers([block.index])
+        return (float(cx), float(cy))
+    return (block['x'] + block['width'] / 2, block['y'] + block['height'] / 2)
+
+
+def handle_rects(block, handle_config):
+    """Handle geometry for a block as (handle_id, x, y, width, height) tuples"""
+    corner_size = handle_config['corner_size']
+    edge_width = handle_config['edge_width']
+    edge_height = handle_config['edge_height']
+    x, y, w, h = block['x'], block['y'], block['width'], block['height']
+
+    handles = [
+        # Corner handles (all four corners)
+        ('corner_0', x + w - corner_size, y + h - corner_size, corner_size, corner_size),  # Top-right
+        ('corner_1', x + w - corner_size, y, corner_size, corner_size),                    # Bottom-right
+        ('corner_2', x, y + h - corner_size, corner_size, corner_size),                    # Top-left
+        ('corner_3', x, y, corner_size, corner_size),                                      # Bottom-left
+        # Edge handles (right and bottom edges)
+        ('edge_right', x + w - edge_width, y + (h - edge_height) / 2, edge_width, edge_height),
+        ('edge_bottom', x + (w - edge_width) / 2, y + h - edge_height, edge_width, edge_height),
+    ]
+    # Notch handle on the inner corner of L/T/U blocks
+    store = getattr(block, 'store', None)
+    notch = notch_point(store, block.index) if store is not None else None
+    if notch is not None:
+        handles.append(('notch', notch[0] - corner_size / 2, notch[1] - corner_size / 2,
+                        corner_size, corner_size))
+    return handles
+
+
+def box_vertices(bounds):
+    """(n, 4) x0, y0, x1, y1 boxes as (n, 4, 2) polygon vertices"""
+    return np.stack([bounds[:, [0, 1]], bounds[:, [2, 1]], bounds[:, [2, 3]], bounds[:, [0, 3]]], axis=1)
+
+
+def weight_alphas(weights, edges):
+    """Per-net opacity from the weight quartile each net falls in"""
+    return np.asarray(NET_ALPHAS)[np.searchsorted(edges, weights, side='right')]
+
+
+def segments_in_view(x1, y1, x2, y2, x0, xmax, y0, ymax):
+    """Mask of segments that cross or touch the rectangle [x0, xmax] x [y0, ymax]
+
+    A segment misses the rectangle when their bounding boxes are disjoint or
+    all four corners lie strictly on one side of the segment's line.
+    """
+    near = ((np.minimum(x1, x2) <= xmax) & (np.maximum(x1, x2) >= x0) &
+            (np.minimum(y1, y2) <= ymax) & (np.maximum(y1, y2) >= y0))
+    dx, dy = x2 - x1, y2 - y1
+    sides = [np.sign(dx * (cy - y1) - dy * (cx - x1))
+             for cx, cy in ((x0, y0), (xmax, y0), (xmax, ymax), (x0, ymax))]
+    total = sides[0] + sides[1] + sides[2] + sides[3]
+    return near & (np.abs(total) < 4)
+
+
+def weight_widths(weights, largest):
+    """Per-net line width scaled by weight relative to the heaviest net"""
+    return NET_MIN_WIDTH + NET_WIDTH_RANGE * np.sqrt(np.asarray(weights, dtype=np.float64) / max(largest, 1e-12))
+
+
+def bundle_nets(cx, cy, src, dst, weights, cell, limit=MAX_BUNDLES):
+    """Aggregate nets into one edge per pair of grid cells
+
+    Endpoints are snapped to a grid of the given cell size; nets inside one
+    cell are dropped and the rest are summed per (cell, cell) pair. Returns
+    (segments, total weights) with segments as an (m, 2, 2) array between
+    cell centers, keeping only the limit heaviest bundles.
+    """
+    ix, iy = np.floor(cx / cell).astype(np.int64), np.floor(cy / cell).astype(np.int64)
+    ix -= ix.min()
+    iy -= iy.min()
+    stride = int(iy.max()) + 1
+    key = ix * stride + iy
+    a, b = key[src], key[dst]
+    keep = a != b
+    lo, hi = np.minimum(a, b)[keep], np.maximum(a, b)[keep]
+    if not len(lo):
+        return np.zeros((0, 2, 2)), np.zeros(0)
+
+    cells = int(key.max()) + 1
+    pairs, inverse = np.unique(lo * cells + hi, return_inverse=True)
+    totals = np.bincount(inverse, weights=weights[keep], minlength=len(pairs))
+    if len(pairs) > limit:
+        heaviest = np.argpartition(totals, len(pairs) - limit)[len(pairs) - limit:]
+        pairs, totals = pairs[heaviest], totals[heaviest]
+    pairs = np.column_stack([pairs // cells, pairs % cells])
+    origin_x, origin_y = np.floor(cx.min() / cell), np.floor(cy.min() / cell)
+    ends = np.stack([pairs // stride, pairs % stride], axis=-1).astype(np.float64)
+    ends[..., 0] = (ends[..., 0] + origin_x + 0.5) * cell
+    ends[..., 1] = (ends[..., 1] + origin_y + 0.5) * cell
+    return ends, totals
+
+
+class FloorplanRenderer:
+    """Retained-mode floorplan renderer with viewport culling
+
+    Only blocks and nets that intersect the current view are drawn. Blocks
+    are one PolyCollection, nets one LineCollection (width by weight) and
+    the selection handles one more PolyCollection, so selection and hover
+    changes only rewrite color arrays. Block labels and net counts are added
+    only at the detail level, and at very low zoom nets are bundled per pair
+    of screen cells. While a block is dragged it is drawn as a separate
+    overlay (rectangle, label, handles, incident nets) that is blitted over
+    a cached background of the rest of the scene. Overlapping blocks are
+    outlined by one more collection, which is part of the overlay while
+    dragging so violations can appear and clear frame by frame. The selected
+    block's nets are looked up in the NetIndex (O(degree)) and drawn by a
+    highlight collection over the dimmed rest.
+    """
+
+    def __init__(self, ax, canvas, handle_config):
+        self.ax = ax
+        self.canvas = canvas
+        self.handle_config = handle_config
+
+        # Scene state
+        self.blocks = []
+        self.connections = []
+        self.selected_block = None
+        self.hover_handle = None
+        self.show_handles = True
+        self.level = None                            # 'detail', 'coarse' or 'bundled'
+        self.net_level = None                        # 'lines' or 'bundled'
+        self.visible = np.zeros(0, dtype=np.int64)   # sorted ids of the drawn blocks
+        self.net_index = None                        # block -> nets (NetIndex)
+        self.alpha_edges = np.zeros(3)
+        self.max_weight = 1.0
+
+        # Scene artists
+        self.block_collection = None
+        self.net_collection = None
+        self.handle_collection = None
+        self.violation_collection = None
+        self.highlight_collection = None
+        self.labels = []
+        self.handle_ids = []
+        self._net_colors = None
+        self.violations = np.zeros(0, dtype=np.int64)       # sorted ids of overlapping blocks
+        self._violations_shown = np.zeros(0, dtype=np.int64)
+        self._block_face = None
+        self._block_edge = None
+        self._block_widths = None
+
+        # Drag overlay and blitting state
+        self.drag_block = None
+        self.drag_nets = np.zeros(0, dtype=np.int64)
+        self.drag_artists = []
+        self._animated = []
+        self._background = None
+        self.canvas.mpl_connect('draw_event', self._on_draw)
+        self.canvas.mpl_connect('resize_event', self._on_resize)
+
+    @timed('rebuild')
+    def rebuild(self, blocks, connections, selected_block=None, hover_handle=None, show_handles=True,
+                violations=None, keep_view=None, net_index=None):
+        """Recreate the scene and do a full redraw (load / structural changes)
+
+        The current view is kept when the same design is redrawn (or when
+        keep_view is True); a new design starts zoomed to its extent.
+        violations are the ids of overlapping blocks to outline. net_index
+        is the design's NetIndex (built here when not given).
+        """
+        if keep_view is None:
+            keep_view = blocks is self.blocks
+        keep_view = keep_view and self.block_collection is not None
+        limits = (self.ax.get_xlim(), self.ax.get_ylim())
+
+        self.blocks = blocks
+        self.connections = connections
+        self.selected_block = selected_block
+        self.hover_handle = hover_handle
+        self.show_handles = show_handles
+        self.violations = np.zeros(0, dtype=np.int64) if violations is None else np.asarray(violations)
+        self.drag_block = None
+        self.drag_nets = np.zeros(0, dtype=np.int64)
+        self.drag_artists = []
+        self._animated = []
+        self._background = None
+
+        self.ax.clear()
+        self.block_collection = None
+        self.net_collection = None
+        self.handle_collection = None
+        self.violation_collection = None
+        self.highlight_collection = None
+        self._violations_shown = np.zeros(0, dtype=np.int64)
+        self.labels = []
+        self.handle_ids = []
+
+        if not blocks:
+            self.ax.text(0.5, 0.5, 'Upload CSV to see floorplan',
+                         ha='center', va='center', transform=self.ax.transAxes)
+            self.canvas.draw()
+            return
+
+        # Block -> incident nets, for the drag overlay and the selection highlight
+        self.net_index = net_index if net_index is not None else NetIndex(connections, len(blocks))
+        weights = connections.weights
+        self.alpha_edges = np.quantile(weights, [0.25, 0.5, 0.75]) if len(weights) else np.zeros(3)
+        self.max_weight = float(weights.max()) if len(weights) else 1.0
+
+        self.ax.set_xlabel('X Position (μm)')
+        self.ax.set_ylabel('Y Position (μm)')
+        self.ax.set_title('Interactive Floorplan Visualization - Version 2.0')
+        self.ax.grid(True, alpha=0.3)
+        self.ax.set_aspect('equal')
+        self.ax.set_xlim(limits[0] if keep_view else self.data_limits()[0])
+        self.ax.set_ylim(limits[1] if keep_view else self.data_limits()[1])
+
+        # Handles: one collection, re-pointed at whichever block is selected
+        self.handle_collection = PolyCollection(np.zeros((0, 4, 2)), linewidths=2, edgecolors='black',
+                                                alpha=0.9, zorder=4)
+        self.ax.add_collection(self.handle_collection, autolim=False)
+        self.violation_collection = PolyCollection(np.zeros((0, 4, 2)), facecolors='none',
+                                                   edgecolors=[VIOLATION_EDGE], linewidths=2.5, zorder=3)
+        self.ax.add_collection(self.violation_collection, autolim=False)
+        self.highlight_collection = LineCollection(np.zeros((0, 2, 2)), colors=[HIGHLIGHT_COLOR], zorder=2.5)
+        self.ax.add_collection(self.highlight_collection, autolim=False)
+
+        self._build_scene()
+        self._sync_handles()
+        self.canvas.draw()
+
+    def data_limits(self):
+        """(xlim, ylim) covering every block plus a margin"""
+        bounds = self.blocks.bounds()
+        x0, y0 = bounds[:, 0].min(), bounds[:, 1].min()
+        x1, y1 = bounds[:, 2].max(), bounds[:, 3].max()
+        pad = VIEW_MARGIN * max(x1 - x0, y1 - y0, 1.0)
+        return (x0 - pad, x1 + pad), (y0 - pad, y1 + pad)
+
+    def set_view(self, xlim, ylim):
+        """Zoom or pan to new limits and redraw only what falls inside them"""
+        self.ax.set_xlim(xlim)
+        self.ax.set_ylim(ylim)
+        if self.blocks:
+            self._build_scene()
+            self._background = None
+        self.canvas.draw_idle()
+
+    def reset_view(self):
+        """Zoom to the whole design"""
+        if self.blocks:
+            self.set_view(*self.data_limits())
+
+    def set_selection(self, selected_block, hover_handle=None, show_handles=True):
+        """Restyle the old and new selection without rebuilding the scene"""
+        previous = self.selected_block
+        self.selected_block = selected_block
+        self.hover_handle = hover_handle
+        self.show_handles = show_handles
+
+        if previous is not None:
+            self._style_block(previous)
+        if selected_block is not None:
+            self._style_block(selected_block)
+        self._sync_handles()
+        self._sync_highlight()
+
+        if self.drag_block is None:
+            self.canvas.draw_idle()
+
+    def set_violations(self, violations):
+        """Outline a new set of overlapping blocks
+
+        While dragging, the dragged block's outline turns the violation color
+        instead and the next drag_update blits the change.
+        """
+        self.violations = np.asarray(violations)
+        if self.violation_collection is None:
+            return
+        if self.drag_block is not None:
+            rect = self.drag_artists[0]
+            violating = np.isin(self.drag_block['id'], self.violations)
+            rect.set_edgecolor(VIOLATION_EDGE if violating else SELECTED_EDGE)
+            self._sync_violations()
+        elif self._sync_violations():
+            self.canvas.draw_idle()
+
+    def set_hover(self, hover_handle):
+        """Recolor handles for a new hover state"""
+        self.hover_handle = hover_handle
+        if self.handle_collection is not None:
+            self.handle_collection.set_facecolors(self._handle_colors())
+
+        if self.drag_block is not None:
+            self.blit()
+        else:
+            self.canvas.draw_idle()
+
+    def begin_drag(self, block):
+        """Move a block into the overlay; the rest of the scene is cached on the next draw"""
+        if self.drag_artists:
+            self.end_drag()
+        self.drag_block = block
+        block_id = block['id']
+        self.drag_nets = self.net_index.nets(block_id)
+        self._build_scene()
+
+        rect = Polygon(vertices(self.blocks, [block_id])[0],
+                       facecolor=SELECTED_FACE, edgecolor=SELECTED_EDGE, linewidth=3)
+        self.ax.add_patch(rect)
+        label = self.ax.text(*block_center(block), block_label(block),
+                             ha='center', va='center', fontsize=8, weight='bold')
+        lines = LineCollection(self._net_segments(self.drag_nets), colors=[NET_COLOR], linestyles='--',
+                               linewidths=weight_widths(self.connections.weights[self.drag_nets], self.max_weight),
+                               alpha=0.7)
+        self.ax.add_collection(lines, autolim=False)
+        self.drag_artists = [rect, label, lines]
+
+        self._animated = self.drag_artists + [self.violation_collection, self.handle_collection]
+        for artist in self._animated:
+            artist.set_animated(True)
+        # No draw here, so a click that never drags costs none: the next full
+        # draw (the selection's pending redraw, or the first drag_update's
+        # blit) renders everything except the animated artists, and _on_draw
+        # grabs that background and blits them back on top
+
+    def drag_update(self, block):
+        """Move the overlay of a dragged block and blit it"""
+        with span('overlay'):
+            rect, label, lines = self.drag_artists
+            rect.set_xy(vertices(self.blocks, [block['id']])[0])
+            label.set_position(block_center(block))
+            label.set_text(block_label(block))
+            lines.set_segments(self._net_segments(self.drag_nets))
+            self.handle_collection.set_verts(self._handle_vertices(block))
+        self.blit()
+
+    def end_drag(self):
+        """Return the dragged block to the scene with a full redraw"""
+        for artist in self._animated:
+            artist.set_animated(False)
+        for artist in self.drag_artists:
+            artist.remove()
+        self.drag_artists = []
+        self._animated = []
+        self._background = None
+        self.drag_block = None
+        self.drag_nets = np.zeros(0, dtype=np.int64)
+
+        self._build_scene()
+        self.canvas.draw_idle()
+
+    @timed('blit')
+    def blit(self):
+        """Restore the cached background and draw the animated artists over it"""
+        if self._background is None:
+            self.canvas.draw()
+            return
+        self.canvas.restore_region(self._background)
+        for artist in self._animated:
+            self.ax.draw_artist(artist)
+        self.canvas.blit(self.ax.bbox)
+
+    def _on_draw(self, event):
+        """Re-capture the background after any full draw while dragging"""
+        if not self._animated:
+            return
+        self._background = self.canvas.copy_from_bbox(self.ax.bbox)
+        for artist in self._animated:
+            self.ax.draw_artist(artist)
+        self.canvas.blit(self.ax.bbox)
+
+    def _on_resize(self, event):
+        """Pixel sizes changed, so the level of detail may have too"""
+        if self.blocks and self.drag_block is None:
+            self._build_scene()
+
+    def _view(self):
+        """Current (x0, x1, y0, y1) after the equal-aspect adjustment"""
+        self.ax.apply_aspect()
+        (x0, x1), (y0, y1) = self.ax.get_xlim(), self.ax.get_ylim()
+        return min(x0, x1), max(x0, x1), min(y0, y1), max(y0, y1)
+
+    @timed('build_scene')
+    def _build_scene(self):
+        """Cull to the view, pick the level of detail and recreate the scene artists"""
+        for artist in [self.block_collection, self.net_collection] + self.labels:
+            if artist is not None:
+                artist.remove()
+        self.block_collection = None
+        self.net_collection = None
+        self.labels = []
+
+        blocks, nets = self.blocks, self.connections
+        x0, x1, y0, y1 = self._view()
+        bounds = blocks.bounds()
+        ids = np.flatnonzero((bounds[:, 0] <= x1) & (bounds[:, 2] >= x0) &
+                             (bounds[:, 1] <= y1) & (bounds[:, 3] >= y0))
+        if self.drag_block is not None:
+            ids = ids[ids != self.drag_block['id']]
+        self.visible = ids
+        if self.violation_collection is not None:
+            self._sync_violations()
+
+        # Typical on-screen block size decides what is worth drawing
+        pixels = self.ax.bbox.width / max(x1 - x0, 1e-9)
+        sides = np.minimum(blocks.width[ids], blocks.height[ids])
+        size = float(np.median(sides)) * pixels if len(ids) else 0.0
+        if len(ids) <= DETAIL_MAX_BLOCKS and size >= LABEL_MIN_PIXELS:
+            self.level = 'detail'
+        elif size < BUNDLE_MAX_PIXELS:
+            self.level = 'bundled'
+        else:
+            self.level = 'coarse'
+
+        # Blocks: one collection with per-block colors for the selection
+        n = len(ids)
+        self._block_face = np.tile(BLOCK_FACE, (n, 1))
+        self._block_edge = np.tile(BLOCK_EDGE, (n, 1))
+        self._block_widths = np.full(n, {'detail': 2.0, 'coarse': 0.5, 'bundled': 0.0}[self.level])
+        outlines = vertices(blocks, ids) if blocks.shape_code[ids].any() else box_vertices(bounds[ids])
+        self.block_collection = PolyCollection(outlines, facecolors=self._block_face,
+                                               edgecolors=self._block_edge, linewidths=self._block_widths)
+        self.ax.add_collection(self.block_collection, autolim=False)
+        if self.selected_block is not None:
+            self._style_block(self.selected_block)
+
+        if self.level == 'detail':
+            for i in ids.tolist():
+                block = blocks[i]
+                self.labels.append(self.ax.text(*block_center(block), block_label(block),
+                                                ha='center', va='center', fontsize=8, weight='bold'))
+
+        # Nets whose line passes through the view, minus the dragged block's
+        cx, cy = blocks.centers()
+        src, dst = nets.src, nets.dst
+        visible = np.flatnonzero(segments_in_view(cx[src], cy[src], cx[dst], cy[dst], x0, x1, y0, y1))
+        if len(self.drag_nets):
+            visible = np.setdiff1d(visible, self.drag_nets, assume_unique=True)
+
+        self.net_level = 'bundled' if self.level == 'bundled' or len(visible) > MAX_NET_LINES else 'lines'
+        if self.net_level == 'bundled':
+            segments, weights = bundle_nets(cx, cy, src[visible], dst[visible], nets.weights[visible],
+                                            BUNDLE_CELL_PIXELS / pixels)
+            edges = np.quantile(weights, [0.25, 0.5, 0.75]) if len(weights) else np.zeros(3)
+            colors = np.tile(NET_COLOR, (len(segments), 1))
+            colors[:, 3] = weight_alphas(weights, edges)
+            widths = weight_widths(weights, weights.max()) if len(weights) else 1.0
+            self.net_collection = LineCollection(segments, colors=colors, linewidths=widths)
+        else:
+            # Dashes and counts only for the handful of nets around a close view
+            detail = self.level == 'detail' and len(visible) <= DETAIL_MAX_NETS
+            colors = np.tile(NET_COLOR, (len(visible), 1))
+            colors[:, 3] = 0.7 if detail else weight_alphas(nets.weights[visible], self.alpha_edges)
+            self.net_collection = LineCollection(self._net_segments(visible), colors=colors,
+                                                 linewidths=weight_widths(nets.weights[visible], self.max_weight),
+                                                 linestyles='--' if detail else 'solid')
+        self.ax.add_collection(self.net_collection, autolim=False)
+        self._net_colors = colors
+        self._sync_highlight()
+
+        # Net counts only when the view is close enough to read them
+        if self.level == 'detail' and self.net_level == 'lines' and len(visible) <= DETAIL_MAX_NETS:
+            for index in visible.tolist():
+                mx = (cx[src[index]] + cx[dst[index]]) / 2
+                my = (cy[src[index]] + cy[dst[index]]) / 2
+                self.labels.append(self.ax.text(mx, my, str(nets.weight_value(index)),
+                                                ha='center', va='center', fontsize=8,
+                                                bbox=dict(boxstyle="round,pad=0.3", facecolor="white", alpha=0.8)))
+
+    def _sync_highlight(self):
+        """Draw the selected block's nets on top and dim the rest
+
+        The dragged block's nets are in the drag overlay instead, so the
+        highlight is empty while dragging.
+        """
+        if self.highlight_collection is None or self.net_collection is None:
+            return
+        selected = self.selected_block
+        nets = np.zeros(0, dtype=np.int64)
+        if selected is not None and self.drag_block is None:
+            nets = self.net_index.nets(selected['id'])
+        self.highlight_collection.set_segments(self._net_segments(nets))
+        self.highlight_collection.set_linewidths(
+            weight_widths(self.connections.weights[nets], self.max_weight) + 1.0 if len(nets) else 1.0)
+        colors = self._net_colors
+        if selected is not None:
+            colors = colors.copy()
+            colors[:, 3] *= DIM_ALPHA
+        self.net_collection.set_colors(colors)
+
+    def _sync_violations(self):
+        """Point the violation outlines at the visible violators (True if they changed)"""
+        shown = self.violations[np.isin(self.violations, self.visible)]
+        if np.array_equal(shown, self._violations_shown):
+            return False
+        self._violations_shown = shown
+        self.violation_collection.set_verts(vertices(self.blocks, shown))
+        return True
+
+    def _net_segments(self, nets):
+        """Center-to-center segments of the given nets as an (m, 2, 2) array"""
+        blocks, src, dst = self.blocks, self.connections.src[nets], self.connections.dst[nets]
+        (sx, sy), (dx, dy) = blocks.centers(src), blocks.centers(dst)
+        return np.stack([np.column_stack([sx, sy]), np.column_stack([dx, dy])], axis=1)
+
+    def _style_block(self, block):
+        """Apply selection colors to a block's entry in the block collection"""
+        if self.block_collection is None:
+            return
+        block_id = block['id']
+        slot = int(np.searchsorted(self.visible, block_id))
+        if slot >= len(self.visible) or self.visible[slot] != block_id:
+            return
+        selected = block == self.selected_block
+        self._block_face[slot] = SELECTED_FACE if selected else BLOCK_FACE
+        self._block_edge[slot] = SELECTED_EDGE if selected else BLOCK_EDGE
+        if self.level == 'detail':
+            self._block_widths[slot] = 3.0 if selected else 2.0
+        self.block_collection.set_facecolors(self._block_face)
+        self.block_collection.set_edgecolors(self._block_edge)
+        self.block_collection.set_linewidths(self._block_widths)
+
+    def _sync_handles(self):
+        """Point the handle collection at the current selection"""
+        if self.handle_collection is None:
+            return
+        if self.selected_block is None or not self.show_handles:
+            self.handle_ids = []
+            self.handle_collection.set_verts(np.zeros((0, 4, 2)))
+            return
+        self.handle_ids = [handle[0] for handle in handle_rects(self.selected_block, self.handle_config)]
+        self.handle_collection.set_verts(self._handle_vertices(self.selected_block))
+        self.handle_collection.set_facecolors(self._handle_colors())
+
+    def _handle_vertices(self, block):
+        """Handle rectangles of a block as (6, 4, 2) polygon vertices"""
+        rects = np.array([handle[1:] for handle in handle_rects(block, self.handle_config)], dtype=np.float64)
+        return box_vertices(np.column_stack([rects[:, 0], rects[:, 1],
+                                             rects[:, 0] + rects[:, 2], rects[:, 1] + rects[:, 3]]))
+
+    def _handle_colors(self):
+        """Per-handle face colors for the current hover state"""
+        colors = self.handle_config['colors']
+        return [colors['hover'] if handle_id == self.hover_handle
+                else colors['edge' if handle_id.startswith('edge') else 'corner']
+                for handle_id in self.handle_ids]
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Floorplanning Tool - Spatial index
+Uniform grid over block bounding boxes for hit testing and rectangle queries
+"""
+
+import math
+
+import numpy as np
+
+from floorplan_profile import timed
+
+# Blocks covering more cells than this are kept in a separate list that every
+# query checks, so one huge macro cannot flood the grid
+MAX_CELLS_PER_BLOCK = 1024
+
+
+class SpatialGrid:
+    """Uniform-grid spatial index over block bounding boxes
+
+    Every block is registered in each grid cell its (closed) bounding box
+    touches. Point queries look at a single cell, so they cost O(1) on
+    average; rectangle queries gather the covered cells and filter the
+    candidates against the bounding-box arrays with NumPy.
+    """
+
+    def __init__(self, cell_size=None):
+        self.fixed_cell_size = cell_size
+        self.cell_size = cell_size or 100.0
+        self.cells = {}        # (ix, iy) -> [block id, ...]
+        self.large = set()     # ids of blocks too big for the grid
+        self.boxes = []        # block id -> (x0, y0, x1, y1) for scalar queries
+        self.cell_ranges = []  # block id -> (ix0, iy0, ix1, iy1)
+        self.bounds = np.zeros((0, 4), dtype=np.float64)  # x0, y0, x1, y1 per block
+
+    def __len__(self):
+        return len(self.boxes)
+
+    def build(self, blocks):
+        """Index every block of a BlockStore from scratch"""
+        self.build_bounds(blocks.bounds())
+
+    def build_bounds(self, bounds):
+        """Index an (n, 4) array of x0, y0, x1, y1 boxes from scratch"""
+        self.bounds = np.array(bounds, dtype=np.float64)
+        n = len(self.bounds)
+
+        self.cell_size = self.fixed_cell_size or self._auto_cell_size()
+
+        self.cells = {}
+        self.large = set()
+        self.boxes = [tuple(box) for box in self.bounds.tolist()]
+        self.cell_ranges = [None] * n
+        for i in range(n):
+            self._insert(i)
+
+    @timed('index.update')
+    def update(self, block):
+        """Re-index one block after it moved or changed shape"""
+        self.move(block['id'], (block['x'], block['y'],
+                                block['x'] + block['width'], block['y'] + block['height']))
+
+    def move(self, i, box):
+        """Re-index box i at a new (x0, y0, x1, y1)"""
+        self.boxes[i] = box
+        self.bounds[i] = box
+
+        # Small drags usually stay inside the same cells
+        if self._cell_range(box) != self.cell_ranges[i]:
+            self._remove(i)
+            self._insert(i)
+
+    def query_point(self, x, y):
+        """Lowest block id whose bounding box contains the point, or None"""
+        found = None
+        cell = self.cells.get((math.floor(x / self.cell_size), math.floor(y / self.cell_size)), ())
+        for candidates in (cell, self.large):
+            for i in candidates:
+                x0, y0, x1, y1 = self.boxes[i]
+                if x0 <= x <= x1 and y0 <= y <= y1 and (found is None or i < found):
+                    found = i
+        return found
+
+    def candidates(self, x0, y0, x1, y1):
+        """Unfiltered set of ids registered in the cells a rectangle covers"""
+        ix0, iy0, ix1, iy1 = self._cell_range((x0, y0, x1, y1))
+        found = set(self.large)
+        for ix in range(ix0, ix1 + 1):
+            for iy in range(iy0, iy1 + 1):
+                found.update(self.cells.get((ix, iy), ()))
+        return found
+
+    def query_rect(self, x0, y0, x1, y1):
+        """Sorted ids of all blocks whose bounding boxes intersect a rectangle"""
+        ix0, iy0, ix1, iy1 = self._cell_range((x0, y0, x1, y1))
+        n_cells = (ix1 - ix0 + 1) * (iy1 - iy0 + 1)
+
+        if n_cells > len(self.cells):
+            # Large windows (e.g. the whole die): test every block directly
+            candidates = np.arange(len(self.boxes))
+        else:
+            found = self.candidates(x0, y0, x1, y1)
+            candidates = np.fromiter(found, dtype=np.int64, count=len(found))
+
+        b = self.bounds[candidates]
+        hit = (b[:, 0] <= x1) & (b[:, 2] >= x0) & (b[:, 1] <= y1) & (b[:, 3] >= y0)
+        return np.sort(candidates[hit])
+
+    def _auto_cell_size(self):
+        """Cell size around the typical block extent"""
+        if len(self.bounds) == 0:
+            return 100.0
+        extent = np.maximum(self.bounds[:, 2] - self.bounds[:, 0], self.bounds[:, 3] - self.bounds[:, 1])
+        return max(float(np.median(extent)), 1.0)
+
+    def _cell_range(self, box):
+        """Inclusive range of grid cells covered by a bounding box"""
+        size = self.cell_size
+        return (math.floor(box[0] / size), math.floor(box[1] / size),
+                math.floor(box[2] / size), math.floor(box[3] / size))
+
+    def _insert(self, i):
+        ix0, iy0, ix1, iy1 = self.cell_ranges[i] = self._cell_range(self.boxes[i])
+        if (ix1 - ix0 + 1) * (iy1 - iy0 + 1) > MAX_CELLS_PER_BLOCK:
+            self.large.add(i)
+            return
+        for ix in range(ix0, ix1 + 1):
+            for iy in range(iy0, iy1 + 1):
+                self.cells.setdefault((ix, iy), []).append(i)
+
+    def _remove(self, i):
+        if i in self.large:
+            self.large.discard(i)
+            return
+        ix0, iy0, ix1, iy1 = self.cell_ranges[i]
+        for ix in range(ix0, ix1 + 1):
+            for iy in range(iy0, iy1 + 1):
+                cell = self.cells[(ix, iy)]
+                cell.remove(i)
+                if not cell:
+                    del self.cells[(ix, iy)]
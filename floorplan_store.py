@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Floorplanning Tool - Array-backed block and net storage
+Structure-of-arrays stores with dict-like views for the GUI code
+"""
+
+import numpy as np
+
+import floorplan_polygons
+from floorplan_polygons import DEFAULT_NOTCH, SHAPE_TYPES, PolygonTable
+
+# Default placement grid used when a netlist is loaded
+GRID_COLUMNS = 3
+GRID_PITCH = 200
+GRID_ORIGIN = 100
+
+
+class NameTable:
+    """Interned block names stored as one UTF-8 blob plus offsets"""
+
+    def __init__(self, names=()):
+        encoded = [str(name).encode('utf-8') for name in names]
+        self.blob = b''.join(encoded)
+        self.offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(e) for e in encoded], out=self.offsets[1:])
+        self._index = None
+
+    @classmethod
+    def from_arrays(cls, blob, offsets):
+        """Wrap an existing blob (bytes or a uint8 array, e.g. memory-mapped) and offsets"""
+        table = cls.__new__(cls)
+        table.blob = blob
+        table.offsets = offsets
+        table._index = None
+        return table
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return bytes(self.blob[start:end]).decode('utf-8')
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def index(self, name):
+        """Block id for a name (lookup table is built on first use)"""
+        if self._index is None:
+            self._index = {n: i for i, n in enumerate(self)}
+        return self._index[name]
+
+    def tolist(self):
+        return list(self)
+
+
+class BlockView:
+    """Dict-like view of one block in a BlockStore
+
+    Reads and writes go straight to the store arrays, so code written for the
+    old block dicts (block['x'] += dx) keeps working.
+    """
+
+    __slots__ = ('store', 'index')
+
+    def __init__(self, store, index):
+        self.store = store
+        self.index = index
+
+    def __getitem__(self, key):
+        store, i = self.store, self.index
+        if key in BlockStore.FIELDS:
+            return float(getattr(store, key)[i])
+        if key == 'id':
+            return i
+        if key == 'name':
+            return store.names[i]
+        if key == 'shape_type':
+            return SHAPE_TYPES[store.shape_code[i]]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key in BlockStore.FIELDS:
+            getattr(self.store, key)[self.index] = value
+        elif key == 'shape_type':
+            self.store.shape_code[self.index] = SHAPE_TYPES.index(value)
+        else:
+            raise KeyError(f"Block field '{key}' is read-only")
+
+    def __contains__(self, key):
+        return key in BlockStore.KEYS
+
+    def __eq__(self, other):
+        return isinstance(other, BlockView) and other.store is self.store and other.index == self.index
+
+    def __hash__(self):
+        return hash((id(self.store), self.index))
+
+    def __repr__(self):
+        return f"BlockView({self.to_dict()!r})"
+
+    def get(self, key, default=None):
+        return self[key] if key in BlockStore.KEYS else default
+
+    def keys(self):
+        return BlockStore.KEYS
+
+    def to_dict(self):
+        return {key: self[key] for key in BlockStore.KEYS}
+
+
+class BlockStore:
+    """Structure-of-arrays block storage
+
+    Geometry lives in contiguous float64 arrays indexed by block id, names in
+    a NameTable. Indexing or iterating yields BlockView objects.
+    """
+
+    FIELDS = ('x', 'y', 'width', 'height', 'area', 'notch_w', 'notch_h')
+    KEYS = ('id', 'name', 'area', 'width', 'height', 'x', 'y', 'shape_type', 'notch_w', 'notch_h')
+
+    def __init__(self, names=(), areas=None):
+        self.names = NameTable(names)
+        n = len(self.names)
+        self.area = np.zeros(n) if areas is None else np.asarray(areas, dtype=np.float64).copy()
+        self.width = np.sqrt(self.area)
+        self.height = self.width.copy()
+        self.x = np.zeros(n)
+        self.y = np.zeros(n)
+        self.shape_code = np.zeros(n, dtype=np.int8)
+        # Notch fractions of L/T/U shapes and outlines of free-form polygons
+        self.notch_w = np.full(n, DEFAULT_NOTCH)
+        self.notch_h = np.full(n, DEFAULT_NOTCH)
+        self.polygons = PolygonTable(n)
+
+    @classmethod
+    def from_netlist(cls, netlist):
+        """Square blocks on the default 3-column grid"""
+        store = cls(netlist.names, netlist.areas)
+        ids = np.arange(len(store))
+        store.x[:] = GRID_ORIGIN + (ids % GRID_COLUMNS) * GRID_PITCH
+        store.y[:] = GRID_ORIGIN + (ids // GRID_COLUMNS) * GRID_PITCH
+        return store
+
+    @classmethod
+    def from_arrays(cls, names, x, y, width, height, area, shape_code, notch_w=None, notch_h=None,
+                    polygons=None):
+        """Adopt existing arrays without copying (e.g. memory-mapped project data)"""
+        n = len(area)
+        store = cls.__new__(cls)
+        store.names = names
+        store.x, store.y, store.width, store.height, store.area = x, y, width, height, area
+        store.shape_code = shape_code
+        store.notch_w = np.full(n, DEFAULT_NOTCH) if notch_w is None else notch_w
+        store.notch_h = np.full(n, DEFAULT_NOTCH) if notch_h is None else notch_h
+        store.polygons = PolygonTable(n) if polygons is None else polygons
+        return store
+
+    def copy(self):
+        """Independent copy of the geometry sharing the (immutable) name table"""
+        arrays = {key: getattr(self, key).copy() for key in self.FIELDS + ('shape_code',)}
+        return BlockStore.from_arrays(self.names, polygons=self.polygons.copy(), **arrays)
+
+    def __len__(self):
+        return len(self.area)
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return BlockView(self, i)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield BlockView(self, i)
+
+    def centers(self, ids=None):
+        """Pin locations as (cx, cy) arrays: box centers, or area centroids of shaped blocks"""
+        return floorplan_polygons.centers(self, ids)
+
+    def bounds(self):
+        """Bounding boxes as an (n, 4) array of x0, y0, x1, y1"""
+        return np.column_stack([self.x, self.y, self.x + self.width, self.y + self.height])
+
+    def nbytes(self):
+        """Memory held by the arrays and the name table"""
+        arrays = [getattr(self, key) for key in self.FIELDS] + [self.shape_code, self.names.offsets]
+        return sum(a.nbytes for a in arrays) + len(self.names.blob) + self.polygons.nbytes()
+
+
+class NetView:
+    """Dict-like view of one connection in a NetStore"""
+
+    __slots__ = ('store', 'index')
+
+    def __init__(self, store, index):
+        self.store = store
+        self.index = index
+
+    def __getitem__(self, key):
+        store, i = self.store, self.index
+        if key == 'from':
+            return int(store.src[i])
+        if key == 'to':
+            return int(store.dst[i])
+        if key == 'from_name':
+            return store.names[store.src[i]]
+        if key == 'to_name':
+            return store.names[store.dst[i]]
+        if key == 'connections':
+            return store.weight_value(i)
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key != 'connections':
+            raise KeyError(f"Connection field '{key}' is read-only")
+        self.store.weights[self.index] = value
+
+    def __eq__(self, other):
+        return isinstance(other, NetView) and other.store is self.store and other.index == self.index
+
+    def __hash__(self):
+        return hash((id(self.store), self.index))
+
+    def __repr__(self):
+        return f"NetView({self.to_dict()!r})"
+
+    def get(self, key, default=None):
+        return self[key] if key in NetStore.KEYS else default
+
+    def keys(self):
+        return NetStore.KEYS
+
+    def to_dict(self):
+        return {key: self[key] for key in NetStore.KEYS}
+
+
+class NetStore:
+    """Structure-of-arrays connection storage
+
+    Endpoints are int32 block ids into the shared NameTable; weights are
+    float64. Indexing or iterating yields NetView objects.
+    """
+
+    KEYS = ('from', 'to', 'from_name', 'to_name', 'connections')
+
+    def __init__(self, names=None, src=(), dst=(), weights=()):
+        self.names = names if names is not None else NameTable()
+        self.src = np.asarray(src, dtype=np.int32).copy()
+        self.dst = np.asarray(dst, dtype=np.int32).copy()
+        self.weights = np.asarray(weights, dtype=np.float64).copy()
+
+    @classmethod
+    def from_netlist(cls, netlist, blocks):
+        """Connections of a netlist sharing the block store's name table"""
+        return cls(blocks.names, netlist.src, netlist.dst, netlist.weights)
+
+    @classmethod
+    def from_arrays(cls, names, src, dst, weights):
+        """Adopt existing arrays without copying"""
+        store = cls.__new__(cls)
+        store.names = names
+        store.src, store.dst, store.weights = src, dst, weights
+        return store
+
+    def __len__(self):
+        return len(self.src)
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return NetView(self, i)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield NetView(self, i)
+
+    def weight_value(self, i):
+        """Weight as an int when it is a whole number (for display)"""
+        weight = float(self.weights[i])
+        return int(weight) if weight.is_integer() else weight
+
+    def nbytes(self):
+        return self.src.nbytes + self.dst.nbytes + self.weights.nbytes
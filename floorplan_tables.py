@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+Floorplanning Tool - Virtualized tables
+Treeview-based block and connection lists that only materialize visible rows
+"""
+
+import operator
+import re
+import tkinter as tk
+from tkinter import ttk, messagebox
+
+import numpy as np
+
+# Numeric filters such as ">= 10" or "<500" apply to the table's weight column
+_COMPARISONS = {'<': operator.lt, '<=': operator.le, '>': operator.gt, '>=': operator.ge,
+                '=': operator.eq, '==': operator.eq}
+_NUMERIC_FILTER = re.compile(r'^\s*(<=|>=|==|<|>|=)\s*([-+]?(?:\d+\.?\d*|\.\d+)(?:e[-+]?\d+)?)\s*$', re.IGNORECASE)
+
+# Rows scrolled per mouse-wheel notch
+WHEEL_ROWS = 3
+
+
+class TableModel:
+    """Row source for a VirtualTable backed by store arrays
+
+    Subclasses set COLUMNS (key, heading, width), EDITABLE, WEIGHT_COLUMN
+    and implement row_values, column_values and names.
+    """
+
+    COLUMNS = ()
+    EDITABLE = ()
+    WEIGHT_COLUMN = None
+
+    def __len__(self):
+        raise NotImplementedError
+
+    def row_values(self, row):
+        """Display values of one row"""
+        raise NotImplementedError
+
+    def column_values(self, key):
+        """Whole column as an array (used for sorting and numeric filters)"""
+        raise NotImplementedError
+
+    def names(self):
+        """Lower-cased text each row is matched against by name filters"""
+        raise NotImplementedError
+
+    def parse_value(self, key, text):
+        """Value an edited cell's text stands for; raises ValueError for bad input"""
+        return float(text)
+
+    def set_value(self, row, key, value):
+        """Store a parsed cell value"""
+        raise NotImplementedError
+
+    def filter_rows(self, text):
+        """Row ids matching a filter: a name substring or a weight comparison"""
+        text = text.strip()
+        if not text:
+            return np.arange(len(self))
+        match = _NUMERIC_FILTER.match(text)
+        if match and self.WEIGHT_COLUMN:
+            compare = _COMPARISONS[match.group(1)]
+            return np.flatnonzero(compare(self.column_values(self.WEIGHT_COLUMN), float(match.group(2))))
+        needle = text.lower()
+        return np.array([i for i, name in enumerate(self.names()) if needle in name], dtype=np.int64)
+
+    def sort_rows(self, rows, key, descending=False):
+        """Rows reordered by one column (stable, so ties keep their order)"""
+        values = self.column_values(key)[rows]
+        order = np.argsort(values, kind='stable')
+        if descending:
+            order = order[::-1]
+        return rows[order]
+
+
+class BlockTableModel(TableModel):
+    """Block geometry rows of a BlockStore"""
+
+    COLUMNS = (('id', '#', 50), ('name', 'Name', 160), ('area', 'Area (μm²)', 100),
+               ('width', 'Width (μm)', 90), ('height', 'Height (μm)', 90),
+               ('x', 'X Position', 90), ('y', 'Y Position', 90))
+    EDITABLE = ('area', 'width', 'height', 'x', 'y')
+    WEIGHT_COLUMN = 'area'
+
+    def __init__(self, blocks):
+        self.blocks = blocks
+        self._names = None
+
+    def __len__(self):
+        return len(self.blocks)
+
+    def row_values(self, row):
+        b = self.blocks
+        return (int(row) + 1, b.names[row], int(b.area[row]), int(b.width[row]), int(b.height[row]),
+                int(b.x[row]), int(b.y[row]))
+
+    def column_values(self, key):
+        if key == 'id':
+            return np.arange(len(self.blocks))
+        if key == 'name':
+            return np.array(self.blocks.names.tolist())
+        return getattr(self.blocks, key)
+
+    def names(self):
+        if self._names is None:
+            self._names = [name.lower() for name in self.blocks.names]
+        return self._names
+
+    def set_value(self, row, key, value):
+        self.blocks[row][key] = float(value)
+
+
+class NetTableModel(TableModel):
+    """Connection rows of a NetStore"""
+
+    COLUMNS = (('id', '#', 60), ('from_name', 'From', 160), ('to_name', 'To', 160),
+               ('connections', 'Connections', 100))
+    EDITABLE = ('connections',)
+    WEIGHT_COLUMN = 'connections'
+
+    def __init__(self, connections):
+        self.connections = connections
+        self._names = None
+
+    def __len__(self):
+        return len(self.connections)
+
+    def row_values(self, row):
+        nets = self.connections
+        return (int(row) + 1, nets.names[nets.src[row]], nets.names[nets.dst[row]], nets.weight_value(row))
+
+    def column_values(self, key):
+        nets = self.connections
+        if key == 'id':
+            return np.arange(len(nets))
+        if key == 'connections':
+            return nets.weights
+        names = np.array(nets.names.tolist())
+        return names[nets.src if key == 'from_name' else nets.dst]
+
+    def names(self):
+        if self._names is None:
+            names = [name.lower() for name in self.connections.names]
+            self._names = [f"{names[s]} ↔ {names[d]}"
+                           for s, d in zip(self.connections.src.tolist(), self.connections.dst.tolist())]
+        return self._names
+
+    def set_value(self, row, key, value):
+        self.connections[row][key] = float(value)
+
+
+class VirtualTable(ttk.Frame):
+    """Windowed Treeview over a TableModel
+
+    The Treeview only ever holds the rows that fit on screen; scrolling moves
+    a window over the filtered, sorted row order and rewrites those items, so
+    loading, scrolling and refreshing after an edit cost O(visible rows).
+    before_edit(row, key) is called once an edited value has parsed and
+    returns whether it may be stored; on_edit(row, key) after it was.
+    """
+
+    def __init__(self, parent, on_edit=None, before_edit=None, empty_text="No data loaded"):
+        super().__init__(parent)
+        self.on_edit = on_edit
+        self.before_edit = before_edit
+        self.empty_text = empty_text
+        self.model = None
+        self.rows = np.zeros(0, dtype=np.int64)  # filtered and sorted row ids
+        self.first = 0                           # index into rows of the top visible row
+        self.sort_key = None
+        self.sort_descending = False
+        self.editor = None
+
+        # Filter bar
+        bar = ttk.Frame(self)
+        bar.pack(fill=tk.X, padx=5, pady=(5, 0))
+        ttk.Label(bar, text="Filter:").pack(side=tk.LEFT)
+        self.filter_var = tk.StringVar()
+        entry = ttk.Entry(bar, textvariable=self.filter_var, width=30)
+        entry.pack(side=tk.LEFT, padx=5)
+        entry.bind('<Return>', lambda e: self.apply_filter())
+        ttk.Button(bar, text="Apply", command=self.apply_filter).pack(side=tk.LEFT)
+        ttk.Label(bar, text="name text, or e.g. >= 10 on the weight column",
+                  foreground='gray').pack(side=tk.LEFT, padx=10)
+        self.count_label = ttk.Label(bar, text="")
+        self.count_label.pack(side=tk.RIGHT)
+
+        # Treeview without its own scrolling; the scrollbar drives the window
+        body = ttk.Frame(self)
+        body.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.tree = ttk.Treeview(body, show='headings', selectmode='browse')
+        self.scrollbar = ttk.Scrollbar(body, orient=tk.VERTICAL, command=self.yview)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.tree.bind('<Configure>', lambda e: self.refresh())
+        self.tree.bind('<MouseWheel>', lambda e: self.scroll(-WHEEL_ROWS if e.delta > 0 else WHEEL_ROWS))
+        self.tree.bind('<Button-4>', lambda e: self.scroll(-WHEEL_ROWS))
+        self.tree.bind('<Button-5>', lambda e: self.scroll(WHEEL_ROWS))
+        self.tree.bind('<Double-1>', self.begin_edit)
+
+    def set_model(self, model):
+        """Show a new model, keeping the current filter and sort"""
+        self.cancel_edit()
+        self.model = model
+        if model is not None:
+            columns = [key for key, _, _ in model.COLUMNS]
+            self.tree.configure(columns=columns)
+            for key, heading, width in model.COLUMNS:
+                self.tree.heading(key, text=heading, command=lambda k=key: self.sort_by(k))
+                self.tree.column(key, width=width, anchor=tk.W if 'name' in key else tk.E)
+        self.apply_filter()
+
+    def apply_filter(self):
+        """Recompute the visible row order from the filter text and sort column"""
+        self.cancel_edit()
+        if self.model is None:
+            self.rows = np.zeros(0, dtype=np.int64)
+        else:
+            self.rows = self.model.filter_rows(self.filter_var.get())
+            if self.sort_key is not None:
+                self.rows = self.model.sort_rows(self.rows, self.sort_key, self.sort_descending)
+        self.first = 0
+        self.refresh()
+
+    def sort_by(self, key):
+        """Sort on a column; clicking the same heading again reverses the order"""
+        if self.model is None:
+            return
+        self.sort_descending = not self.sort_descending if key == self.sort_key else False
+        self.sort_key = key
+        for column, heading, _ in self.model.COLUMNS:
+            arrow = (' ▼' if self.sort_descending else ' ▲') if column == key else ''
+            self.tree.heading(column, text=heading + arrow)
+        self.apply_filter()
+
+    def visible_count(self):
+        """Rows that fit in the Treeview at its current height"""
+        style = ttk.Style(self)
+        row_height = int(style.lookup('Treeview', 'rowheight') or 20)
+        header = 25
+        return max(1, (self.tree.winfo_height() - header) // row_height)
+
+    def refresh(self):
+        """Rewrite the items in the visible window from the model"""
+        self.cancel_edit()
+        count = self.visible_count()
+        total = len(self.rows)
+        self.first = max(0, min(self.first, total - count))
+        window = self.rows[self.first:self.first + count].tolist()
+
+        # Reuse the existing items, adding or dropping only the difference
+        items = self.tree.get_children()
+        for item in items[len(window):]:
+            self.tree.delete(item)
+        for k, row in enumerate(window):
+            values = self.model.row_values(row)
+            if k < len(items):
+                self.tree.item(items[k], values=values, tags=(str(row),))
+            else:
+                self.tree.insert('', tk.END, values=values, tags=(str(row),))
+
+        if total:
+            self.scrollbar.set(self.first / total, (self.first + len(window)) / total)
+            self.count_label.config(text=f"{total:,} of {len(self.model):,} rows")
+        else:
+            self.scrollbar.set(0.0, 1.0)
+            self.count_label.config(text=self.empty_text if self.model is None or not len(self.model)
+                                    else f"0 of {len(self.model):,} rows")
+
+    def yview(self, *args):
+        """Scrollbar command: moveto fraction or scroll by units/pages"""
+        count = self.visible_count()
+        if args[0] == 'moveto':
+            self.first = int(float(args[1]) * len(self.rows))
+        elif args[0] == 'scroll':
+            step = int(args[1]) * (count if args[2] == 'pages' else 1)
+            self.first += step
+        self.refresh()
+
+    def scroll(self, rows):
+        self.first += rows
+        self.refresh()
+
+    def row_of(self, item):
+        """Model row id shown by a Treeview item"""
+        return int(self.tree.item(item, 'tags')[0])
+
+    def begin_edit(self, event):
+        """Open an entry over an editable cell"""
+        item = self.tree.identify_row(event.y)
+        column = self.tree.identify_column(event.x)
+        if not item or not column or self.model is None:
+            return
+        key = self.model.COLUMNS[int(column[1:]) - 1][0]
+        if key not in self.model.EDITABLE:
+            return
+
+        self.cancel_edit()
+        box = self.tree.bbox(item, column)
+        if not box:
+            return
+        x, y, w, h = box
+        row = self.row_of(item)
+        self.editor = ttk.Entry(self.tree)
+        self.editor.insert(0, self.tree.set(item, key))
+        self.editor.select_range(0, tk.END)
+        self.editor.place(x=x, y=y, width=w, height=h)
+        self.editor.focus_set()
+        self.editor.bind('<Return>', lambda e: self.commit_edit(row, key))
+        self.editor.bind('<Escape>', lambda e: self.cancel_edit())
+        self.editor.bind('<FocusOut>', self._on_focus_out)
+
+    def commit_edit(self, row, key):
+        """Write the edited value back and redraw the visible rows"""
+        text = self.editor.get()
+        self.cancel_edit()
+        try:
+            value = self.model.parse_value(key, text)
+        except ValueError:
+            messagebox.showerror("Error", "Please enter valid numbers")
+            return
+        # Parsed first, so a bad value never leaves before_edit's work unfinished
+        if self.before_edit and not self.before_edit(row, key):
+            return
+        self.model.set_value(row, key, value)
+        if self.on_edit:
+            self.on_edit(row, key)
+        self.refresh()
+
+    def _on_focus_out(self, event):
+        # Ignore late events from an editor that was already replaced
+        if event.widget is self.editor:
+            self.cancel_edit()
+
+    def cancel_edit(self):
+        if self.editor is not None:
+            self.editor.destroy()
+            self.editor = None
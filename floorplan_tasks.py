@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Floorplanning Tool - Background tasks
+Worker threads that report to the Tk main loop through a polled queue
+"""
+
+import queue
+import threading
+import time
+
+# How often the main loop checks a task's queue
+POLL_MS = 50
+
+# Main-thread time spent per batch when applying results
+APPLY_BUDGET = 0.02
+
+
+class Cancelled(Exception):
+    """Raised inside a task's work when it has been cancelled"""
+
+
+class BackgroundTask:
+    """Run work(progress) on a worker thread and report back on the Tk thread
+
+    The worker only talks to the GUI through a queue: progress(fraction,
+    message) enqueues an update (and raises Cancelled once cancel() was
+    called, so long loops stop at their next report), and the result or
+    exception is enqueued at the end. The main loop drains the queue every
+    poll_ms with root.after and calls the callbacks there, so none of them
+    ever runs on the worker thread. Only the newest progress update of each
+    poll is delivered.
+    """
+
+    def __init__(self, root, work, on_done, on_error=None, on_progress=None, on_cancelled=None,
+                 poll_ms=POLL_MS):
+        self.root = root
+        self.work = work
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.on_cancelled = on_cancelled
+        self.poll_ms = poll_ms
+        self.events = queue.Queue()
+        self.cancel_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.finished = False
+
+    def start(self):
+        self.thread.start()
+        self.root.after(self.poll_ms, self._poll)
+        return self
+
+    def cancel(self):
+        """Ask the work to stop at its next progress report"""
+        self.cancel_event.set()
+
+    def progress(self, fraction, message=""):
+        """Report progress from the worker (raises Cancelled when cancelled)"""
+        if self.cancel_event.is_set():
+            raise Cancelled()
+        self.events.put(('progress', (fraction, message)))
+
+    def _run(self):
+        try:
+            self.events.put(('done', self.work(self.progress)))
+        except Cancelled:
+            self.events.put(('cancelled', None))
+        except Exception as e:
+            self.events.put(('error', e))
+
+    def _poll(self):
+        latest = None
+        while True:
+            try:
+                kind, value = self.events.get_nowait()
+            except queue.Empty:
+                break
+            if kind == 'progress':
+                latest = value
+                continue
+            self.finished = True
+            if kind == 'done':
+                self.on_done(value)
+            elif kind == 'error' and self.on_error:
+                self.on_error(value)
+            elif kind == 'cancelled' and self.on_cancelled:
+                self.on_cancelled()
+            return
+        if latest is not None and self.on_progress:
+            self.on_progress(*latest)
+        self.root.after(self.poll_ms, self._poll)
+
+
+def apply_in_batches(root, steps, on_done=None, budget=APPLY_BUDGET):
+    """Run callables on the Tk thread, yielding to the event loop between batches
+
+    Steps run back to back until budget seconds have passed, then the rest
+    is rescheduled with root.after, so applying a large result never holds
+    the main loop for much longer than one step.
+    """
+    steps = iter(steps)
+
+    def batch():
+        deadline = time.perf_counter() + budget
+        for step in steps:
+            step()
+            if time.perf_counter() >= deadline:
+                root.after(1, batch)
+                return
+        if on_done:
+            on_done()
+
+    batch()